@@ -0,0 +1,172 @@
+"""
+Conteos repartidos entre varios procesos.
+
+Los códigos enteros de las columnas a agrupar se copian una vez a memoria
+compartida (multiprocessing.shared_memory): el DataFrame nunca se serializa
+y cada proceso solo recibe el nombre del bloque compartido y el tramo de
+filas que le toca. Cada proceso calcula los conteos parciales de su tramo
+con np.bincount y el proceso principal los suma.
+"""
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Con menos filas el costo de repartir supera al de contar en serie
+FILAS_MINIMAS_PARALELO = 500_000
+
+# Pool de procesos reutilizado entre llamadas (se crea al primer uso)
+_pool = None
+_procesos_pool = 0
+
+
+def procesos_disponibles():
+    """Cantidad de CPU disponibles para este proceso"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _obtener_pool(procesos):
+    """Devuelve el pool de procesos, creándolo (o recreándolo con otro tamaño) si hace falta"""
+    global _pool, _procesos_pool
+    if _pool is None or _procesos_pool != procesos:
+        if _pool is not None:
+            _pool.shutdown()
+        metodos = multiprocessing.get_all_start_methods()
+        contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+        _pool = ProcessPoolExecutor(max_workers=procesos, mp_context=contexto)
+        _procesos_pool = procesos
+    return _pool
+
+
+@atexit.register
+def cerrar_pool():
+    """Termina los procesos del pool"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _indice_lineal(codigos, tamanos):
+    """Posición de cada fila en el arreglo aplanado de conteos"""
+    indice = np.zeros(len(codigos[0]) if codigos else 0, dtype=np.int64)
+    for columna, tamano in zip(codigos, tamanos):
+        indice = indice * tamano + columna
+    return indice
+
+
+def _contar_tramo(compartidos, n_filas, tamanos, inicio, fin):
+    """
+    Cuenta las combinaciones de un tramo de filas (se ejecuta en un proceso del pool)
+
+    Args:
+        compartidos (list): (nombre del bloque compartido, dtype) de cada columna de códigos
+        n_filas (int): Filas totales de cada columna
+        tamanos (list): Cantidad de códigos posibles de cada columna
+        inicio, fin (int): Tramo de filas a contar
+
+    Returns:
+        numpy.ndarray: Conteos aplanados del tramo
+    """
+    bloques = [shared_memory.SharedMemory(name=nombre) for nombre, _ in compartidos]
+    try:
+        codigos = [np.ndarray((n_filas,), dtype=dtype, buffer=bloque.buf)[inicio:fin]
+                   for bloque, (_, dtype) in zip(bloques, compartidos)]
+        conteos = np.bincount(_indice_lineal(codigos, tamanos), minlength=int(np.prod(tamanos)))
+        # Las vistas deben liberarse antes de cerrar la memoria compartida
+        del codigos
+        return conteos
+    finally:
+        for bloque in bloques:
+            bloque.close()
+
+
+def contar_combinaciones(codigos, tamanos, procesos=None):
+    """
+    Cuenta cuántas filas tiene cada combinación de códigos
+
+    Args:
+        codigos (list): Arreglos de enteros, uno por columna, con valores en [0, tamano)
+        tamanos (list): Cantidad de códigos posibles de cada columna
+        procesos (int, opcional): Procesos a usar (None o 1: en serie, en este proceso)
+
+    Returns:
+        numpy.ndarray: Conteos con forma 'tamanos'
+    """
+    tamanos = [int(tamano) for tamano in tamanos]
+    n_filas = len(codigos[0]) if codigos else 0
+    if not procesos or procesos <= 1 or n_filas < FILAS_MINIMAS_PARALELO:
+        return np.bincount(_indice_lineal(codigos, tamanos), minlength=int(np.prod(tamanos))).reshape(tamanos)
+
+    # Copiar los códigos a memoria compartida, con el tipo entero más chico que alcance
+    bloques = []
+    compartidos = []
+    try:
+        for columna, tamano in zip(codigos, tamanos):
+            columna = np.asarray(columna, dtype=np.min_scalar_type(max(tamano - 1, 0)))
+            bloque = shared_memory.SharedMemory(create=True, size=max(columna.nbytes, 1))
+            bloques.append(bloque)
+            np.ndarray(columna.shape, dtype=columna.dtype, buffer=bloque.buf)[:] = columna
+            compartidos.append((bloque.name, columna.dtype.str))
+
+        limites = np.linspace(0, n_filas, procesos + 1).astype(np.int64)
+        pool = _obtener_pool(procesos)
+        futuros = [pool.submit(_contar_tramo, compartidos, n_filas, tamanos, int(inicio), int(fin))
+                   for inicio, fin in zip(limites[:-1], limites[1:]) if fin > inicio]
+        conteos = sum(futuro.result() for futuro in futuros)
+    finally:
+        for bloque in bloques:
+            bloque.close()
+            bloque.unlink()
+    return conteos.reshape(tamanos)
+
+
+def codificar_grupos(serie):
+    """
+    Códigos de grupo de una columna para contar con contar_combinaciones
+
+    Returns:
+        tuple: (códigos con los nulos en la última posición, pandas.Index con
+        las etiquetas en orden de categoría o de primera aparición)
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, etiquetas = serie.cat.codes.to_numpy().astype(np.int64), pd.Index(serie.cat.categories)
+    else:
+        codigos, etiquetas = pd.factorize(serie)
+        codigos, etiquetas = codigos.astype(np.int64), pd.Index(etiquetas)
+    codigos[codigos < 0] = len(etiquetas)
+    return codigos, etiquetas
+
+
+def contar_por_grupo(serie, mascara=None, procesos=None):
+    """
+    Conteos por valor de una columna (como value_counts, con los valores sin
+    filas incluidos) y, opcionalmente, de las filas de una máscara, en una
+    sola pasada repartida entre procesos
+
+    Args:
+        serie (pandas.Series): Columna a agrupar
+        mascara (numpy.ndarray, opcional): Filas a contar aparte (p. ej. fallecidos)
+        procesos (int, opcional): Procesos a usar (None o 1: en serie)
+
+    Returns:
+        pandas.Series o tuple: Conteos por valor, en orden de categoría o de
+        primera aparición; con máscara, (conteos, conteos de la máscara)
+    """
+    codigos, etiquetas = codificar_grupos(serie)
+    nombre = serie.name
+    if mascara is None:
+        conteos = contar_combinaciones([codigos], [len(etiquetas) + 1], procesos)
+        return pd.Series(conteos[:-1], index=etiquetas.rename(nombre), name='count')
+
+    conteos = contar_combinaciones([codigos, np.asarray(mascara, dtype=np.int8)], [len(etiquetas) + 1, 2], procesos)
+    total = pd.Series(conteos[:-1].sum(axis=1), index=etiquetas.rename(nombre), name='count')
+    en_mascara = pd.Series(conteos[:-1, 1], index=etiquetas.rename(nombre), name='count')
+    return total, en_mascara
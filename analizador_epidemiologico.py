@@ -1,11 +1,90 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
-import seaborn as sns
+import threading
+
+from agregacion_paralela import contar_combinaciones, contar_por_grupo
+from cache_resultados import CacheResultados, memoizar
+from carga_datos import OperacionCancelada, cargar_dataset, convertir_columnas_fecha
+from cubo_datos import CuboDatos, es_fallecido
+from curva_epidemica import TOTAL, CurvaEpidemica
+from estadistica import histograma_con_kde, intervalo_wilson
+from exportacion import exportar_filas
+from geografia import COLUMNAS_MUNICIPIO, Geografia
+from instrumentacion import instrumentar
+
+
+def pyplot():
+    """
+    Importa matplotlib.pyplot al crear la primera figura propia: la
+    aplicación dibuja en sus propios canvas y no lo necesita para arrancar
+    """
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def frecuencia_pandas(periodo):
+    """Traduce los alias de período ('M', 'Y') a los aceptados por la versión de pandas instalada"""
+    try:
+        pd.tseries.frequencies.to_offset(periodo)
+        return periodo
+    except ValueError:
+        # pandas >= 3 solo acepta los alias de fin de período
+        return {'M': 'ME', 'Y': 'YE', 'Q': 'QE'}.get(periodo, periodo)
+
+
+def agrupar_en_rangos(conteos, bins, columna):
+    """
+    Agrupa conteos indexados por valor numérico (p. ej. por edad) en rangos
+    
+    Args:
+        conteos (pandas.Series): Conteos por valor
+        bins (list): Límites de los rangos (cerrados a la izquierda)
+        columna (str): Nombre de la columna agrupada
+        
+    Returns:
+        pandas.Series: Conteos por rango, en orden, incluidos los rangos vacíos
+    """
+    etiquetas = [f'{bins[i]}-{bins[i+1]-1}' for i in range(len(bins)-1)]
+    grupos = pd.cut(conteos.index, bins=bins, labels=etiquetas, right=False)
+    resultado = conteos.groupby(grupos, observed=False).sum()
+    resultado.index.name = 'grupo_' + columna
+    resultado.name = 'count'
+    return resultado
+
+
+# Con más combinaciones posibles que estas, las tablas cruzadas se cuentan
+# solo sobre las combinaciones presentes en vez de sobre un arreglo denso
+COMBINACIONES_MAXIMAS_DENSAS = 20_000_000
+
+
+def codigos_agrupacion(serie, bins=None):
+    """
+    Códigos enteros de una columna de agrupación, para contar con bincount
+    
+    Args:
+        serie (pandas.Series): Columna a agrupar
+        bins (list, opcional): Límites de rangos (cerrados a la izquierda) para columnas numéricas
+        
+    Returns:
+        tuple: (códigos con los nulos y los valores fuera de rango en la
+        última posición, pandas.Index con las etiquetas: categorías en su
+        orden, rangos en orden o valores ordenados)
+    """
+    if bins is not None:
+        etiquetas = pd.Index([f'{bins[i]}-{bins[i+1]-1}' for i in range(len(bins)-1)], name='grupo_' + str(serie.name))
+        valores = serie.to_numpy(dtype=float, na_value=np.nan)
+        codigos = np.searchsorted(np.asarray(bins, dtype=float), valores, side='right') - 1
+        codigos[np.isnan(valores) | (codigos < 0) | (codigos >= len(etiquetas))] = len(etiquetas)
+        return codigos.astype(np.int64), etiquetas
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, etiquetas = serie.cat.codes.to_numpy().astype(np.int64), pd.Index(serie.cat.categories)
+    else:
+        codigos, etiquetas = pd.factorize(serie, sort=True)
+        codigos, etiquetas = codigos.astype(np.int64), pd.Index(etiquetas)
+    codigos[codigos < 0] = len(etiquetas)
+    return codigos, etiquetas.rename(serie.name)
+
 
 class AnalizadorEpidemiologico:
     """
@@ -14,33 +93,191 @@ class AnalizadorEpidemiologico:
     de análisis más avanzadas.
     """
     
-    def __init__(self, dataframe=None, ruta_csv=None):
+    def __init__(self, dataframe=None, ruta_csv=None, max_bytes_cache=64 * 1024 * 1024, procesos=None):
         """
         Inicializa el analizador con un DataFrame existente o cargándolo desde un CSV
         
         Args:
             dataframe (pandas.DataFrame, opcional): DataFrame existente
             ruta_csv (str, opcional): Ruta al archivo CSV para cargar
+            max_bytes_cache (int, opcional): Memoria máxima de la caché de resultados
+            procesos (int, opcional): Procesos para los conteos por grupo (cubo y
+                columnas fuera del cubo); None o 1 los calcula en serie
         """
+        self.procesos = procesos
+        # Resultados de los métodos calcular_*, válidos para la versión actual de los datos
+        self.cache_resultados = CacheResultados(max_bytes_cache)
+        self._lock_derivados = threading.RLock()
+        
         if dataframe is not None:
             self.df = dataframe
         elif ruta_csv is not None:
-            self.df = pd.read_csv('dataset.csv')
-            self._procesar_fechas()
+            # Comparte la caché columnar con la aplicación principal
+            self.df = cargar_dataset(ruta_csv)
         else:
             self.df = pd.DataFrame()
+    
+    @property
+    def df(self):
+        """DataFrame analizado"""
+        return self._df
+    
+    @df.setter
+    def df(self, dataframe):
+        # Reemplazar el DataFrame invalida todo lo derivado de él
+        self._df = dataframe
+        self.invalidar_cache()
+    
+    def invalidar_cache(self):
+        """
+        Descarta los resultados derivados del DataFrame. Se llama
+        automáticamente al asignar self.df; llamarlo a mano solo si el
+        DataFrame se modifica en el lugar.
+        """
+        self.version_datos = getattr(self, 'version_datos', 0) + 1
+        self._derivados = {}
+        self.cache_resultados.limpiar()
+    
+    def derivados_actualizados(self, fusion):
+        """
+        Calcula, para los datos de una actualización diaria, los derivados
+        que ya estaban construidos (cubo, máscara de fallecidos y curvas
+        epidémicas), recorriendo solo las filas que cambiaron; la geografía
+        se reconstruye. No modifica el analizador: el resultado
+        se instala después con reemplazar_datos.
+        
+        Args:
+            fusion (carga_datos.ResultadoFusion): Resultado de fusionar la actualización
             
-    # Añadir estos métodos dentro de la clase AnalizadorEpidemiologico
+        Returns:
+            dict: Derivados actualizados por nombre
+        """
+        with self._lock_derivados:
+            actuales = dict(self._derivados) if self._derivados.get('token') == self._token_datos() else {}
+        
+        cambiadas = fusion.posiciones_cambiadas()
+        filas_nuevas = fusion.df.iloc[cambiadas]
+        derivados = {}
+        if 'cubo' in actuales:
+            derivados['cubo'] = actuales['cubo'].actualizado(fusion.df, fusion.filas_anteriores, filas_nuevas)
+        if 'mascara_fallecidos' in actuales:
+            mascara = np.zeros(len(fusion.df), dtype=bool)
+            mascara[:fusion.n_anterior] = actuales['mascara_fallecidos']
+            mascara[cambiadas] = es_fallecido(filas_nuevas['Estado'])
+            derivados['mascara_fallecidos'] = mascara
+        if 'geografia' in actuales:
+            # Los códigos nuevos desplazan las posiciones: se reconstruye (vectorizado)
+            derivados['geografia'] = Geografia(fusion.df)
+        for nombre, curva in actuales.items():
+            if isinstance(nombre, tuple) and nombre[0] == 'curva_epidemica':
+                # Sin las fechas anteriores al primer día se reconstruye al pedirla
+                curva = curva.actualizada(fusion.filas_anteriores, filas_nuevas)
+                if curva is not None:
+                    derivados[nombre] = curva
+        return derivados
+    
+    def reemplazar_datos(self, dataframe, derivados=None):
+        """
+        Reemplaza el DataFrame conservando derivados ya calculados para él
+        (ver derivados_actualizados). Los demás resultados se descartan.
+        
+        Args:
+            dataframe (pandas.DataFrame): Nuevo DataFrame
+            derivados (dict, opcional): Derivados válidos para el nuevo DataFrame
+        """
+        with self._lock_derivados:
+            self._df = dataframe
+            self.invalidar_cache()
+            self._derivados = dict(derivados or {}, token=self._token_datos())
+    
+    def _token_datos(self):
+        """Identifica la versión actual de los datos"""
+        return (self.version_datos, id(self._df), len(self._df))
+    
+    def _derivado(self, nombre, calcular):
+        """Devuelve un resultado derivado del DataFrame, calculándolo una vez por versión"""
+        with self._lock_derivados:
+            token = self._token_datos()
+            if self._derivados.get('token') != token:
+                self._derivados = {'token': token}
+            if nombre not in self._derivados:
+                self._derivados[nombre] = calcular()
+            return self._derivados[nombre]
+    
+    def cubo(self):
+        """
+        Cubo de conteos precalculado (departamento, sexo, edad, tipo de
+        contagio y estado), construido una vez por versión de los datos
+        
+        Returns:
+            CuboDatos: Cubo de conteos
+        """
+        return self._derivado('cubo', lambda: CuboDatos(self.df, procesos=self.procesos))
+    
+    def curva_epidemica(self, columna_region='Nombre departamento', columna_fecha='fecha de diagnóstico'):
+        """
+        Curva epidémica diaria por región (con la fila de total nacional),
+        construida una vez por versión de los datos y actualizada solo en los
+        días que cambian con cada actualización diaria
+        
+        Returns:
+            CurvaEpidemica: Casos por región y día y sus indicadores
+        """
+        return self._derivado(('curva_epidemica', columna_region, columna_fecha),
+                              lambda: CurvaEpidemica.desde_dataframe(self.df, columna_region, columna_fecha))
+    
+    def geografia(self):
+        """
+        Códigos divipola de departamento y municipio de cada fila con sus
+        nombres, construidos una vez por versión de los datos
+        
+        Returns:
+            geografia.Geografia: Niveles de departamento y municipio
+        """
+        return self._derivado('geografia', lambda: Geografia(self.df))
+    
+    def mascara_fallecidos(self):
+        """
+        Máscara booleana de los casos fallecidos, calculada una vez por versión
+        de los datos
+        
+        Returns:
+            numpy.ndarray: True en las filas cuyo 'Estado' contiene 'Fallecido'
+        """
+        if 'Estado' not in self.df.columns:
+            raise ValueError("No existe la columna 'Estado'")
+        return self._derivado('mascara_fallecidos', self._calcular_mascara_fallecidos)
+    
+    def _calcular_mascara_fallecidos(self):
+        estado = self.df['Estado']
+        if isinstance(estado.dtype, pd.CategoricalDtype):
+            # Buscar solo entre las categorías y expandir con los códigos (-1: nulo)
+            es_fallecido = estado.cat.categories.astype(str).str.contains('Fallecido', case=False)
+            return np.append(np.asarray(es_fallecido, dtype=bool), False)[estado.cat.codes.to_numpy()]
+        return estado.str.contains('Fallecido', case=False, na=False).to_numpy(dtype=bool)
+    
+    def fallecidos(self):
+        """
+        Subconjunto de casos fallecidos, compartido entre los métodos del
+        analizador. No debe modificarse.
+        
+        Returns:
+            pandas.DataFrame: Filas de fallecidos
+        """
+        mascara = self.mascara_fallecidos()
+        return self._derivado('fallecidos', lambda: self.df[mascara])
 
     def _procesar_fechas(self):
-        """Convierte columnas de fechas a formato datetime"""
-        columnas_fecha = [col for col in self.df.columns if 'fecha' in col.lower()]
-        for col in columnas_fecha:
-            try:
-                self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
-            except:
-                pass
+        """
+        Convierte columnas de fechas a formato datetime
+
+        Returns:
+            dict: Cantidad de valores no convertidos por columna
+        """
+        return convertir_columnas_fecha(self.df)
     
+    @instrumentar()
+    @memoizar
     def calcular_incidencia_por_periodo(self, periodo='M', columna_fecha='Fecha de diagnóstico'):
         """
         Calcula la incidencia de casos por período de tiempo
@@ -55,10 +292,16 @@ class AnalizadorEpidemiologico:
         if columna_fecha not in self.df.columns:
             raise ValueError(f"La columna {columna_fecha} no existe en el DataFrame")
             
+        # Responder desde la serie diaria precalculada si la columna ya es de fecha
+        if pd.api.types.is_datetime64_any_dtype(self.df[columna_fecha]):
+            serie_diaria = self.cubo().serie_diaria(columna_fecha)
+            return serie_diaria.resample(frecuencia_pandas(periodo)).sum()
+            
         # Agrupar por período y contar casos
-        incidencia = self.df.groupby(pd.Grouper(key=columna_fecha, freq=periodo)).size()
+        incidencia = self.df.groupby(pd.Grouper(key=columna_fecha, freq=frecuencia_pandas(periodo))).size()
         return incidencia
     
+    @instrumentar()
     def graficar_incidencia(self, periodo='M', columna_fecha='fecha de diagnóstico', ax=None):
         """
         Genera un gráfico de incidencia a lo largo del tiempo
@@ -73,20 +316,69 @@ class AnalizadorEpidemiologico:
         """
         incidencia = self.calcular_incidencia_por_periodo(periodo, columna_fecha)
         
+        from graficos import Grafico, dibujar_incidencia
         if ax is None:
-            fig, ax = plt.subplots(figsize=(10, 6))
+            fig, ax = pyplot().subplots(figsize=(10, 6))
+        
+        dibujar_incidencia(Grafico.en_axes(ax), incidencia, periodo)
+        return ax
+    
+    @instrumentar()
+    @memoizar
+    def calcular_indicadores_epidemicos(self, columna_region='Nombre departamento',
+                                        columna_fecha='fecha de diagnóstico', fecha=None):
+        """
+        Indicadores de la curva epidémica de cada región en un día: casos,
+        promedios móviles de 7 y 14 días, tasa de crecimiento diaria, tiempo
+        de duplicación (días) y Rt
         
-        incidencia.plot(kind='line', marker='o', ax=ax)
+        Args:
+            columna_region (str): Columna de región
+            columna_fecha (str): Columna de fecha de los casos
+            fecha (opcional): Día a consultar (por defecto, el último con datos)
+            
+        Returns:
+            pandas.DataFrame: Una fila por región más la fila 'Total'
+        """
+        return self.curva_epidemica(columna_region, columna_fecha).indicadores_dia(fecha)
+    
+    @instrumentar()
+    def graficar_curva_epidemica(self, region=TOTAL, columna_region='Nombre departamento',
+                                 columna_fecha='fecha de diagnóstico', ax=None):
+        """
+        Genera un gráfico de los casos diarios de una región con sus promedios
+        móviles de 7 y 14 días y el Rt en un eje secundario
+        
+        Args:
+            region (str): Región a graficar ('Total': todo el país)
+            columna_region (str): Columna de región
+            columna_fecha (str): Columna de fecha de los casos
+            ax (matplotlib.axes, opcional): Axes donde graficar
+            
+        Returns:
+            matplotlib.axes: Axes con el gráfico
+        """
+        curva = self.curva_epidemica(columna_region, columna_fecha)
+        if region not in curva.regiones:
+            raise ValueError(f"La región {region} no está en la columna {columna_region}")
+        fila = curva.regiones.get_loc(region)
+        serie = pd.DataFrame({
+            'casos': curva.casos[fila],
+            'promedio_7': curva.promedio_movil(7)[region],
+            'promedio_14': curva.promedio_movil(14)[region],
+            'rt': curva.rt()[region],
+        }, index=curva.fechas)
+        
+        from graficos import Grafico, dibujar_curva_epidemica
+        if ax is None:
+            fig, ax = pyplot().subplots(figsize=(12, 6))
         
-        # Configurar etiquetas y título
-        titulo_periodo = {'D': 'Diaria', 'W': 'Semanal', 'M': 'Mensual', 'Y': 'Anual'}
-        ax.set_title(f'Incidencia {titulo_periodo.get(periodo, "")} de Casos')
-        ax.set_xlabel('Fecha')
-        ax.set_ylabel('Número de Casos')
-        ax.grid(True, linestyle='--', alpha=0.7)
+        dibujar_curva_epidemica(Grafico.en_axes(ax), serie, region)
         
         return ax
     
+    @instrumentar()
+    @memoizar
     def calcular_distribucion_por_grupo(self, columna_grupo='Edad', bins=None):
         """
         Calcula la distribución de casos por grupos (ej. Edad, Sexo)
@@ -101,23 +393,25 @@ class AnalizadorEpidemiologico:
         if columna_grupo not in self.df.columns:
             raise ValueError(f"La columna {columna_grupo} no existe en el DataFrame")
         
-        # Para variables numéricas como Edad, podemos usar bins
-        if bins is not None and pd.api.types.is_numeric_dtype(self.df[columna_grupo]):
-            # Crear grupos de Edad
-            etiquetas = [f'{bins[i]}-{bins[i+1]-1}' for i in range(len(bins)-1)]
-            self.df['grupo_' + columna_grupo] = pd.cut(
-                self.df[columna_grupo], 
-                bins=bins,
-                labels=etiquetas, 
-                right=False
-            )
-            distribucion = self.df['grupo_' + columna_grupo].value_counts().sort_index()
-        else:
-            # Para variables categóricas
-            distribucion = self.df[columna_grupo].value_counts()
-        
-        return distribucion
+        usar_bins = bins is not None and pd.api.types.is_numeric_dtype(self.df[columna_grupo])
+        
+        # Las columnas del cubo se responden sin recorrer las filas
+        cubo = self.cubo()
+        if cubo.tiene(columna_grupo):
+            conteos = cubo.contar(columna_grupo)
+            if usar_bins:
+                return agrupar_en_rangos(conteos, bins, columna_grupo)
+            conteos = conteos[conteos > 0]
+            return conteos.sort_values(ascending=False, kind='stable')
+        
+        # Por valor y luego por rango, en serie o repartido entre procesos
+        conteos = contar_por_grupo(self.df[columna_grupo], procesos=self.procesos)
+        if usar_bins:
+            return agrupar_en_rangos(conteos, bins, columna_grupo)
+        conteos = conteos[conteos > 0]
+        return conteos.sort_values(ascending=False, kind='stable')
     
+    @instrumentar()
     def graficar_distribucion_por_grupo(self, columna_grupo='Edad', bins=None, tipo_grafico='bar', ax=None):
         """
         Genera un gráfico de distribución por grupos
@@ -133,21 +427,18 @@ class AnalizadorEpidemiologico:
         """
         distribucion = self.calcular_distribucion_por_grupo(columna_grupo, bins)
         
+        from graficos import Grafico, dibujar_distribucion, dibujar_distribucion_pastel
         if ax is None:
-            fig, ax = plt.subplots(figsize=(10, 6))
+            fig, ax = pyplot().subplots(figsize=(10, 6))
         
         if tipo_grafico == 'pie':
-            distribucion.plot(kind='pie', autopct='%1.1f%%', ax=ax)
-            ax.set_ylabel('')
+            dibujar_distribucion_pastel(Grafico.en_axes(ax), distribucion, columna_grupo)
         else:
-            distribucion.plot(kind='bar', ax=ax)
-            ax.set_xlabel(columna_grupo.capitalize())
-            ax.set_ylabel('Número de Casos')
-            
-        ax.set_title(f'Distribución de Casos por {columna_grupo.capitalize()}')
-        
+            dibujar_distribucion(Grafico.en_axes(ax), distribucion, columna_grupo)
         return ax
     
+    @instrumentar()
+    @memoizar
     def calcular_tasa_mortalidad(self, por_grupo=None, bins=None):
         """
         Calcula la tasa de mortalidad general o por grupos
@@ -165,8 +456,7 @@ class AnalizadorEpidemiologico:
             
         # Contar casos y muertes
         total_casos = len(self.df)
-        muertes = self.df[self.df['Estado'].str.contains('Fallecido', case=False, na=False)].copy()
-        total_muertes = len(muertes)
+        total_muertes = self.calcular_fallecidos()
         
         # Calcular tasa general
         if por_grupo is None:
@@ -175,53 +465,115 @@ class AnalizadorEpidemiologico:
         # Calcular tasa por grupos
         if por_grupo not in self.df.columns:
             raise ValueError(f"La columna {por_grupo} no existe en el DataFrame")
-            
-        # Para variables numéricas como Edad, podemos usar bins
-        if bins is not None and pd.api.types.is_numeric_dtype(self.df[por_grupo]):
-            # Crear grupos
-            etiquetas = [f'{bins[i]}-{bins[i+1]-1}' for i in range(len(bins)-1)]
-            self.df['grupo_' + por_grupo] = pd.cut(
-                self.df[por_grupo], 
-                bins=bins,
-                labels=etiquetas, 
-                right=False
-            )
-            muertes['grupo_' + por_grupo] = pd.cut(
-                muertes[por_grupo], 
-                bins=bins,
-                labels=etiquetas, 
-                right=False
-            )
-            
-            # Contar casos por grupo
-            casos_por_grupo = self.df['grupo_' + por_grupo].value_counts().sort_index()
-            muertes_por_grupo = muertes['grupo_' + por_grupo].value_counts().sort_index()
-            
-            # Asegurar que todos los grupos estén presentes
-            for grupo in casos_por_grupo.index:
-                if grupo not in muertes_por_grupo:
-                    muertes_por_grupo[grupo] = 0
-            
-            muertes_por_grupo = muertes_por_grupo.sort_index()
-            
-            # Calcular tasa
-            tasa_mortalidad = (muertes_por_grupo / casos_por_grupo) * 100
-            
+        
+        usar_bins = bins is not None and pd.api.types.is_numeric_dtype(self.df[por_grupo])
+        
+        # Las columnas del cubo se responden sin recorrer las filas
+        cubo = self.cubo()
+        if cubo.tiene(por_grupo, 'Estado'):
+            casos_por_grupo = cubo.contar(por_grupo)
+            muertes_por_grupo = cubo.contar(por_grupo, solo_fallecidos=True)
+            if usar_bins:
+                casos_por_grupo = agrupar_en_rangos(casos_por_grupo, bins, por_grupo)
+                muertes_por_grupo = agrupar_en_rangos(muertes_por_grupo, bins, por_grupo)
+            else:
+                casos_por_grupo = casos_por_grupo[casos_por_grupo > 0].sort_index()
+                muertes_por_grupo = muertes_por_grupo.reindex(casos_por_grupo.index)
+            return (muertes_por_grupo / casos_por_grupo) * 100
+        
+        # Casos y muertes en una sola pasada, con el mismo orden que el cubo
+        casos_por_grupo, muertes_por_grupo = contar_por_grupo(
+            self.df[por_grupo], mascara=self.mascara_fallecidos(), procesos=self.procesos)
+        if usar_bins:
+            casos_por_grupo = agrupar_en_rangos(casos_por_grupo, bins, por_grupo)
+            muertes_por_grupo = agrupar_en_rangos(muertes_por_grupo, bins, por_grupo)
         else:
-            # Para variables categóricas
-            casos_por_grupo = self.df[por_grupo].value_counts()
-            muertes_por_grupo = muertes[por_grupo].value_counts()
-            
-            # Asegurar que todos los grupos estén presentes
-            for grupo in casos_por_grupo.index:
-                if grupo not in muertes_por_grupo:
-                    muertes_por_grupo[grupo] = 0
-            
-            # Calcular tasa
-            tasa_mortalidad = (muertes_por_grupo / casos_por_grupo) * 100
+            casos_por_grupo = casos_por_grupo[casos_por_grupo > 0].sort_index()
+            muertes_por_grupo = muertes_por_grupo.reindex(casos_por_grupo.index)
+        return (muertes_por_grupo / casos_por_grupo) * 100
+    
+    @instrumentar()
+    @memoizar
+    def calcular_tabla_mortalidad(self, por_grupos, bins=None, confianza=0.95, incluir_vacios=False):
+        """
+        Tabla de letalidad cruzada: casos, fallecidos, tasa e intervalo de
+        confianza de Wilson de cada combinación de valores de las columnas
+        de agrupación (p. ej. departamento × sexo × rango de edad). Todas
+        las combinaciones se cuentan en una sola pasada sobre los datos.
+        
+        Args:
+            por_grupos (str o list): Columna o columnas de agrupación
+            bins (dict o list, opcional): Rangos de las columnas numéricas:
+                {columna: bins}, o una lista de límites para todas las columnas numéricas
+            confianza (float): Nivel de confianza del intervalo (0.95: 95%)
+            incluir_vacios (bool): Incluir las combinaciones sin casos (con tasa NaN);
+                no se admite si hay más de COMBINACIONES_MAXIMAS_DENSAS combinaciones
             
-        return tasa_mortalidad
+        Returns:
+            pandas.DataFrame: Una fila por combinación, indexada por las
+            columnas de agrupación, con 'casos', 'fallecidos' y 'tasa',
+            'ic_inferior' e 'ic_superior' en porcentaje. Los nulos de las
+            columnas de agrupación no forman grupo.
+        """
+        columnas = [por_grupos] if isinstance(por_grupos, str) else list(por_grupos)
+        if not columnas:
+            raise ValueError("Se necesita al menos una columna de agrupación")
+        for columna in columnas:
+            if columna not in self.df.columns:
+                raise ValueError(f"La columna {columna} no existe en el DataFrame")
+        fallecidos = self.mascara_fallecidos().astype(np.int8)
+        
+        # Códigos de cada columna (los nulos quedan en la última posición)
+        codigos, etiquetas = [], []
+        for columna in columnas:
+            bins_columna = bins.get(columna) if isinstance(bins, dict) else bins
+            if bins_columna is not None and not pd.api.types.is_numeric_dtype(self.df[columna]):
+                bins_columna = None
+            codigos_columna, etiquetas_columna = codigos_agrupacion(self.df[columna], bins_columna)
+            codigos.append(codigos_columna)
+            etiquetas.append(etiquetas_columna)
+        tamanos = [len(etiquetas_columna) + 1 for etiquetas_columna in etiquetas]
+        
+        if np.prod(tamanos, dtype=float) <= COMBINACIONES_MAXIMAS_DENSAS:
+            # Casos y muertes de todas las combinaciones en un solo bincount
+            conteos = contar_combinaciones(codigos + [fallecidos], tamanos + [2], self.procesos)
+            casos = conteos.sum(axis=-1).ravel()
+            muertes = conteos[..., 1].ravel()
+            posiciones = np.arange(casos.size)
+            if not incluir_vacios:
+                presentes = casos > 0
+                posiciones, casos, muertes = posiciones[presentes], casos[presentes], muertes[presentes]
+        elif incluir_vacios:
+            raise ValueError("Demasiadas combinaciones para incluir las vacías; "
+                             "use menos columnas o rangos más amplios")
+        else:
+            # Demasiadas combinaciones posibles: contar solo las presentes
+            posiciones, inversos = np.unique(np.ravel_multi_index(codigos, tamanos), return_inverse=True)
+            casos = np.bincount(inversos, minlength=len(posiciones))
+            muertes = np.bincount(inversos, weights=fallecidos, minlength=len(posiciones)).astype(np.int64)
+        
+        # Descartar las combinaciones con algún nulo
+        codigos_combinacion = np.unravel_index(posiciones, tamanos)
+        validas = np.ones(len(posiciones), dtype=bool)
+        for codigos_columna, etiquetas_columna in zip(codigos_combinacion, etiquetas):
+            validas &= codigos_columna < len(etiquetas_columna)
+        niveles = [etiquetas_columna.take(codigos_columna[validas])
+                   for codigos_columna, etiquetas_columna in zip(codigos_combinacion, etiquetas)]
+        indice = niveles[0] if len(niveles) == 1 else pd.MultiIndex.from_arrays(niveles)
+        casos, muertes = casos[validas], muertes[validas]
+        
+        inferior, superior = intervalo_wilson(muertes, casos, confianza)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tasa = muertes / casos * 100
+        return pd.DataFrame({
+            'casos': casos.astype(np.int64),
+            'fallecidos': muertes.astype(np.int64),
+            'tasa': tasa,
+            'ic_inferior': inferior * 100,
+            'ic_superior': superior * 100,
+        }, index=indice)
     
+    @instrumentar()
     def graficar_tasa_mortalidad(self, por_grupo=None, bins=None, ax=None):
         """
         Genera un gráfico de tasa de mortalidad
@@ -236,28 +588,15 @@ class AnalizadorEpidemiologico:
         """
         tasa_mortalidad = self.calcular_tasa_mortalidad(por_grupo, bins)
         
+        from graficos import Grafico, dibujar_tasa_mortalidad
         if ax is None:
-            fig, ax = plt.subplots(figsize=(10, 6))
-        
-        if isinstance(tasa_mortalidad, pd.Series):
-            tasa_mortalidad.plot(kind='bar', ax=ax)
-            ax.set_xlabel(por_grupo.capitalize())
-            ax.set_title(f'Tasa de Mortalidad por {por_grupo.capitalize()}')
-        else:
-            ax.bar(['Total'], [tasa_mortalidad])
-            ax.set_title('Tasa de Mortalidad General')
-            
-        ax.set_ylabel('Tasa de Mortalidad (%)')
+            fig, ax = pyplot().subplots(figsize=(10, 6))
         
-        # Añadir etiquetas de valores sobre las barras
-        for i, v in enumerate(tasa_mortalidad):
-            if isinstance(tasa_mortalidad, pd.Series):
-                ax.text(i, v + 0.5, f'{v:.2f}%', ha='center')
-            else:
-                ax.text(0, v + 0.5, f'{v:.2f}%', ha='center')
-                
+        dibujar_tasa_mortalidad(Grafico.en_axes(ax), tasa_mortalidad, por_grupo)
         return ax
     
+    @instrumentar()
+    @memoizar
     def calcular_tiempo_hospitalizacion(self, columna_inicio='fecha de diagnóstico', 
                                       columna_fin='fecha de recuperación'):
         """
@@ -284,117 +623,197 @@ class AnalizadorEpidemiologico:
         
         return df_tiempo['tiempo_dias'].mean()
     
+    @instrumentar()
+    @memoizar
     def calcular_fallecidos(self):
         """Calcula la cantidad total de fallecidos"""
         if 'Estado' not in self.df.columns:
             raise ValueError("No existe la columna 'Estado'")
-        return len(self.df[self.df['Estado'].str.contains('Fallecido', case=False, na=False)])
+        return self.cubo().contar(solo_fallecidos=True)
+    
+    @instrumentar()
+    @memoizar
+    def calcular_fallecidos_por_departamento(self):
+        """
+        Calcula la cantidad de fallecidos por departamento
+        
+        Returns:
+            pandas.Series: Fallecidos por departamento, ordenados por nombre
+        """
+        if 'Nombre departamento' not in self.df.columns:
+            raise ValueError("Columna 'Nombre departamento' no encontrada")
+        # Por nombre, como el combo y el filtro de departamento (un código puede
+        # aparecer con nombres distintos en los datos)
+        conteo = self.cubo().contar('Nombre departamento', solo_fallecidos=True)
+        return conteo[conteo > 0].sort_index()
+    
+    @instrumentar()
+    @memoizar
+    def calcular_fallecidos_por_municipio(self):
+        """
+        Calcula la cantidad de fallecidos por municipio
+        
+        Returns:
+            pandas.Series: Fallecidos por municipio, indexados por 'MUNICIPIO
+            (DEPARTAMENTO)' (hay nombres repetidos), de mayor a menor
+        """
+        if not all(columna in self.df.columns for columna in COLUMNAS_MUNICIPIO):
+            raise ValueError(f"Columnas {', '.join(COLUMNAS_MUNICIPIO)} no encontradas")
+        geografia = self.geografia()
+        conteo = pd.Series(geografia.municipios.contar(mascara=self.mascara_fallecidos()),
+                           index=pd.Index(geografia.etiquetas_municipios(), name='Municipio'), name='count')
+        return conteo[conteo > 0].sort_values(ascending=False, kind='stable')
+    
+    @instrumentar()
+    @memoizar
+    def calcular_fallecidos_por_contagio(self):
+        """
+        Calcula la cantidad de fallecidos por tipo de contagio
+        
+        Returns:
+            pandas.Series: Fallecidos por tipo de contagio, de mayor a menor
+        """
+        if 'Tipo de contagio' not in self.df.columns:
+            raise ValueError("Columna 'Tipo de contagio' no encontrada")
+        conteo = self.cubo().contar('Tipo de contagio', solo_fallecidos=True)
+        return conteo[conteo > 0].sort_values(ascending=False, kind='stable')
+    
+    @instrumentar()
+    @memoizar
+    def calcular_edades_fallecidos(self):
+        """
+        Calcula la cantidad de fallecidos por cada edad
+        
+        Returns:
+            pandas.Series: Fallecidos indexados por edad (en años enteros)
+        """
+        if 'Edad' not in self.df.columns:
+            raise ValueError("Columna 'Edad' no encontrada")
+        cubo = self.cubo()
+        if pd.api.types.is_numeric_dtype(self.df['Edad']) and cubo.tiene('Edad', 'Estado'):
+            return cubo.contar('Edad', solo_fallecidos=True)
+        # Edades no numéricas: convertirlas sobre los fallecidos
+        edades = pd.to_numeric(self.fallecidos()['Edad'], errors='coerce').dropna()
+        return edades.value_counts().sort_index()
 
+    @instrumentar()
+    @memoizar
+    def calcular_histograma_edades_fallecidos(self, bins=30):
+        """
+        Calcula el histograma de edades de los fallecidos y su curva de
+        densidad a partir de los conteos por edad, sin recorrer las filas
+        
+        Args:
+            bins (int): Cantidad de barras
+            
+        Returns:
+            dict: 'conteos' y 'bordes' del histograma, 'x' e 'y' de la curva
+            (en unidades de conteo por barra)
+        """
+        edades = self.calcular_edades_fallecidos()
+        edades = edades[edades > 0]
+        return histograma_con_kde(edades.index.to_numpy(dtype=float), edades.to_numpy(dtype=float), bins)
+
+    @instrumentar()
     def graficar_fallecidos(self, ax=None):
         """Genera el gráfico de cantidad total de fallecidos"""
         cantidad = self.calcular_fallecidos()
         
+        from graficos import Grafico, dibujar_total_fallecidos
         if ax is None:
-            fig, ax = plt.subplots(figsize=(6, 3))
-            
-        ax.text(0.5, 0.5, f'{cantidad:,}\nFallecidos',
-                fontsize=32, ha='center', va='center', 
-                weight='bold', color='darkred')
-        ax.axis('off')
-        ax.set_title('Cantidad de personas fallecidas', 
-                    fontsize=16, weight='bold', pad=20)
+            fig, ax = pyplot().subplots(figsize=(6, 3))
+        
+        dibujar_total_fallecidos(Grafico.en_axes(ax), cantidad)
         return ax
 
+    @instrumentar()
     def graficar_fallecidos_por_departamento(self, ax=None):
         """Genera gráfico de barras de fallecidos por departamento"""
-        if 'Nombre departamento' not in self.df.columns:
-            raise ValueError("Columna 'Nombre departamento' no encontrada")
-            
-        data = self.df[self.df['Estado'].str.contains('Fallecido', case=False, na=False)]
-        fallecidos_depto = data.groupby('Nombre departamento').size()
+        fallecidos_depto = self.calcular_fallecidos_por_departamento()
         
+        from graficos import Grafico, dibujar_fallecidos_por_departamento
         if ax is None:
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-        fallecidos_depto.plot(kind='bar', ax=ax, color='skyblue')
-        ax.set_title('Fallecidos por departamento', fontsize=18, weight='bold')
-        ax.set_xlabel('Departamento', fontsize=14)
-        ax.set_ylabel('Cantidad', fontsize=14)
-        plt.xticks(rotation=45, ha='right')
+            fig, ax = pyplot().subplots(figsize=(12, 6))
+        
+        dibujar_fallecidos_por_departamento(Grafico.en_axes(ax), fallecidos_depto)
         return ax
     
-    def graficar_distribucion_Edad_fallecidos(self, ax=None):
+    @instrumentar()
+    def graficar_fallecidos_por_municipio(self, cantidad=30, ax=None):
         """
-            Genera un histograma de distribución por Edad de fallecidos.
-             """
-        if 'Edad' not in self.df.columns:
-            raise ValueError("Columna 'Edad' no encontrada")
+        Genera gráfico de barras de los municipios con más fallecidos
         
-        # Filtrar sólo los casos de fallecidos
-        data = self.df[self.df['Estado'].str.contains('Fallecido', case=False, na=False)].copy()
-        # Asegurarnos de que Edad sea numérico y sin NaNs
-        data['Edad'] = pd.to_numeric(data['Edad'], errors='coerce')
-        data = data.dropna(subset=['Edad'])
+        Args:
+            cantidad (int): Municipios a mostrar
+        """
+        fallecidos_municipio = self.calcular_fallecidos_por_municipio().head(cantidad)
         
-        # Crear figura/axes si no se proporcionó uno
+        from graficos import Grafico, dibujar_fallecidos_por_municipio
         if ax is None:
-            fig, ax = plt.subplots(figsize=(12, 6))
+            fig, ax = pyplot().subplots(figsize=(12, 6))
         
-        # Dibujar histograma
-        sns.histplot(data['Edad'], bins=30, kde=True, ax=ax, color='skyblue')
+        dibujar_fallecidos_por_municipio(Grafico.en_axes(ax), fallecidos_municipio)
+        return ax
+    
+    @instrumentar()
+    def graficar_distribucion_Edad_fallecidos(self, ax=None):
+        """
+            Genera un histograma de distribución por Edad de fallecidos.
+             """
+        # Histograma y curva de densidad calculados desde los conteos por edad
+        histograma = self.calcular_histograma_edades_fallecidos()
         
-        # Ajustar etiquetas y título
-        ax.set_title('Distribución de fallecidos por Edad', fontsize=18, weight='bold')
-        ax.set_xlabel('Edad', fontsize=14)
-        ax.set_ylabel('Cantidad', fontsize=14)
+        from graficos import Grafico, dibujar_histograma_edades
+        if ax is None:
+            fig, ax = pyplot().subplots(figsize=(12, 6))
         
+        dibujar_histograma_edades(Grafico.en_axes(ax), histograma)
         return ax
 
 
+    @instrumentar()
     def graficar_fallecidos_por_contagio(self, ax=None):
         """Genera gráfico de fallecidos por Tipo de contagio"""
-        if 'Tipo de contagio' not in self.df.columns:
-            raise ValueError("Columna 'Tipo de contagio' no encontrada")
-            
-        data = self.df[self.df['Estado'].str.contains('Fallecido', case=False, na=False)]
-        contagios = data['Tipo de contagio'].value_counts()
+        contagios = self.calcular_fallecidos_por_contagio()
         
+        from graficos import Grafico, dibujar_fallecidos_por_contagio
         if ax is None:
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-        contagios.plot(kind='bar', ax=ax, color='skyblue')
-        ax.set_title('Fallecidos por Tipo de contagio', fontsize=18, weight='bold')
-        ax.set_xlabel('Tipo de contagio', fontsize=14)
-        ax.set_ylabel('Cantidad', fontsize=14)
-        plt.xticks(rotation=45, ha='right')
+            fig, ax = pyplot().subplots(figsize=(12, 6))
+        
+        dibujar_fallecidos_por_contagio(Grafico.en_axes(ax), contagios)
         return ax
     
 
-    def exportar_datos_filtrados(self, filtros, ruta_salida):
+    def exportar_datos_filtrados(self, filtros, ruta_salida, formato=None, progreso=None, cancelar=None):
         """
-        Exporta los datos filtrados a un nuevo CSV
+        Exporta los datos filtrados a un nuevo archivo, escribiéndolos por bloques
         
         Args:
             filtros (dict): Diccionario con filtros {columna: valor}
             ruta_salida (str): Ruta del archivo de salida
+            formato (str, opcional): 'csv', 'csv.gz', 'csv.zst' o 'parquet' (por defecto, según la extensión)
+            progreso (callable, opcional): Recibe (filas_escritas, filas_totales)
+            cancelar (callable, opcional): Devuelve True si hay que abortar la exportación
             
         Returns:
             bool: True si la exportación fue exitosa
         """
-        df_filtrado = self.df.copy()
-        
-        # Aplicar filtros
+        # Máscara de las filas que cumplen los filtros (sin copiar el DataFrame)
+        mascara = np.ones(len(self.df), dtype=bool)
         for columna, valor in filtros.items():
-            if columna in df_filtrado.columns:
+            if columna in self.df.columns:
                 if isinstance(valor, (list, tuple)):
-                    df_filtrado = df_filtrado[df_filtrado[columna].isin(valor)]
+                    mascara &= self.df[columna].isin(valor).to_numpy(dtype=bool)
                 else:
-                    df_filtrado = df_filtrado[df_filtrado[columna] == valor]
+                    mascara &= (self.df[columna] == valor).fillna(False).to_numpy(dtype=bool)
         
-        # Exportar a CSV
         try:
-            df_filtrado.to_csv(ruta_salida, index=False)
+            exportar_filas(self.df, np.flatnonzero(mascara), ruta_salida, formato=formato,
+                           progreso=progreso, cancelar=cancelar)
             return True
+        except OperacionCancelada:
+            print("Exportación cancelada")
+            return False
         except Exception as e:
             print(f"Error al exportar: {e}")
             return False
@@ -403,6 +822,8 @@ class AnalizadorEpidemiologico:
 if __name__ == "__main__":
     # Este código se ejecuta solo si se ejecuta directamente este script
     try:
+        plt = pyplot()
+        
         # Cargar datos
         analizador = AnalizadorEpidemiologico(ruta_csv="dataset.csv")
         
@@ -0,0 +1,544 @@
+"""
+Banco de pruebas de rendimiento con datasets sintéticos.
+
+Uso:
+    python benchmark.py [--tamanos 100000 1000000 10000000] [--directorio datos_benchmark]
+                        [--salida benchmark.json] [--repeticiones 3] [--sin-gui] [--sin-memoria]
+    python benchmark.py --comparar anterior.json nuevo.json
+
+Genera CSV sintéticos con las columnas de ESQUEMA_DATASET (el mismo
+esquema del DataFrame vacío de la aplicación) y distribuciones parecidas a
+las del dataset del INS: departamentos y municipios con sus códigos
+divipola, edades, proporción de fallecidos y fechas entre 2020 y 2023 con
+olas de contagio. Los CSV se generan una vez por tamaño y se reutilizan.
+
+Para cada tamaño se miden la carga del dataset, cada método calcular_* y
+graficar_* de AnalizadorEpidemiologico (en frío, con la caché de
+resultados vacía, y en caliente) y, con la interfaz bajo la plataforma
+'offscreen' de Qt, cargar_datos, aplicar_filtros, actualizar_tabla y
+graficar de la ventana principal. Los tiempos son el mínimo de varias
+repeticiones; la memoria es el pico de tracemalloc en una ejecución
+aparte (tracemalloc enlentece el código medido). El resultado es un
+informe JSON para comparar versiones.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+
+from analizador_epidemiologico import AnalizadorEpidemiologico
+from carga_datos import ESQUEMA_DATASET, cargar_dataset, rutas_cache
+
+# Sin pantalla: la interfaz se dibuja en memoria
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+TAMANOS_PREDETERMINADOS = [100_000, 1_000_000, 10_000_000]
+
+# Filas generadas por bloque al escribir los CSV sintéticos
+FILAS_POR_BLOQUE = 1_000_000
+
+# Departamentos: (código divipola, nombre, peso en los casos, municipios)
+DEPARTAMENTOS = [
+    (5, 'ANTIOQUIA', 0.150, 125), (8, 'ATLANTICO', 0.045, 23), (11, 'BOGOTA', 0.300, 1),
+    (13, 'BOLIVAR', 0.030, 46), (15, 'BOYACA', 0.025, 123), (17, 'CALDAS', 0.020, 27),
+    (18, 'CAQUETA', 0.006, 16), (19, 'CAUCA', 0.015, 42), (20, 'CESAR', 0.017, 25),
+    (23, 'CORDOBA', 0.020, 30), (25, 'CUNDINAMARCA', 0.050, 116), (27, 'CHOCO', 0.003, 30),
+    (41, 'HUILA', 0.018, 37), (44, 'GUAJIRA', 0.007, 15), (47, 'MAGDALENA', 0.010, 30),
+    (50, 'META', 0.020, 29), (52, 'NARIÑO', 0.015, 64), (54, 'NORTE SANTANDER', 0.020, 40),
+    (63, 'QUINDIO', 0.011, 12), (66, 'RISARALDA', 0.020, 14), (68, 'SANTANDER', 0.045, 87),
+    (70, 'SUCRE', 0.009, 26), (73, 'TOLIMA', 0.020, 47), (76, 'VALLE', 0.095, 42),
+    (81, 'ARAUCA', 0.004, 7), (85, 'CASANARE', 0.008, 19), (86, 'PUTUMAYO', 0.004, 13),
+    (88, 'SAN ANDRES', 0.002, 2), (91, 'AMAZONAS', 0.001, 11), (94, 'GUAINIA', 0.001, 9),
+    (95, 'GUAVIARE', 0.001, 4), (97, 'VAUPES', 0.001, 6), (99, 'VICHADA', 0.001, 4),
+]
+
+# Olas de contagio: (centro, desvío en días, peso)
+OLAS = [('2020-07-25', 35, 0.25), ('2021-01-10', 25, 0.20), ('2021-06-20', 35, 0.30),
+        ('2022-01-15', 18, 0.20), ('2022-08-01', 120, 0.05)]
+FECHA_MINIMA, FECHA_MAXIMA = '2020-03-06', '2023-12-31'
+
+# Proporción de casos fallecidos (crece con la edad)
+PROPORCION_FALLECIDOS = 0.025
+
+# Valores de las columnas categóricas: valor -> probabilidad
+TIPOS_CONTAGIO = {'Comunitaria': 0.60, 'Relacionado': 0.35, 'En estudio': 0.04, 'Importado': 0.01}
+ESTADOS_NO_FALLECIDO = {'Leve': 0.90, 'Moderado': 0.05, 'Grave': 0.01, 'N/A': 0.04}
+UBICACIONES_NO_FALLECIDO = {'Casa': 0.93, 'Hospital': 0.05, 'Hospital UCI': 0.01, 'N/A': 0.01}
+PERTENENCIAS = {'Otro': 0.92, 'Negro': 0.05, 'Indígena': 0.025, 'Raizal': 0.003, 'ROM': 0.001, 'Palenquero': 0.001}
+GRUPOS_ETNICOS = ['Wayuu', 'Zenú', 'Nasa', 'Pastos', 'Embera']
+PAISES = [('840', 'ESTADOS UNIDOS DE AMÉRICA'), ('724', 'ESPAÑA'), ('484', 'MÉXICO'), ('862', 'VENEZUELA')]
+
+# Formato de las fechas en el CSV del INS
+FORMATO_FECHA_CSV = '%d/%m/%Y 0:00:00'
+
+# Argumentos de los métodos del analizador cuyos valores por defecto no
+# sirven para el dataset (columnas con otro nombre) o que conviene fijar
+BINS_EDAD = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 120]
+ARGUMENTOS_ANALIZADOR = {
+    'calcular_incidencia_por_periodo': {'periodo': 'M', 'columna_fecha': 'fecha de diagnóstico'},
+    'graficar_incidencia': {'periodo': 'M', 'columna_fecha': 'fecha de diagnóstico'},
+    'calcular_distribucion_por_grupo': {'columna_grupo': 'Edad', 'bins': BINS_EDAD},
+    'graficar_distribucion_por_grupo': {'columna_grupo': 'Edad', 'bins': BINS_EDAD},
+    'calcular_tasa_mortalidad': {'por_grupo': 'Nombre departamento'},
+    'calcular_tabla_mortalidad': {'por_grupos': ['Nombre departamento', 'Sexo', 'Edad'], 'bins': {'Edad': BINS_EDAD}},
+    'graficar_tasa_mortalidad': {'por_grupo': 'Sexo'},
+    'calcular_tiempo_hospitalizacion': {'columna_fin': 'Fecha de recuperación'},
+}
+
+
+def _elegir(rng, opciones, n):
+    """Muestra n valores de un dict valor -> probabilidad"""
+    valores = np.array(list(opciones), dtype=object)
+    probabilidades = np.array(list(opciones.values()), dtype=float)
+    return valores[rng.choice(len(valores), size=n, p=probabilidades / probabilidades.sum())]
+
+
+def _fechas_texto(dias):
+    """Convierte días desde 1970 en el texto del CSV, formateando cada día distinto una sola vez"""
+    unicos, inversos = np.unique(dias, return_inverse=True)
+    textos = pd.to_datetime(unicos, unit='D').strftime(FORMATO_FECHA_CSV).to_numpy(dtype=object)
+    return textos[inversos]
+
+
+def generar_bloque(n, primer_id, rng):
+    """
+    Genera n casos sintéticos con las columnas de ESQUEMA_DATASET, como
+    texto tal como vienen en el CSV
+
+    Args:
+        n (int): Cantidad de filas
+        primer_id (int): Id de caso de la primera fila
+        rng (numpy.random.Generator): Generador de números aleatorios
+
+    Returns:
+        pandas.DataFrame: Bloque listo para escribir con to_csv
+    """
+    # Departamento y municipio: la capital (código xx001) concentra la mitad de los casos
+    pesos = np.array([d[2] for d in DEPARTAMENTOS])
+    departamento = rng.choice(len(DEPARTAMENTOS), size=n, p=pesos / pesos.sum())
+    codigos_departamento = np.array([d[0] for d in DEPARTAMENTOS])[departamento]
+    n_municipios = np.array([d[3] for d in DEPARTAMENTOS])[departamento]
+    otro_municipio = (rng.random(n) * (n_municipios - 1)).astype(np.int64) + 1
+    k = np.where((rng.random(n) < 0.5) | (n_municipios == 1), 0, otro_municipio)
+    codigos_municipio = codigos_departamento * 1000 + 1 + 3 * k
+    nombres_departamento = np.array([d[1] for d in DEPARTAMENTOS], dtype=object)[departamento]
+    nombres_municipio = pd.Series(codigos_municipio).map(lambda c: f'MUNICIPIO {c:05d}').to_numpy(dtype=object)
+
+    # Edad en años para casi todos; en meses o días para algunos bebés
+    edad = np.clip(rng.normal(39, 18, n), 0, 105).astype(np.int64)
+    medida = rng.choice([1, 2, 3], size=n, p=[0.985, 0.012, 0.003])
+    edad = np.where(medida == 2, rng.integers(1, 12, n), np.where(medida == 3, rng.integers(1, 30, n), edad))
+    edad_anos = np.where(medida == 1, edad, 0)
+
+    # Fallecimiento: probabilidad creciente con la edad, escalada a la proporción buscada
+    riesgo = 1 / (1 + np.exp(-(edad_anos - 75) / 9))
+    riesgo = np.minimum(riesgo * PROPORCION_FALLECIDOS / riesgo.mean(), 0.95)
+    fallecido = rng.random(n) < riesgo
+
+    # Fechas: mezcla de olas de contagio dentro del período del dataset
+    minimo = pd.Timestamp(FECHA_MINIMA).value // 86_400_000_000_000
+    maximo = pd.Timestamp(FECHA_MAXIMA).value // 86_400_000_000_000
+    ola = rng.choice(len(OLAS), size=n, p=[o[2] for o in OLAS])
+    centros = np.array([pd.Timestamp(o[0]).value // 86_400_000_000_000 for o in OLAS])[ola]
+    desvios = np.array([o[1] for o in OLAS])[ola]
+    diagnostico = np.clip(np.rint(rng.normal(centros, desvios)), minimo, maximo).astype(np.int64)
+    sintomas = diagnostico - rng.integers(0, 8, n)
+    notificacion = diagnostico - rng.integers(0, 4, n)
+    reporte = np.minimum(diagnostico + rng.integers(0, 11, n), maximo)
+    muerte = diagnostico + rng.integers(0, 31, n)
+    recuperacion = diagnostico + rng.integers(7, 31, n)
+    recuperado = ~fallecido & (rng.random(n) < 0.98)
+
+    contagio = _elegir(rng, TIPOS_CONTAGIO, n)
+    importado = contagio == 'Importado'
+    pais = rng.integers(0, len(PAISES), n)
+    pertenencia = _elegir(rng, PERTENENCIAS, n)
+    grupo = np.array(GRUPOS_ETNICOS, dtype=object)[rng.integers(0, len(GRUPOS_ETNICOS), n)]
+
+    bloque = {
+        'Fecha reporte web': _fechas_texto(reporte),
+        'Id de caso': np.arange(primer_id, primer_id + n),
+        'Fecha de notificación': _fechas_texto(notificacion),
+        'Código divipola departamento': codigos_departamento,
+        'Nombre departamento': nombres_departamento,
+        'Código divipola municipio': codigos_municipio,
+        'Nombre municipio': nombres_municipio,
+        'Edad': edad,
+        'Medida de edad': medida,
+        'Sexo': np.where(rng.random(n) < 0.53, 'F', 'M'),
+        'Tipo de contagio': contagio,
+        'Ubicación del caso': np.where(fallecido, 'Fallecido', _elegir(rng, UBICACIONES_NO_FALLECIDO, n)),
+        'Estado': np.where(fallecido, 'Fallecido', _elegir(rng, ESTADOS_NO_FALLECIDO, n)),
+        'Código iso del país': np.where(importado, np.array([p[0] for p in PAISES], dtype=object)[pais], None),
+        'Nombre del país': np.where(importado, np.array([p[1] for p in PAISES], dtype=object)[pais], None),
+        'Recuperado': np.where(fallecido, 'Fallecido', np.where(recuperado, 'Recuperado', 'Activo')),
+        'Fecha de inicio de síntomas': _fechas_texto(sintomas),
+        'Fecha de muerte': np.where(fallecido, _fechas_texto(muerte), None),
+        'fecha de diagnóstico': _fechas_texto(diagnostico),
+        'Fecha de recuperación': np.where(recuperado, _fechas_texto(recuperacion), None),
+        'Tipo de recuperación': np.where(recuperado, np.where(rng.random(n) < 0.3, 'PCR', 'Tiempo'), None),
+        'Pertenencia étnica': pertenencia,
+        'Nombre del grupo étnico': np.where(pertenencia == 'Indígena', grupo, None),
+    }
+    return pd.DataFrame({columna: bloque[columna] for columna in ESQUEMA_DATASET})
+
+
+def generar_dataset(ruta, n_filas, semilla=0):
+    """
+    Escribe un CSV sintético de n_filas por bloques (la memoria no depende
+    del tamaño). Con la misma semilla y tamaño el contenido es el mismo.
+    """
+    temporal = ruta + '.parcial'
+    with open(temporal, 'w', encoding='utf-8', newline='') as archivo:
+        for i, inicio in enumerate(range(0, n_filas, FILAS_POR_BLOQUE)):
+            n = min(FILAS_POR_BLOQUE, n_filas - inicio)
+            bloque = generar_bloque(n, inicio + 1, np.random.default_rng([semilla, i]))
+            bloque.to_csv(archivo, index=False, header=(i == 0))
+    os.replace(temporal, ruta)
+
+
+def obtener_dataset(directorio, n_filas, semilla=0):
+    """Ruta del CSV sintético de n_filas, generándolo si todavía no existe"""
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f'sintetico_{n_filas}_{semilla}.csv')
+    if not os.path.exists(ruta):
+        inicio = time.perf_counter()
+        print(f"Generando {ruta} ({n_filas:,} filas)...")
+        generar_dataset(ruta, n_filas, semilla)
+        print(f"  {time.perf_counter() - inicio:.1f} s, {os.path.getsize(ruta) / 1e6:,.0f} MB")
+    return ruta
+
+
+def borrar_cache(ruta_csv):
+    """Borra la caché columnar de un CSV para forzar su lectura completa"""
+    for ruta in rutas_cache(ruta_csv):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+def medir(funcion, repeticiones=3, preparar=None, memoria=True):
+    """
+    Mide el tiempo y el pico de memoria de una operación
+
+    Args:
+        funcion (callable): Operación a medir, sin argumentos
+        repeticiones (int): Ejecuciones cronometradas (se informa la más rápida)
+        preparar (callable, opcional): Se llama antes de cada ejecución, fuera del tiempo medido
+        memoria (bool): Medir además el pico de memoria con tracemalloc, en otra ejecución
+
+    Returns:
+        dict: segundos (mínimo), segundos_mediana, repeticiones y pico_mb (o None)
+    """
+    tiempos = []
+    for _ in range(max(repeticiones, 1)):
+        if preparar is not None:
+            preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    pico_mb = None
+    if memoria:
+        if preparar is not None:
+            preparar()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            funcion()
+            pico_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'segundos': round(min(tiempos), 6),
+        'segundos_mediana': round(float(np.median(tiempos)), 6),
+        'repeticiones': len(tiempos),
+        'pico_mb': None if pico_mb is None else round(pico_mb, 3),
+    }
+
+
+def _registrar(resultados, grupo, operacion, funcion, **kwargs):
+    """Mide una operación y guarda su resultado o el error que produjo"""
+    try:
+        resultado = medir(funcion, **kwargs)
+    except Exception as e:
+        resultado = {'error': f'{type(e).__name__}: {e}'}
+    resultados.append({'grupo': grupo, 'operacion': operacion, **resultado})
+    if 'error' in resultado:
+        print(f"  {grupo}.{operacion}: error ({resultado['error']})")
+    else:
+        pico = '' if resultado['pico_mb'] is None else f", pico {resultado['pico_mb']:,.1f} MB"
+        print(f"  {grupo}.{operacion}: {resultado['segundos'] * 1000:,.1f} ms{pico}")
+
+
+def metodos_analizador():
+    """Nombres de todos los métodos calcular_* y graficar_* de AnalizadorEpidemiologico"""
+    return sorted(nombre for nombre in dir(AnalizadorEpidemiologico)
+                  if nombre.startswith(('calcular_', 'graficar_')) and callable(getattr(AnalizadorEpidemiologico, nombre)))
+
+
+def medir_carga(ruta, resultados, repeticiones, memoria):
+    """Mide la lectura del CSV completo y la lectura desde la caché columnar"""
+    # Leer el CSV cuesta lo mismo cada vez: una sola ejecución cronometrada
+    _registrar(resultados, 'carga', 'cargar_dataset (CSV)',
+               lambda: cargar_dataset(ruta, usar_cache=False), repeticiones=1, memoria=memoria)
+    borrar_cache(ruta)
+    df = cargar_dataset(ruta)  # Escribe la caché
+    _registrar(resultados, 'carga', 'cargar_dataset (caché)',
+               lambda: cargar_dataset(ruta), repeticiones=repeticiones, memoria=memoria)
+    return df
+
+
+def medir_analizador(df, resultados, repeticiones, memoria):
+    """
+    Mide cada método calcular_*/graficar_* del analizador en frío (caché de
+    resultados y derivados vacíos) y en caliente. Los gráficos se dibujan
+    en una figura de matplotlib con el backend Agg, incluido el render.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import matplotlib.pyplot as plt
+
+    analizador = AnalizadorEpidemiologico(dataframe=df)
+    _registrar(resultados, 'analizador', 'cubo', analizador.cubo,
+               preparar=analizador.invalidar_cache, repeticiones=repeticiones, memoria=memoria)
+
+    for nombre in metodos_analizador():
+        metodo = getattr(analizador, nombre)
+        argumentos = ARGUMENTOS_ANALIZADOR.get(nombre, {})
+
+        if nombre.startswith('graficar_'):
+            def llamar(metodo=metodo, argumentos=argumentos):
+                figure = Figure(figsize=(10, 6))
+                FigureCanvasAgg(figure)
+                metodo(ax=figure.add_subplot(111), **argumentos)
+                figure.canvas.draw()
+        else:
+            def llamar(metodo=metodo, argumentos=argumentos):
+                metodo(**argumentos)
+
+        _registrar(resultados, 'analizador', f'{nombre} (frío)', llamar,
+                   preparar=analizador.invalidar_cache, repeticiones=repeticiones, memoria=memoria)
+        _registrar(resultados, 'analizador', f'{nombre} (caliente)', llamar,
+                   repeticiones=repeticiones, memoria=memoria)
+        # Algunos métodos dibujan con pyplot si no reciben un axes
+        plt.close('all')
+
+
+def medir_interfaz(ruta, resultados, repeticiones, memoria):
+    """
+    Mide la ventana principal bajo la plataforma 'offscreen' de Qt. Necesita
+    la interfaz 'appMain1.ui' en el directorio de trabajo.
+
+    Returns:
+        str o None: Motivo por el que no se midió la interfaz
+    """
+    if not os.path.exists('appMain1.ui'):
+        return "No se encontró appMain1.ui en el directorio de trabajo"
+    from PyQt6.QtWidgets import QApplication
+    import main
+
+    app = QApplication.instance() or QApplication([])
+    ventana = getattr(medir_interfaz, 'ventana', None)
+    if ventana is None:
+        # Una sola ventana para todos los tamaños (no se muestra: la carga la inicia el banco)
+        ventana = medir_interfaz.ventana = main.MainWindow()
+        ventana.initialize_plot()
+
+    def esperar(condicion, limite=3600):
+        fin = time.perf_counter() + limite
+        while not condicion():
+            if time.perf_counter() > fin:
+                raise TimeoutError("La interfaz no terminó la operación a tiempo")
+            app.processEvents()
+            time.sleep(0.001)
+
+    def cargar():
+        ventana.cargar_datos(ruta)
+        esperar(lambda: ventana.tarea_carga is None)
+        if len(ventana.df) == 0:
+            raise RuntimeError("La ventana no cargó los datos")
+
+    _registrar(resultados, 'interfaz', 'cargar_datos (CSV)', cargar,
+               preparar=lambda: borrar_cache(ruta), repeticiones=1, memoria=memoria)
+    _registrar(resultados, 'interfaz', 'cargar_datos (caché)', cargar,
+               repeticiones=repeticiones, memoria=memoria)
+
+    # Sin filtros y con los tres filtros activos
+    def sin_filtros():
+        ventana.cmb_sexo.setCurrentIndex(0)
+        ventana.cmb_estado.setCurrentIndex(0)
+        ventana.sldEdad.setValue(ventana.sldEdad.minimum())
+
+    def con_filtros():
+        ventana.cmb_sexo.setCurrentIndex(ventana.cmb_sexo.findText('F'))
+        ventana.cmb_estado.setCurrentIndex(min(1, ventana.cmb_estado.count() - 1))
+        ventana.sldEdad.setValue(40)
+
+    terminado = []
+    ventana.ejecutor_grafico.terminada.connect(lambda *args: terminado.append(True))
+    ventana.ejecutor_grafico.fallida.connect(lambda *args: terminado.append(True))
+
+    def graficar():
+        terminado.clear()
+        ventana.graficar()
+        esperar(lambda: terminado)
+        app.processEvents()
+
+    for sufijo, configurar in (('sin filtros', sin_filtros), ('con filtros', con_filtros)):
+        configurar()
+        # Los cambios de filtros programan el filtrado en vivo: dejarlo terminar
+        app.processEvents()
+        _registrar(resultados, 'interfaz', f'aplicar_filtros ({sufijo})', ventana.aplicar_filtros,
+                   repeticiones=repeticiones, memoria=memoria)
+        _registrar(resultados, 'interfaz', f'actualizar_tabla ({sufijo})', ventana.actualizar_tabla,
+                   repeticiones=repeticiones, memoria=memoria)
+        _registrar(resultados, 'interfaz', f'graficar ({sufijo})', graficar,
+                   repeticiones=repeticiones, memoria=memoria)
+    sin_filtros()
+    return None
+
+
+def _version(modulo):
+    """Versión de una biblioteca instalada, o None"""
+    try:
+        return __import__(modulo).__version__
+    except Exception:
+        return None
+
+
+def _commit_git():
+    """Commit actual del repositorio de la aplicación, o None"""
+    try:
+        proceso = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+        return proceso.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def entorno():
+    """Datos del entorno de la medición, para saber qué se compara"""
+    try:
+        from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+        qt = {'pyqt': PYQT_VERSION_STR, 'qt': QT_VERSION_STR}
+    except ImportError:
+        qt = None
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_git(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'bibliotecas': {nombre: _version(nombre) for nombre in ('numpy', 'pandas', 'pyarrow', 'matplotlib')},
+        'qt': qt,
+    }
+
+
+def _pico_rss_mb():
+    """Pico de memoria residente del proceso en MB (incluye lo que tracemalloc no ve, p. ej. Arrow)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB, macOS bytes
+    return round(pico / (1e6 if sys.platform == 'darwin' else 1e3), 1)
+
+
+def ejecutar(tamanos, directorio='datos_benchmark', repeticiones=3, gui=True, memoria=True, semilla=0):
+    """
+    Ejecuta el banco completo
+
+    Args:
+        tamanos (list): Cantidades de filas de los datasets sintéticos
+        directorio (str): Directorio donde se generan (y reutilizan) los CSV
+        repeticiones (int): Ejecuciones cronometradas de cada operación
+        gui (bool): Medir también la ventana principal
+        memoria (bool): Medir los picos de memoria
+        semilla (int): Semilla de los datos sintéticos
+
+    Returns:
+        dict: Informe con el entorno y los resultados por tamaño
+    """
+    informe = {'entorno': entorno(), 'repeticiones': repeticiones, 'semilla': semilla, 'tamanos': []}
+    for n_filas in tamanos:
+        ruta = obtener_dataset(directorio, n_filas, semilla)
+        print(f"{n_filas:,} filas")
+        resultados = []
+        df = medir_carga(ruta, resultados, repeticiones, memoria)
+        medir_analizador(df, resultados, repeticiones, memoria)
+        del df
+        motivo = medir_interfaz(ruta, resultados, repeticiones, memoria) if gui else "Desactivada (--sin-gui)"
+        if motivo:
+            print(f"  Interfaz no medida: {motivo}")
+        informe['tamanos'].append({
+            'filas': n_filas,
+            'csv_mb': round(os.path.getsize(ruta) / 1e6, 1),
+            'interfaz_omitida': motivo,
+            'pico_rss_mb': _pico_rss_mb(),
+            'resultados': resultados,
+        })
+    return informe
+
+
+def comparar(anterior, nuevo):
+    """
+    Texto con la relación de tiempos entre dos informes para las
+    operaciones medidas en ambos (>1: el nuevo es más lento)
+    """
+    def indexar(informe):
+        return {(tamano['filas'], r['grupo'], r['operacion']): r
+                for tamano in informe['tamanos'] for r in tamano['resultados'] if 'error' not in r}
+
+    antes, despues = indexar(anterior), indexar(nuevo)
+    lineas = [f"{anterior['entorno'].get('commit')} -> {nuevo['entorno'].get('commit')}",
+              f"{'filas':>10} {'antes ms':>10} {'después ms':>11} {'relación':>9}  operación"]
+    for clave in sorted(antes.keys() & despues.keys()):
+        filas, grupo, operacion = clave
+        t_antes, t_despues = antes[clave]['segundos'], despues[clave]['segundos']
+        relacion = t_despues / t_antes if t_antes > 0 else float('nan')
+        lineas.append(f"{filas:>10,} {t_antes * 1000:10.1f} {t_despues * 1000:11.1f} {relacion:9.2f}  "
+                      f"{grupo}.{operacion}")
+    return '\n'.join(lineas)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Banco de pruebas de rendimiento con datos sintéticos')
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS_PREDETERMINADOS,
+                        help='Filas de cada dataset sintético')
+    parser.add_argument('--directorio', default='datos_benchmark', help='Directorio de los CSV sintéticos')
+    parser.add_argument('--salida', default='benchmark.json', help='Informe JSON de salida')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Ejecuciones cronometradas por operación')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla de los datos sintéticos')
+    parser.add_argument('--sin-gui', action='store_true', help='No medir la ventana principal')
+    parser.add_argument('--sin-memoria', action='store_true', help='No medir los picos de memoria')
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTERIOR', 'NUEVO'),
+                        help='Compara dos informes en lugar de medir')
+    args = parser.parse_args()
+
+    if args.comparar:
+        informes = []
+        for ruta in args.comparar:
+            with open(ruta, encoding='utf-8') as archivo:
+                informes.append(json.load(archivo))
+        print(comparar(*informes))
+        sys.exit(0)
+
+    informe = ejecutar(args.tamanos, args.directorio, args.repeticiones,
+                       gui=not args.sin_gui, memoria=not args.sin_memoria, semilla=args.semilla)
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, ensure_ascii=False, indent=2)
+    print(f"Informe guardado en {args.salida}")
@@ -0,0 +1,141 @@
+import functools
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def tamano_aproximado(valor):
+    """Estima la memoria ocupada por un resultado, en bytes"""
+    if isinstance(valor, (pd.Series, pd.DataFrame, pd.Index)):
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum()) if hasattr(uso, 'sum') else int(uso)
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(tamano_aproximado(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano_aproximado(v) for v in valor.values())
+    return sys.getsizeof(valor)
+
+
+def normalizar_argumento(valor):
+    """Convierte un argumento en un valor hashable equivalente (listas -> tuplas)"""
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar_argumento(v) for v in valor)
+    if isinstance(valor, np.ndarray):
+        return tuple(valor.tolist())
+    if isinstance(valor, dict):
+        return tuple(sorted((k, normalizar_argumento(v)) for k, v in valor.items()))
+    if isinstance(valor, set):
+        return tuple(sorted(valor))
+    return valor
+
+
+def copiar_resultado(valor):
+    """Copia los resultados mutables para que quien los recibe no altere la caché"""
+    if isinstance(valor, (pd.Series, pd.DataFrame, np.ndarray)):
+        return valor.copy()
+    return valor
+
+
+class CacheResultados:
+    """
+    Caché LRU de resultados acotada por memoria.
+
+    Las entradas se descartan empezando por la usada hace más tiempo cuando
+    el total estimado supera max_bytes. Es segura entre hilos.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int): Memoria máxima estimada de los resultados guardados
+        """
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartes = 0
+
+    def obtener(self, clave):
+        """
+        Busca un resultado
+
+        Returns:
+            tuple: (encontrado, valor)
+        """
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return True, self._entradas[clave][0]
+            self.fallos += 1
+            return False, None
+
+    def guardar(self, clave, valor):
+        """Guarda un resultado, descartando los menos usados si no cabe"""
+        tamano = tamano_aproximado(valor)
+        if tamano > self.max_bytes:
+            return
+
+        with self._lock:
+            if clave in self._entradas:
+                self._bytes -= self._entradas.pop(clave)[1]
+            self._entradas[clave] = (valor, tamano)
+            self._bytes += tamano
+            while self._bytes > self.max_bytes:
+                _, (_, tamano_descartado) = self._entradas.popitem(last=False)
+                self._bytes -= tamano_descartado
+                self.descartes += 1
+
+    def limpiar(self):
+        """Elimina todos los resultados guardados"""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        """Devuelve contadores de uso de la caché"""
+        with self._lock:
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'descartes': self.descartes,
+            }
+
+
+def memoizar(metodo):
+    """
+    Decorador para métodos de AnalizadorEpidemiologico: guarda el resultado
+    en self.cache_resultados con clave (nombre del método, argumentos
+    normalizados, versión de los datos).
+    """
+    firma = inspect.signature(metodo)
+
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        argumentos = firma.bind(self, *args, **kwargs)
+        argumentos.apply_defaults()
+        clave = (
+            metodo.__name__,
+            tuple((nombre, normalizar_argumento(valor))
+                  for nombre, valor in argumentos.arguments.items() if nombre != 'self'),
+            self._token_datos(),
+        )
+
+        encontrado, resultado = self.cache_resultados.obtener(clave)
+        if not encontrado:
+            resultado = metodo(self, *args, **kwargs)
+            self.cache_resultados.guardar(clave, resultado)
+        return copiar_resultado(resultado)
+
+    return envoltura
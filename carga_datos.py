@@ -0,0 +1,577 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# pyarrow es opcional: sin él se lee siempre el CSV y no se escribe caché
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+class OperacionCancelada(Exception):
+    """Se lanza cuando el usuario cancela una operación larga"""
+
+
+# Incrementar cuando cambie el procesamiento para invalidar cachés antiguas
+VERSION_CACHE = 4
+
+# Esquema del dataset de casos COVID del INS: columna -> tipo de datos.
+# Las cadenas de baja cardinalidad se leen como categóricas para que los
+# filtros y conteos trabajen sobre códigos enteros en vez de cadenas.
+ESQUEMA_DATASET = {
+    'Fecha reporte web': 'datetime64[ns]',
+    'Id de caso': 'Int64',
+    'Fecha de notificación': 'datetime64[ns]',
+    'Código divipola departamento': 'Int32',
+    'Nombre departamento': 'category',
+    'Código divipola municipio': 'Int32',
+    'Nombre municipio': 'category',
+    'Edad': 'Int16',
+    'Medida de edad': 'Int8',
+    'Sexo': 'category',
+    'Tipo de contagio': 'category',
+    'Ubicación del caso': 'category',
+    'Estado': 'category',
+    'Código iso del país': 'category',
+    'Nombre del país': 'category',
+    'Recuperado': 'category',
+    'Fecha de inicio de síntomas': 'datetime64[ns]',
+    'Fecha de muerte': 'datetime64[ns]',
+    'fecha de diagnóstico': 'datetime64[ns]',
+    'Fecha de recuperación': 'datetime64[ns]',
+    'Tipo de recuperación': 'category',
+    'Pertenencia étnica': 'category',
+    'Nombre del grupo étnico': 'category',
+}
+
+
+def dataframe_vacio():
+    """Crea un DataFrame vacío con las columnas y tipos del esquema"""
+    return pd.DataFrame({col: pd.Series(dtype=tipo) for col, tipo in ESQUEMA_DATASET.items()})
+
+
+def tipos_lectura():
+    """
+    Tipos a pasar a pd.read_csv. Solo se fijan las categóricas: las columnas
+    numéricas se convierten después para tolerar valores mal formados. Las
+    fechas también se leen como categóricas para convertir solo sus valores
+    distintos (ver parsear_fechas).
+    """
+    return {col: 'category' for col, tipo in ESQUEMA_DATASET.items()
+            if tipo == 'category' or tipo.startswith('datetime')}
+
+
+# Formatos de fecha probados al detectar el de cada columna, en orden de
+# preferencia (los datos del INS usan día/mes/año)
+FORMATOS_FECHA = [
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y',
+    'ISO8601',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d',
+    '%d-%m-%Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y',
+]
+
+
+def detectar_formato_fecha(valores, tamano_muestra=200):
+    """
+    Detecta el formato de fecha que mejor convierte una muestra de valores.
+
+    Args:
+        valores (pandas.Index): Valores distintos de la columna (cadenas)
+        tamano_muestra (int): Cantidad de valores a probar
+
+    Returns:
+        str o None: Formato detectado, o None si ninguno convierte la muestra
+    """
+    muestra = valores[:tamano_muestra]
+    mejor_formato, mejor_conteo = None, 0
+    for formato in FORMATOS_FECHA:
+        conteo = pd.to_datetime(muestra, format=formato, errors='coerce').notna().sum()
+        if conteo > mejor_conteo:
+            mejor_formato, mejor_conteo = formato, conteo
+            if conteo == len(muestra):
+                break
+    return mejor_formato
+
+
+def parsear_fechas(serie):
+    """
+    Convierte una columna a datetime analizando solo sus valores distintos:
+    las columnas de fecha tienen pocos cientos de valores distintos aunque
+    tengan millones de filas.
+
+    Args:
+        serie (pandas.Series): Columna de cadenas (o categórica de cadenas)
+
+    Returns:
+        tuple: (pandas.Series con las fechas, cantidad de valores no convertidos)
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie, 0
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        unicos = pd.Index(serie.cat.categories.astype(str))
+    else:
+        codigos, unicos = pd.factorize(serie)
+        unicos = pd.Index(unicos.astype(str))
+
+    formato = detectar_formato_fecha(unicos)
+    if formato is not None:
+        fechas = pd.to_datetime(unicos, format=formato, errors='coerce')
+    else:
+        fechas = pd.to_datetime(unicos, errors='coerce')
+
+    # Añadir NaT al final para que el código -1 (nulo) apunte a él
+    valores = np.append(fechas.to_numpy(), np.datetime64('NaT'))
+    resultado = pd.Series(valores[codigos], index=serie.index, name=serie.name)
+
+    # Filas con valor en el CSV que no se pudieron convertir
+    conteos = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+    no_convertidos = int(conteos[fechas.isna()].sum())
+    return resultado, no_convertidos
+
+
+def convertir_columnas_fecha(df):
+    """
+    Convierte a datetime todas las columnas cuyo nombre contiene 'fecha'.
+
+    Returns:
+        dict: Cantidad de valores no convertidos por columna
+    """
+    no_convertidos = {}
+    columnas_fecha = [col for col in df.columns if 'fecha' in col.lower()]
+    for col in columnas_fecha:
+        try:
+            df[col], no_convertidos[col] = parsear_fechas(df[col])
+        except Exception as e:
+            print(f"No se pudo convertir la columna {col} a fecha: {e}")
+
+    for col, cantidad in no_convertidos.items():
+        if cantidad:
+            print(f"Columna '{col}': {cantidad:,} valores no se pudieron convertir a fecha")
+    return no_convertidos
+
+
+def _aplicar_tipos_numericos(df):
+    """Convierte las columnas numéricas del esquema a enteros compactos"""
+    for col, tipo in ESQUEMA_DATASET.items():
+        if col not in df.columns or tipo[0] not in 'Ii' or df[col].dtype == tipo:
+            continue
+        try:
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype(tipo)
+        except (TypeError, ValueError) as e:
+            # Valores fuera de rango: se conserva el tipo inferido
+            print(f"No se pudo convertir la columna {col} a {tipo}: {e}")
+
+
+def procesar_dataframe(df):
+    """
+    Aplica el procesamiento común a un DataFrame recién leído del CSV:
+    tipos del esquema, conversión de columnas de fecha y creación de la
+    columna 'Edad'. Los valores de fecha no convertidos por columna quedan
+    en df.attrs['fechas_no_convertidas'].
+
+    Args:
+        df (pandas.DataFrame): DataFrame leído del CSV
+
+    Returns:
+        pandas.DataFrame: El mismo DataFrame, procesado
+    """
+    # Convertir columnas de fechas a formato datetime
+    df.attrs['fechas_no_convertidas'] = convertir_columnas_fecha(df)
+
+    # Verificar si la columna 'edad' existe, si no, intenta crear una
+    if 'Edad' not in df.columns:
+        if 'medida de edad' in df.columns:
+            df['Edad'] = pd.to_numeric(df['medida de edad'], errors='coerce')
+
+    _aplicar_tipos_numericos(df)
+
+    return df
+
+
+def rutas_cache(ruta_csv):
+    """Devuelve las rutas (datos, metadatos) de la caché asociada a un CSV"""
+    return ruta_csv + '.cache.feather', ruta_csv + '.cache.json'
+
+
+def _hash_archivo(ruta, tamano_bloque=1 << 20):
+    """Calcula el hash del contenido de un archivo leyéndolo por bloques"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _clave_cache(ruta_csv, con_hash=True):
+    """
+    Construye la clave de caché de un CSV: ruta, tamaño, fecha de
+    modificación y (opcionalmente) hash del contenido.
+    """
+    estado = os.stat(ruta_csv)
+    clave = {
+        'version': VERSION_CACHE,
+        'ruta': os.path.abspath(ruta_csv),
+        'tamano': estado.st_size,
+        'mtime_ns': estado.st_mtime_ns,
+    }
+    if con_hash:
+        clave['hash'] = _hash_archivo(ruta_csv)
+    return clave
+
+
+def leer_cache(ruta_csv):
+    """
+    Lee la caché columnar de un CSV si su clave sigue siendo válida.
+
+    Returns:
+        pandas.DataFrame o None: Datos procesados, o None si no hay caché válida
+    """
+    if feather is None:
+        return None
+
+    ruta_datos, ruta_meta = rutas_cache(ruta_csv)
+    if not (os.path.exists(ruta_datos) and os.path.exists(ruta_meta)):
+        return None
+
+    try:
+        with open(ruta_meta, 'r', encoding='utf-8') as f:
+            clave_guardada = json.load(f)
+
+        # Comparar primero lo barato; el hash solo si todo lo demás coincide
+        clave = _clave_cache(ruta_csv, con_hash=False)
+        if any(clave_guardada.get(k) != v for k, v in clave.items()):
+            return None
+        if clave_guardada.get('hash') != _hash_archivo(ruta_csv):
+            return None
+
+        tabla = feather.read_table(ruta_datos, memory_map=True)
+        return tabla.to_pandas()
+    except Exception as e:
+        print(f"No se pudo leer la caché de {ruta_csv}: {e}")
+        return None
+
+
+def escribir_cache(ruta_csv, df):
+    """
+    Guarda el DataFrame procesado en formato Feather junto al CSV original.
+
+    Returns:
+        bool: True si la caché se escribió correctamente
+    """
+    if feather is None:
+        return False
+
+    ruta_datos, ruta_meta = rutas_cache(ruta_csv)
+    try:
+        clave = _clave_cache(ruta_csv)
+
+        # Escribir en archivos temporales y renombrar para no dejar cachés a medias
+        df.reset_index(drop=True).to_feather(ruta_datos + '.tmp')
+        os.replace(ruta_datos + '.tmp', ruta_datos)
+        with open(ruta_meta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(clave, f)
+        os.replace(ruta_meta + '.tmp', ruta_meta)
+        return True
+    except Exception as e:
+        print(f"No se pudo escribir la caché de {ruta_csv}: {e}")
+        for ruta in (ruta_datos + '.tmp', ruta_meta + '.tmp'):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        return False
+
+
+def _concatenar_bloques(bloques):
+    """
+    Une los bloques leídos del CSV. Las columnas categóricas se combinan con
+    union_categoricals para no perder el tipo al concatenar.
+    """
+    if len(bloques) == 1:
+        return bloques[0]
+
+    columnas = {}
+    for col in bloques[0].columns:
+        partes = [bloque[col] for bloque in bloques]
+        if isinstance(partes[0].dtype, pd.CategoricalDtype):
+            columnas[col] = pd.Series(pd.api.types.union_categoricals(partes, sort_categories=True), name=col)
+        else:
+            columnas[col] = pd.concat(partes, ignore_index=True)
+    return pd.DataFrame(columnas)
+
+
+def leer_csv_por_bloques(ruta_csv, tamano_bloque=250_000, progreso=None, cancelar=None):
+    """
+    Lee un CSV por bloques aplicando los tipos del esquema.
+
+    Args:
+        ruta_csv (str): Ruta al archivo CSV
+        tamano_bloque (int): Filas por bloque
+        progreso (callable, opcional): Recibe (filas_leidas, bytes_leidos, bytes_totales)
+        cancelar (callable, opcional): Devuelve True si hay que abortar la lectura
+
+    Returns:
+        pandas.DataFrame: DataFrame sin procesar
+
+    Raises:
+        OperacionCancelada: Si cancelar() devuelve True entre bloques
+    """
+    bytes_totales = os.path.getsize(ruta_csv)
+    bloques = []
+    filas = 0
+
+    with open(ruta_csv, 'rb') as f:
+        for bloque in pd.read_csv(f, dtype=tipos_lectura(), chunksize=tamano_bloque):
+            if cancelar is not None and cancelar():
+                raise OperacionCancelada()
+            bloques.append(bloque)
+            filas += len(bloque)
+            if progreso is not None:
+                progreso(filas, f.tell(), bytes_totales)
+
+    if not bloques:
+        return pd.read_csv(ruta_csv, dtype=tipos_lectura())
+    return _concatenar_bloques(bloques)
+
+
+def cargar_dataset(ruta_csv='dataset.csv', usar_cache=True, progreso=None, cancelar=None):
+    """
+    Carga el dataset desde el CSV, reutilizando la caché columnar si existe.
+
+    Args:
+        ruta_csv (str): Ruta al archivo CSV
+        usar_cache (bool): Si es False se ignora y no se escribe la caché
+        progreso (callable, opcional): Recibe (filas_leidas, bytes_leidos, bytes_totales)
+        cancelar (callable, opcional): Devuelve True si hay que abortar la carga
+
+    Returns:
+        pandas.DataFrame: DataFrame procesado (fechas convertidas, 'Edad' derivada)
+    """
+    if usar_cache:
+        df = leer_cache(ruta_csv)
+        if df is not None:
+            if progreso is not None:
+                tamano = os.path.getsize(ruta_csv)
+                progreso(len(df), tamano, tamano)
+            return df
+
+    df = leer_csv_por_bloques(ruta_csv, progreso=progreso, cancelar=cancelar)
+    if cancelar is not None and cancelar():
+        raise OperacionCancelada()
+    df = procesar_dataframe(df)
+
+    if usar_cache:
+        escribir_cache(ruta_csv, df)
+
+    return df
+
+
+
+def leer_delta(ruta_csv):
+    """
+    Lee un archivo de actualización diaria (mismas columnas que el dataset)
+    y le aplica el mismo procesamiento. No usa la caché columnar: los
+    archivos de actualización son pequeños y se leen una sola vez.
+
+    Returns:
+        pandas.DataFrame: Filas de la actualización, procesadas
+    """
+    return procesar_dataframe(pd.read_csv(ruta_csv, dtype=tipos_lectura()))
+
+
+class IndiceCasos:
+    """
+    Índice de 'Id de caso' -> posición de fila: ids ordenados con sus
+    posiciones, para buscar con searchsorted. Si un id se repite en el
+    dataset, las búsquedas devuelven su primera aparición.
+    """
+
+    def __init__(self, ids=None):
+        """
+        Args:
+            ids (pandas.Series, opcional): Columna 'Id de caso' completa
+        """
+        self.ids = np.empty(0, dtype=np.int64)
+        self.posiciones = np.empty(0, dtype=np.int64)
+        if ids is not None:
+            valores = pd.to_numeric(ids, errors='coerce')
+            validos = valores.notna().to_numpy()
+            posiciones = np.flatnonzero(validos)
+            valores = valores[validos].to_numpy(dtype=np.int64)
+            orden = np.argsort(valores, kind='stable')
+            self.ids = valores[orden]
+            self.posiciones = posiciones[orden]
+
+    def buscar(self, ids):
+        """
+        Busca las posiciones de fila de varios ids
+
+        Returns:
+            numpy.ndarray: Posición de cada id, o -1 si no está en el índice
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        i = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return np.where(self.ids[i] == ids, self.posiciones[i], -1)
+
+    def con_nuevos(self, ids, posiciones):
+        """
+        Devuelve un índice con ids nuevos añadidos (el actual no se modifica)
+
+        Args:
+            ids (numpy.ndarray): Ids que no estaban en el índice
+            posiciones (numpy.ndarray): Posición de fila de cada id
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        orden = np.argsort(ids, kind='stable')
+        puntos = np.searchsorted(self.ids, ids[orden], side='right')
+        nuevo = IndiceCasos()
+        nuevo.ids = np.insert(self.ids, puntos, ids[orden])
+        nuevo.posiciones = np.insert(self.posiciones, puntos, np.asarray(posiciones, dtype=np.int64)[orden])
+        return nuevo
+
+
+class ResultadoFusion:
+    """
+    Resultado de fusionar una actualización diaria con el dataset cargado.
+
+    Atributos:
+        df (pandas.DataFrame): Dataset actualizado (las filas nuevas al final)
+        indice (IndiceCasos): Índice de ids del dataset actualizado
+        n_anterior (int): Filas del dataset antes de la fusión
+        posiciones_modificadas (numpy.ndarray): Filas existentes reemplazadas
+        filas_anteriores (pandas.DataFrame): Valores previos de esas filas
+        n_ignoradas (int): Filas de la actualización más antiguas que las cargadas
+    """
+
+    def __init__(self, df, indice, n_anterior, posiciones_modificadas, filas_anteriores, n_ignoradas):
+        self.df = df
+        self.indice = indice
+        self.n_anterior = n_anterior
+        self.posiciones_modificadas = posiciones_modificadas
+        self.filas_anteriores = filas_anteriores
+        self.n_ignoradas = n_ignoradas
+
+    @property
+    def n_anexadas(self):
+        """Cantidad de casos nuevos añadidos al final"""
+        return len(self.df) - self.n_anterior
+
+    def posiciones_cambiadas(self):
+        """Posiciones de todas las filas modificadas o añadidas"""
+        return np.concatenate([self.posiciones_modificadas,
+                               np.arange(self.n_anterior, len(self.df), dtype=np.int64)])
+
+
+def _columna_actualizada(columna, modificaciones, posiciones, anexadas):
+    """
+    Construye la versión actualizada de una columna: añade las filas nuevas
+    al final y reemplaza las modificadas. Las categorías nuevas se agregan
+    al final de las existentes para no cambiar los códigos ya asignados.
+    """
+    if isinstance(columna.dtype, pd.CategoricalDtype):
+        valores = pd.concat([modificaciones, anexadas]).dropna().astype(str).unique()
+        nuevas = pd.Index(valores).difference(columna.cat.categories.astype(str))
+        if len(nuevas):
+            columna = columna.cat.add_categories(nuevas)
+        modificaciones = modificaciones.astype(object).astype(columna.dtype)
+        anexadas = anexadas.astype(object).astype(columna.dtype)
+    else:
+        modificaciones = modificaciones.astype(columna.dtype)
+        anexadas = anexadas.astype(columna.dtype)
+
+    actualizada = pd.concat([columna, anexadas], ignore_index=True)
+    if len(posiciones):
+        actualizada.iloc[posiciones] = modificaciones.array
+    return actualizada
+
+
+def fusionar_delta(df, delta, indice=None, clave='Id de caso', columna_fecha='Fecha reporte web'):
+    """
+    Inserta o actualiza en el dataset las filas de una actualización diaria,
+    identificándolas por 'Id de caso'. Si un caso ya existe se conserva la
+    versión con 'Fecha reporte web' más reciente; ante un empate gana la
+    actualización. Solo se recorren las filas de la actualización: el costo
+    de buscar y reemplazar no depende del tamaño del dataset (las columnas
+    sí se copian una vez para añadir las filas nuevas).
+
+    Las columnas del dataset que faltan en la actualización conservan su
+    valor en los casos actualizados y quedan vacías (None) en los nuevos.
+
+    Args:
+        df (pandas.DataFrame): Dataset cargado (no se modifica)
+        delta (pandas.DataFrame): Actualización ya procesada (ver leer_delta)
+        indice (IndiceCasos, opcional): Índice de ids de df; se construye si falta
+        clave (str): Columna que identifica cada caso
+        columna_fecha (str): Columna que decide qué versión de un caso conservar
+
+    Returns:
+        ResultadoFusion: Dataset actualizado y detalle de los cambios
+    """
+    if clave not in df.columns or clave not in delta.columns:
+        raise ValueError(f"La columna {clave} no existe en el dataset o en la actualización")
+
+    if indice is None:
+        indice = IndiceCasos(df[clave])
+
+    ids = pd.to_numeric(delta[clave], errors='coerce')
+    if ids.isna().any():
+        print(f"Se omitieron {int(ids.isna().sum())} filas de la actualización sin '{clave}'")
+    delta = delta[ids.notna().to_numpy()]
+
+    # Un caso repetido en la actualización: gana su fila más reciente (o la última)
+    usar_fecha = columna_fecha in delta.columns and columna_fecha in df.columns
+    if usar_fecha:
+        delta = delta.sort_values(columna_fecha, kind='stable', na_position='first')
+    delta = delta.drop_duplicates(clave, keep='last').sort_index()
+    ids = pd.to_numeric(delta[clave]).to_numpy(dtype=np.int64)
+
+    posiciones = indice.buscar(ids)
+    existentes = posiciones >= 0
+    nuevos = ~existentes
+
+    # Descartar las versiones más antiguas que las ya cargadas
+    n_ignoradas = 0
+    if usar_fecha and existentes.any():
+        fecha_nueva = delta[columna_fecha].to_numpy(dtype='datetime64[ns]')[existentes]
+        fecha_actual = df[columna_fecha].to_numpy(dtype='datetime64[ns]')[posiciones[existentes]]
+        mas_antiguas = np.zeros(len(delta), dtype=bool)
+        mas_antiguas[existentes] = ((np.isnat(fecha_nueva) & ~np.isnat(fecha_actual))
+                                    | (fecha_nueva < fecha_actual))
+        n_ignoradas = int(mas_antiguas.sum())
+        existentes &= ~mas_antiguas
+
+    posiciones_modificadas = posiciones[existentes]
+    modificaciones = delta[existentes]
+    anexadas = delta[nuevos]
+
+    columnas_extra = [col for col in delta.columns if col not in df.columns]
+    if columnas_extra:
+        print(f"Columnas de la actualización que no están en el dataset (se ignoran): {columnas_extra}")
+
+    columnas = {}
+    for col in df.columns:
+        if col in delta.columns:
+            valores_mod, valores_nuevos = modificaciones[col], anexadas[col]
+        else:
+            # Sin dato en la actualización: el caso actualizado conserva el que tenía
+            valores_mod = df[col].iloc[posiciones_modificadas]
+            valores_nuevos = pd.Series([None] * len(anexadas), dtype=object)
+        columnas[col] = _columna_actualizada(df[col], valores_mod.reset_index(drop=True),
+                                             posiciones_modificadas, valores_nuevos.reset_index(drop=True))
+
+    df_actualizado = pd.DataFrame(columnas)
+    df_actualizado.attrs = dict(df.attrs)
+
+    n_anterior = len(df)
+    indice = indice.con_nuevos(ids[nuevos], np.arange(n_anterior, n_anterior + int(nuevos.sum())))
+    return ResultadoFusion(df_actualizado, indice, n_anterior, posiciones_modificadas,
+                           df.iloc[posiciones_modificadas], n_ignoradas)
@@ -0,0 +1,294 @@
+import numpy as np
+import pandas as pd
+
+from agregacion_paralela import contar_combinaciones
+
+# Dimensiones por las que se cuentan los casos en todos los gráficos y tasas
+DIMENSIONES_CUBO = ('Nombre departamento', 'Sexo', 'Edad', 'Tipo de contagio', 'Estado')
+
+# Último valor de los ejes numéricos: agrupa los mayores, de modo que una
+# edad mal cargada (p. ej. 32767) no agranda el cubo denso
+VALOR_MAXIMO_EJE = 120
+
+
+def codificar_columna(serie):
+    """
+    Codifica una columna como enteros para usarla como eje del cubo.
+
+    Los ejes numéricos tienen un tope: los valores mayores que
+    VALOR_MAXIMO_EJE se cuentan en la etiqueta VALOR_MAXIMO_EJE, que
+    significa entonces "VALOR_MAXIMO_EJE o más". Una edad mínima de hasta
+    VALOR_MAXIMO_EJE y los rangos que terminan por encima de él siguen
+    siendo exactos; un rango que empiece después del tope no los ve.
+
+    Returns:
+        tuple: (códigos con -1 para nulos, pandas.Index con las etiquetas)
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy().astype(np.int64), pd.Index(serie.cat.categories)
+
+    if pd.api.types.is_numeric_dtype(serie):
+        # Edades y demás valores enteros: el eje va de 0 al máximo observado
+        # (como mucho VALOR_MAXIMO_EJE)
+        codigos, validos = _codificar_numeros(serie)
+        maximo = int(codigos.max()) if validos.any() else -1
+        return codigos, pd.RangeIndex(maximo + 1)
+
+    codigos, etiquetas = pd.factorize(serie)
+    return codigos.astype(np.int64), pd.Index(etiquetas)
+
+
+def _codificar_numeros(serie):
+    """
+    Códigos de un eje numérico: la parte entera de cada valor, con los
+    mayores que VALOR_MAXIMO_EJE en la última posición
+
+    Returns:
+        tuple: (códigos con -1 para nulos y negativos, máscara de valores válidos)
+    """
+    valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+    validos = ~np.isnan(valores) & (valores >= 0)
+    codigos = np.full(len(valores), -1, dtype=np.int64)
+    codigos[validos] = np.floor(np.minimum(valores[validos], VALOR_MAXIMO_EJE)).astype(np.int64)
+    return codigos, validos
+
+
+def codificar_con_etiquetas(serie, etiquetas):
+    """
+    Codifica algunas filas con las etiquetas de un eje ya construido,
+    agregando al final las etiquetas que no estaban.
+
+    Returns:
+        tuple: (códigos con -1 para nulos, pandas.Index con las etiquetas ampliadas)
+    """
+    if isinstance(etiquetas, pd.RangeIndex):
+        codigos, validos = _codificar_numeros(serie)
+        maximo = max(len(etiquetas) - 1, int(codigos.max()) if validos.any() else -1)
+        return codigos, pd.RangeIndex(maximo + 1)
+
+    valores = pd.Index(serie.astype(object))
+    nulos = np.asarray(valores.isna(), dtype=bool)
+    codigos = etiquetas.get_indexer(valores)
+    nuevas = valores[(codigos < 0) & ~nulos].unique()
+    if len(nuevas):
+        etiquetas = etiquetas.append(pd.Index(nuevas))
+        codigos = etiquetas.get_indexer(valores)
+    codigos[nulos] = -1
+    return codigos.astype(np.int64), etiquetas
+
+
+def es_fallecido(etiquetas):
+    """Máscara de las etiquetas de 'Estado' que corresponden a fallecidos"""
+    return np.asarray(pd.Index(etiquetas).astype(str).str.contains('Fallecido', case=False), dtype=bool)
+
+
+class CuboDatos:
+    """
+    Cubo de conteos precalculado sobre las dimensiones de DIMENSIONES_CUBO.
+
+    Se construye en una sola pasada sobre las filas: cada dimensión se
+    codifica como entero (con una posición extra al final para los nulos) y
+    los conteos se acumulan con np.bincount en un arreglo denso, en serie o
+    repartiendo las filas entre varios procesos. A partir de
+    ahí cualquier conteo, filtro o tasa sobre esas dimensiones se resuelve
+    sumando ejes del cubo, sin volver a recorrer las filas.
+
+    Las series diarias por columna de fecha se calculan bajo demanda y
+    también se guardan.
+    """
+
+    def __init__(self, df, dimensiones=DIMENSIONES_CUBO, procesos=None):
+        """
+        Args:
+            df (pandas.DataFrame): Datos completos
+            dimensiones (tuple): Columnas a usar como ejes (se omiten las ausentes)
+            procesos (int, opcional): Procesos para contar (None o 1: en serie)
+        """
+        self._df = df
+        self.n_filas = len(df)
+        self.dimensiones = [dim for dim in dimensiones if dim in df.columns]
+        self.etiquetas = {}
+        self._series_diarias = {}
+
+        forma = []
+        columnas = []
+        for dim in self.dimensiones:
+            codigos, etiquetas = codificar_columna(df[dim])
+            # Los nulos (-1) van a la última posición del eje
+            codigos[codigos < 0] = len(etiquetas)
+            columnas.append(codigos)
+            self.etiquetas[dim] = etiquetas
+            forma.append(len(etiquetas) + 1)
+
+        if columnas:
+            self.conteos = contar_combinaciones(columnas, forma, procesos)
+        else:
+            # Sin dimensiones el cubo es un único conteo
+            self.conteos = np.array(self.n_filas, dtype=np.int64)
+
+    @classmethod
+    def por_bloques(cls, bloques, dimensiones=DIMENSIONES_CUBO):
+        """
+        Construye el cubo sumando los conteos de los datos bloque a bloque,
+        sin tenerlos todos en memoria (ver fuera_de_memoria.py). El cubo no
+        conserva los datos, así que no ofrece series diarias.
+
+        Args:
+            bloques (iterable): DataFrames con las columnas de las dimensiones
+            dimensiones (tuple): Columnas a usar como ejes
+
+        Returns:
+            CuboDatos: Cubo de todos los bloques
+        """
+        cubo = None
+        n_filas = 0
+        for bloque in bloques:
+            if cubo is None:
+                cubo = cls(bloque, dimensiones)
+            else:
+                cubo = cubo.actualizado(bloque, bloque.iloc[:0], bloque)
+            n_filas += len(bloque)
+            cubo._df = None
+        if cubo is None:
+            cubo = cls(pd.DataFrame({dim: pd.Series(dtype=object) for dim in dimensiones}), dimensiones)
+            cubo._df = None
+        cubo.n_filas = n_filas
+        return cubo
+
+    def _indice_lineal(self, filas, etiquetas):
+        """Posición en el cubo (aplanado) de cada fila, con los ejes de 'etiquetas'"""
+        indice_lineal = np.zeros(len(filas), dtype=np.int64)
+        for dim in self.dimensiones:
+            codigos, _ = codificar_con_etiquetas(filas[dim], etiquetas[dim])
+            codigos[codigos < 0] = len(etiquetas[dim])
+            indice_lineal = indice_lineal * (len(etiquetas[dim]) + 1) + codigos
+        return indice_lineal
+
+    def actualizado(self, df, filas_quitadas, filas_agregadas):
+        """
+        Devuelve el cubo de una versión actualizada de los datos restando las
+        filas que se quitaron y sumando las que se agregaron, sin recorrer el
+        resto. El cubo actual no se modifica.
+
+        Args:
+            df (pandas.DataFrame): Datos actualizados completos
+            filas_quitadas (pandas.DataFrame): Versión anterior de las filas modificadas
+            filas_agregadas (pandas.DataFrame): Filas modificadas y nuevas, en su versión actual
+
+        Returns:
+            CuboDatos: Cubo con los conteos de df
+        """
+        # Ampliar los ejes con las etiquetas nuevas (antes de la posición de nulos)
+        conteos = self.conteos
+        etiquetas = {}
+        for eje, dim in enumerate(self.dimensiones):
+            _, etiquetas[dim] = codificar_con_etiquetas(filas_agregadas[dim], self.etiquetas[dim])
+            extra = len(etiquetas[dim]) - len(self.etiquetas[dim])
+            if extra:
+                conteos = np.insert(conteos, [len(self.etiquetas[dim])] * extra, 0, axis=eje)
+
+        tamano = conteos.size
+        diferencia = (np.bincount(self._indice_lineal(filas_agregadas, etiquetas), minlength=tamano)
+                      - np.bincount(self._indice_lineal(filas_quitadas, etiquetas), minlength=tamano))
+
+        nuevo = CuboDatos.__new__(CuboDatos)
+        nuevo._df = df
+        nuevo.n_filas = len(df)
+        nuevo.dimensiones = list(self.dimensiones)
+        nuevo.etiquetas = etiquetas
+        nuevo.conteos = conteos + diferencia.reshape(conteos.shape)
+        nuevo._series_diarias = {
+            columna: self._serie_diaria_actualizada(serie, filas_quitadas[columna], filas_agregadas[columna])
+            for columna, serie in self._series_diarias.items()
+        }
+        return nuevo
+
+    def _serie_diaria_actualizada(self, serie, fechas_quitadas, fechas_agregadas):
+        """Suma y resta los casos por día de las filas cambiadas a una serie diaria"""
+        def por_dia(fechas):
+            fechas = pd.Series(fechas.to_numpy().astype('datetime64[D]')).dropna()
+            return fechas.value_counts()
+
+        resultado = serie.add(por_dia(fechas_agregadas), fill_value=0).sub(por_dia(fechas_quitadas), fill_value=0)
+        if len(resultado):
+            resultado = resultado.asfreq('D', fill_value=0)
+        resultado = resultado.astype(np.int64)
+        resultado.index.name = serie.index.name
+        return resultado
+
+    def tiene(self, *dimensiones):
+        """Indica si todas las dimensiones están en el cubo"""
+        return all(dim in self.etiquetas for dim in dimensiones)
+
+    def _seleccion(self, igualdades=None, edad_minima=None, solo_fallecidos=False):
+        """Aplica los filtros eje por eje y devuelve el sub-cubo resultante"""
+        conteos = self.conteos
+        condiciones = {}
+        for dim, valor in (igualdades or {}).items():
+            condiciones[dim] = np.asarray(self.etiquetas[dim].astype(str) == str(valor), dtype=bool)
+        if edad_minima is not None:
+            condiciones['Edad'] = np.asarray(self.etiquetas['Edad'] >= edad_minima, dtype=bool)
+        if solo_fallecidos:
+            condiciones['Estado'] = es_fallecido(self.etiquetas['Estado'])
+
+        for dim, condicion in condiciones.items():
+            # La posición de nulos nunca cumple un filtro
+            forma = [1] * conteos.ndim
+            forma[self.dimensiones.index(dim)] = -1
+            conteos = conteos * np.append(condicion, False).reshape(forma)
+        return conteos
+
+    def contar(self, por=(), igualdades=None, edad_minima=None, solo_fallecidos=False):
+        """
+        Cuenta casos agrupando por algunas dimensiones
+
+        Args:
+            por (tuple): Dimensiones a conservar (las demás se suman)
+            igualdades (dict, opcional): {dimensión: valor} que deben cumplir los casos
+            edad_minima (int, opcional): Edad mínima (inclusive)
+            solo_fallecidos (bool): Contar solo los fallecidos
+
+        Returns:
+            int, pandas.Series o pandas.Series con MultiIndex: Conteos sin los
+            nulos de las dimensiones conservadas; en un eje numérico la última
+            etiqueta incluye los valores mayores (ver codificar_columna)
+        """
+        por = [por] if isinstance(por, str) else list(por)
+        conteos = self._seleccion(igualdades, edad_minima, solo_fallecidos)
+
+        ejes_sumados = tuple(i for i, dim in enumerate(self.dimensiones) if dim not in por)
+        conteos = conteos.sum(axis=ejes_sumados)
+        if not por:
+            return int(conteos)
+
+        # Reordenar los ejes según 'por' y quitar la posición de nulos
+        conservadas = [dim for dim in self.dimensiones if dim in por]
+        conteos = np.transpose(conteos, [conservadas.index(dim) for dim in por])
+        conteos = conteos[tuple(slice(0, -1) for _ in por)]
+
+        if len(por) == 1:
+            return pd.Series(conteos, index=self.etiquetas[por[0]].rename(por[0]), name='count')
+        indice = pd.MultiIndex.from_product([self.etiquetas[dim] for dim in por], names=por)
+        return pd.Series(conteos.ravel(), index=indice, name='count')
+
+    def serie_diaria(self, columna_fecha):
+        """
+        Casos por día según una columna de fecha, con los días sin casos en 0
+
+        Returns:
+            pandas.Series: Conteos indexados por día (frecuencia diaria)
+        """
+        if columna_fecha not in self._series_diarias:
+            if self._df is None:
+                raise ValueError("El cubo se construyó por bloques y no tiene series diarias")
+            fechas = self._df[columna_fecha].to_numpy().astype('datetime64[D]')
+            fechas = fechas[~np.isnat(fechas)]
+            if len(fechas) == 0:
+                serie = pd.Series([], index=pd.DatetimeIndex([], freq='D'), dtype=np.int64)
+            else:
+                inicio = fechas.min()
+                conteo = np.bincount((fechas - inicio).astype(np.int64))
+                serie = pd.Series(conteo, index=pd.date_range(inicio, periods=len(conteo), freq='D'))
+            serie.index.name = columna_fecha
+            self._series_diarias[columna_fecha] = serie
+        return self._series_diarias[columna_fecha]
@@ -0,0 +1,381 @@
+"""
+Curva epidémica por región: promedios móviles, tasa de crecimiento, tiempo
+de duplicación y número reproductivo efectivo (Rt).
+
+Los casos diarios se guardan en una matriz región × día junto con sus sumas
+acumuladas y las de la presión de infección (casos pasados ponderados por
+el intervalo serial). Cualquier suma sobre una ventana de días es una resta
+de dos columnas acumuladas, de modo que todos los indicadores se calculan
+para todas las regiones y días a la vez con operaciones vectorizadas.
+
+Al agregar días o aplicar una actualización solo se recalculan las columnas
+acumuladas desde el primer día que cambió: un día nuevo cuesta lo mismo
+sin importar la longitud de la historia.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from agregacion_paralela import codificar_grupos
+
+# Intervalo serial de COVID-19 (días): gamma de media 4.7 y desvío 2.9 (Nishiura et al., 2020)
+MEDIA_INTERVALO_SERIAL = 4.7
+DESVIO_INTERVALO_SERIAL = 2.9
+DIAS_INTERVALO_SERIAL = 21
+
+# Prior gamma de Rt del método de Cori et al. (2013): forma y escala
+PRIOR_FORMA_RT = 1.0
+PRIOR_ESCALA_RT = 5.0
+
+# Nombre de la fila con la suma de todas las regiones
+TOTAL = 'Total'
+
+# Columnas de días reservadas de más al crecer (para no copiar las matrices en cada día nuevo)
+DIAS_RESERVA = 64
+
+
+def intervalo_serial_gamma(media=MEDIA_INTERVALO_SERIAL, desvio=DESVIO_INTERVALO_SERIAL, dias=DIAS_INTERVALO_SERIAL):
+    """
+    Distribución discreta del intervalo serial a partir de una gamma
+
+    Args:
+        media (float): Media en días
+        desvio (float): Desvío estándar en días
+        dias (int): Días de retraso considerados (1 a dias)
+
+    Returns:
+        numpy.ndarray: Probabilidad de un retraso de 1, 2, ..., dias días (suma 1)
+    """
+    forma = (media / desvio) ** 2
+    escala = desvio ** 2 / media
+    retrasos = np.arange(1, dias + 1, dtype=float)
+    log_densidad = (forma - 1) * np.log(retrasos) - retrasos / escala - math.lgamma(forma) - forma * math.log(escala)
+    pesos = np.exp(log_densidad)
+    return pesos / pesos.sum()
+
+
+def _dias(fechas):
+    """Fechas como datetime64[D] (NaT se conserva)"""
+    return np.asarray(fechas).astype('datetime64[D]')
+
+
+class CurvaEpidemica:
+    """
+    Casos diarios por región y sus indicadores
+
+    Los indicadores se devuelven como DataFrames indexados por fecha con
+    una columna por región, o para un solo día con indicadores_dia().
+    """
+
+    def __init__(self, regiones, inicio, casos, intervalo_serial=None):
+        """
+        Args:
+            regiones (list): Nombres de las regiones (filas de casos)
+            inicio (numpy.datetime64): Fecha del primer día
+            casos (numpy.ndarray): Casos por región y día (regiones × días)
+            intervalo_serial (numpy.ndarray, opcional): Probabilidad de cada retraso de 1, 2, ... días
+        """
+        casos = np.asarray(casos, dtype=np.int64).reshape(len(regiones), -1)
+        self.regiones = pd.Index(regiones)
+        # Columnas de origen si se construyó desde un DataFrame (ver actualizada)
+        self.columna_region = None
+        self.columna_fecha = None
+        self.inicio = np.datetime64(inicio, 'D')
+        self.intervalo_serial = np.asarray(
+            intervalo_serial if intervalo_serial is not None else intervalo_serial_gamma(), dtype=float)
+        self.n_dias = 0
+        self._casos = np.zeros((len(self.regiones), 0), dtype=np.int64)
+        self._acumulado = np.zeros((len(self.regiones), 1), dtype=np.int64)
+        self._presion = np.zeros((len(self.regiones), 0), dtype=float)
+        self._presion_acumulada = np.zeros((len(self.regiones), 1), dtype=float)
+        self._reservar(casos.shape[1])
+        self._casos[:, :casos.shape[1]] = casos
+        self.n_dias = casos.shape[1]
+        self._recalcular_desde(0)
+
+    @classmethod
+    def desde_dataframe(cls, df, columna_region='Nombre departamento', columna_fecha='fecha de diagnóstico',
+                        con_total=True, intervalo_serial=None):
+        """
+        Construye la curva contando los casos de un DataFrame por región y día
+        en una sola pasada
+
+        Args:
+            df (pandas.DataFrame): Casos
+            columna_region (str): Columna de región
+            columna_fecha (str): Columna de fecha (datetime)
+            con_total (bool): Agregar la fila TOTAL con todos los casos con fecha,
+                incluidos los de región nula
+            intervalo_serial (numpy.ndarray, opcional): Ver __init__
+
+        Returns:
+            CurvaEpidemica: Curva con un día por fecha entre la primera y la última
+        """
+        for columna in (columna_region, columna_fecha):
+            if columna not in df.columns:
+                raise ValueError(f"La columna {columna} no existe en el DataFrame")
+        fechas = _dias(df[columna_fecha].to_numpy())
+        con_fecha = ~np.isnat(fechas)
+        codigos, etiquetas = codificar_grupos(df[columna_region])
+        # Regiones en orden alfabético (como quedan al agregar regiones nuevas)
+        orden = etiquetas.argsort(kind='stable')
+        regiones = list(etiquetas[orden]) + ([TOTAL] if con_total else [])
+        if not con_fecha.any():
+            return cls(regiones, np.datetime64('today', 'D'), np.zeros((len(regiones), 0)), intervalo_serial)
+
+        inicio = fechas[con_fecha].min()
+        dia = (fechas[con_fecha] - inicio).astype(np.int64)
+        n_dias = int(dia.max()) + 1
+        codigos = codigos[con_fecha]
+        # Los nulos de región (última posición de los códigos) solo cuentan en el total
+        conteos = np.bincount(codigos * n_dias + dia, minlength=(len(etiquetas) + 1) * n_dias)
+        conteos = conteos.reshape(len(etiquetas) + 1, n_dias)
+        casos = conteos[:-1][orden]
+        if con_total:
+            casos = np.vstack([casos, conteos.sum(axis=0)])
+        curva = cls(regiones, inicio, casos, intervalo_serial)
+        curva.columna_region = columna_region
+        curva.columna_fecha = columna_fecha
+        return curva
+
+    @property
+    def con_total(self):
+        return len(self.regiones) > 0 and self.regiones[-1] == TOTAL
+
+    @property
+    def fechas(self):
+        """Fechas de los días de la curva"""
+        return pd.date_range(pd.Timestamp(self.inicio), periods=self.n_dias, freq='D')
+
+    @property
+    def casos(self):
+        """Casos por región y día (regiones × días), sin copiar"""
+        return self._casos[:, :self.n_dias]
+
+    def _reservar(self, n_dias):
+        """Amplía las matrices para que quepan n_dias días"""
+        capacidad = self._casos.shape[1]
+        if n_dias <= capacidad:
+            return
+        nueva = max(n_dias, capacidad * 2) + DIAS_RESERVA
+        filas = len(self.regiones)
+        for nombre, extra in (('_casos', 0), ('_presion', 0), ('_acumulado', 1), ('_presion_acumulada', 1)):
+            anterior = getattr(self, nombre)
+            matriz = np.zeros((filas, nueva + extra), dtype=anterior.dtype)
+            matriz[:, :anterior.shape[1]] = anterior
+            setattr(self, nombre, matriz)
+
+    def _agregar_regiones(self, regiones):
+        """
+        Agrega filas vacías para regiones nuevas y reordena las regiones
+        alfabéticamente, como en desde_dataframe (la fila TOTAL sigue al final)
+        """
+        nuevas = [region for region in regiones if region not in self.regiones]
+        if not nuevas:
+            return
+        posicion = len(self.regiones) - 1 if self.con_total else len(self.regiones)
+        ampliadas = self.regiones[:posicion].append(pd.Index(nuevas))
+        orden = ampliadas.argsort(kind='stable')
+        filas = np.concatenate([orden, np.arange(len(ampliadas), len(ampliadas) + len(self.regiones) - posicion)])
+        self.regiones = ampliadas[orden].append(self.regiones[posicion:])
+        for nombre in ('_casos', '_presion', '_acumulado', '_presion_acumulada'):
+            matriz = getattr(self, nombre)
+            setattr(self, nombre, np.insert(matriz, [posicion] * len(nuevas), 0, axis=0)[filas])
+
+    def _recalcular_desde(self, desde):
+        """
+        Recalcula las sumas acumuladas y la presión de infección de los días
+        desde 'desde' hasta el último (las anteriores no cambian)
+        """
+        hasta = self.n_dias
+        if desde >= hasta:
+            return
+        casos = self._casos
+        self._acumulado[:, desde + 1:hasta + 1] = (self._acumulado[:, desde:desde + 1]
+                                                   + np.cumsum(casos[:, desde:hasta], axis=1))
+
+        # Presión de infección: Λ_t = Σ_s w_s · casos_{t-s}
+        presion = np.zeros((len(self.regiones), hasta - desde))
+        for retraso, peso in enumerate(self.intervalo_serial, start=1):
+            inicio = max(desde, retraso)
+            if inicio >= hasta:
+                break
+            presion[:, inicio - desde:] += peso * casos[:, inicio - retraso:hasta - retraso]
+        self._presion[:, desde:hasta] = presion
+        self._presion_acumulada[:, desde + 1:hasta + 1] = (self._presion_acumulada[:, desde:desde + 1]
+                                                           + np.cumsum(presion, axis=1))
+
+    def copia(self):
+        """Copia independiente de la curva"""
+        nueva = CurvaEpidemica.__new__(CurvaEpidemica)
+        nueva.__dict__.update(self.__dict__)
+        for nombre in ('_casos', '_presion', '_acumulado', '_presion_acumulada'):
+            setattr(nueva, nombre, getattr(self, nombre).copy())
+        return nueva
+
+    def agregar_dia(self, fecha, casos_por_region):
+        """
+        Agrega los casos de un día nuevo calculando solo ese día. Los días
+        sin datos entre el último y la fecha quedan en 0.
+
+        Args:
+            fecha: Fecha del día nuevo (posterior al último)
+            casos_por_region (dict o pandas.Series): Casos por región; las
+                regiones que faltan tienen 0, las desconocidas se agregan. Sin
+                fila TOTAL en los datos, el total es la suma de las regiones.
+        """
+        dia = int((np.datetime64(fecha, 'D') - self.inicio).astype(np.int64))
+        if dia < self.n_dias:
+            raise ValueError(f"La fecha {fecha} no es posterior al último día de la curva")
+        casos_por_region = pd.Series(casos_por_region, dtype=np.int64)
+        total = casos_por_region.pop(TOTAL) if TOTAL in casos_por_region.index else casos_por_region.sum()
+        self._agregar_regiones(casos_por_region.index)
+
+        anterior = self.n_dias
+        self._reservar(dia + 1)
+        columna = casos_por_region.reindex(self.regiones, fill_value=0).to_numpy(copy=True)
+        if self.con_total:
+            columna[-1] = total
+        self._casos[:, anterior:dia + 1] = 0
+        self._casos[:, dia] = columna
+        self.n_dias = dia + 1
+        self._recalcular_desde(anterior)
+
+    def actualizada(self, filas_quitadas, filas_agregadas):
+        """
+        Devuelve la curva de una versión actualizada de los datos restando
+        las filas que se quitaron y sumando las que se agregaron (como
+        CuboDatos.actualizado). Solo se recalculan los días desde el primero
+        que cambió; la curva actual no se modifica.
+
+        Args:
+            filas_quitadas (pandas.DataFrame): Versión anterior de las filas modificadas
+            filas_agregadas (pandas.DataFrame): Filas modificadas y nuevas, en su versión actual
+
+        Returns:
+            CurvaEpidemica o None: Curva actualizada, o None si hay fechas
+            anteriores al primer día (hay que reconstruirla)
+        """
+        nueva = self.copia()
+        cambios = []
+        for filas, signo in ((filas_quitadas, -1), (filas_agregadas, 1)):
+            fechas = _dias(filas[self.columna_fecha].to_numpy())
+            con_fecha = ~np.isnat(fechas)
+            if not con_fecha.any():
+                continue
+            dias = (fechas[con_fecha] - nueva.inicio).astype(np.int64)
+            if dias.min() < 0:
+                return None
+            regiones = filas[self.columna_region].to_numpy(dtype=object)[con_fecha]
+            cambios.append((regiones, dias, signo))
+        if not cambios:
+            return nueva
+
+        regiones_nuevas = pd.unique(np.concatenate([regiones for regiones, _, _ in cambios]))
+        nueva._agregar_regiones([region for region in regiones_nuevas if not pd.isna(region)])
+        ultimo = max(int(dias.max()) for _, dias, _ in cambios)
+        anterior = nueva.n_dias
+        nueva._reservar(ultimo + 1)
+        nueva.n_dias = max(anterior, ultimo + 1)
+        nueva._casos[:, anterior:nueva.n_dias] = 0
+
+        for regiones, dias, signo in cambios:
+            filas = nueva.regiones.get_indexer(regiones)
+            validas = filas >= 0
+            np.add.at(nueva._casos, (filas[validas], dias[validas]), signo)
+            if nueva.con_total:
+                np.add.at(nueva._casos[-1], dias, signo)
+        desde = min(int(dias.min()) for _, dias, _ in cambios)
+        nueva._recalcular_desde(min(desde, anterior))
+        return nueva
+
+    def _suma_ventana(self, acumulado, ventana, desde, hasta):
+        """Suma de los últimos 'ventana' días hasta cada día de [desde, hasta); NaN sin días suficientes"""
+        dias = np.arange(desde, hasta)
+        suma = (acumulado[:, dias + 1] - acumulado[:, np.maximum(dias + 1 - ventana, 0)]).astype(float)
+        suma[:, dias + 1 < ventana] = np.nan
+        return suma
+
+    def _promedio(self, ventana, desde, hasta):
+        return self._suma_ventana(self._acumulado, ventana, desde, hasta) / ventana
+
+    def _crecimiento(self, ventana, desde, hasta):
+        """Tasa de crecimiento diaria: log del cociente entre el promedio móvil y el de 'ventana' días antes"""
+        actual = self._promedio(ventana, desde, hasta)
+        previo = np.full_like(actual, np.nan)
+        inicio = max(desde - ventana, 0)
+        anteriores = self._promedio(ventana, inicio, max(hasta - ventana, inicio))
+        previo[:, previo.shape[1] - anteriores.shape[1]:] = anteriores
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crecimiento = np.log(actual / previo) / ventana
+        crecimiento[~np.isfinite(crecimiento)] = np.nan
+        return crecimiento
+
+    def _rt(self, ventana, desde, hasta):
+        """Media posterior de Rt (Cori et al.) sobre la ventana que termina en cada día"""
+        casos = self._suma_ventana(self._acumulado, ventana, desde, hasta)
+        presion = self._suma_ventana(self._presion_acumulada, ventana, desde, hasta)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rt = (PRIOR_FORMA_RT + casos) / (1 / PRIOR_ESCALA_RT + presion)
+        # Sin casos previos que puedan haber contagiado, Rt no está definido
+        rt[~(presion > 0)] = np.nan
+        return rt
+
+    def _marco(self, valores):
+        return pd.DataFrame(valores.T, index=self.fechas, columns=self.regiones)
+
+    def promedio_movil(self, ventana=7):
+        """Promedio de casos de los últimos 'ventana' días (fechas × regiones)"""
+        return self._marco(self._promedio(ventana, 0, self.n_dias))
+
+    def tasa_crecimiento(self, ventana=7):
+        """
+        Tasa de crecimiento exponencial diaria, comparando el promedio móvil
+        de 'ventana' días con el de 'ventana' días antes (fechas × regiones)
+        """
+        return self._marco(self._crecimiento(ventana, 0, self.n_dias))
+
+    def tiempo_duplicacion(self, ventana=7):
+        """Días en que se duplican los casos al ritmo actual; NaN si no crecen (fechas × regiones)"""
+        crecimiento = self._crecimiento(ventana, 0, self.n_dias)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._marco(np.where(crecimiento > 0, np.log(2) / crecimiento, np.nan))
+
+    def rt(self, ventana=7):
+        """
+        Número reproductivo efectivo estimado con el método de Cori et al.
+        (2013) sobre ventanas de 'ventana' días (fechas × regiones)
+        """
+        return self._marco(self._rt(ventana, 0, self.n_dias))
+
+    def indicadores_dia(self, fecha=None):
+        """
+        Todos los indicadores de un día para cada región, calculados solo
+        para ese día
+
+        Args:
+            fecha (opcional): Día a consultar (por defecto, el último)
+
+        Returns:
+            pandas.DataFrame: Una fila por región con casos, promedio_7,
+            promedio_14, crecimiento, duplicacion y rt
+        """
+        if self.n_dias == 0:
+            raise ValueError("La curva no tiene días")
+        dia = self.n_dias - 1 if fecha is None else int((np.datetime64(fecha, 'D') - self.inicio).astype(np.int64))
+        if not 0 <= dia < self.n_dias:
+            raise ValueError(f"La fecha {fecha} está fuera de la curva")
+        crecimiento = self._crecimiento(7, dia, dia + 1)[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            duplicacion = np.where(crecimiento > 0, np.log(2) / crecimiento, np.nan)
+        indicadores = pd.DataFrame({
+            'casos': self._casos[:, dia],
+            'promedio_7': self._promedio(7, dia, dia + 1)[:, 0],
+            'promedio_14': self._promedio(14, dia, dia + 1)[:, 0],
+            'crecimiento': crecimiento,
+            'duplicacion': duplicacion,
+            'rt': self._rt(7, dia, dia + 1)[:, 0],
+        }, index=self.regiones)
+        indicadores.attrs['fecha'] = pd.Timestamp(self.inicio + np.timedelta64(dia, 'D'))
+        return indicadores
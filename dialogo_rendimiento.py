@@ -0,0 +1,168 @@
+import json
+from datetime import datetime
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QMessageBox,
+                             QPushButton, QSplitter, QTableWidget, QTableWidgetItem, QVBoxLayout)
+
+from instrumentacion import registro
+
+# Mediciones individuales que muestra el diálogo (las más recientes)
+MEDICIONES_VISIBLES = 200
+
+
+class PuenteRendimiento(QObject):
+    """
+    Entrega las mediciones del registro en el hilo de la interfaz: las
+    operaciones en segundo plano se miden en el hilo que las ejecuta
+    """
+    medicion = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super(PuenteRendimiento, self).__init__(parent)
+        registro.agregar_oyente(self._recibir)
+        self.destroyed.connect(lambda *args, oyente=self._recibir: registro.quitar_oyente(oyente))
+
+    def _recibir(self, medicion):
+        try:
+            self.medicion.emit(medicion)
+        except RuntimeError:
+            # El puente se destruyó mientras una tarea seguía midiendo
+            pass
+
+
+def _celda(valor, numero=False):
+    """Celda de solo lectura; los números se alinean a la derecha"""
+    item = QTableWidgetItem(valor)
+    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+    if numero:
+        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+    return item
+
+
+def _megabytes(memoria_bytes):
+    return '' if memoria_bytes is None else f"{memoria_bytes / 1e6:,.1f}"
+
+
+def _cantidad(filas):
+    return '' if filas is None else f"{filas:,}"
+
+
+class DialogoRendimiento(QDialog):
+    """
+    Diálogo "Rendimiento": resumen por operación y últimas mediciones del
+    registro, actualizado mientras está abierto
+    """
+    def __init__(self, puente, parent=None):
+        """
+        Args:
+            puente (PuenteRendimiento): Fuente de las mediciones nuevas
+            parent (QWidget, opcional): Ventana padre
+        """
+        super(DialogoRendimiento, self).__init__(parent)
+        self.setWindowTitle("Rendimiento")
+        self.setMinimumSize(900, 600)
+
+        # Las mediciones llegan en ráfagas: refrescar las tablas como mucho cuatro veces por segundo
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.setInterval(250)
+        self.temporizador.timeout.connect(self.actualizar)
+        puente.medicion.connect(self.programar_actualizacion)
+
+        self.setup_ui()
+        self.actualizar()
+
+    def setup_ui(self):
+        """Crea las tablas y los controles del diálogo"""
+        layout = QVBoxLayout(self)
+
+        controles = QHBoxLayout()
+        self.etiqueta_estado = QLabel()
+        controles.addWidget(self.etiqueta_estado, 1)
+        btn_guardar = QPushButton("Guardar mediciones...")
+        btn_guardar.clicked.connect(self.guardar_mediciones)
+        controles.addWidget(btn_guardar)
+        btn_limpiar = QPushButton("Limpiar")
+        btn_limpiar.clicked.connect(self.limpiar)
+        controles.addWidget(btn_limpiar)
+        layout.addLayout(controles)
+
+        divisor = QSplitter(Qt.Orientation.Vertical)
+        self.tabla_resumen = QTableWidget(0, 7)
+        self.tabla_resumen.setHorizontalHeaderLabels(
+            ['Operación', 'Llamadas', 'Total (ms)', 'Media (ms)', 'Máximo (ms)', 'Filas (última)', 'Memoria máx. (MB)'])
+        self.tabla_ultimas = QTableWidget(0, 6)
+        self.tabla_ultimas.setHorizontalHeaderLabels(
+            ['Hora', 'Operación', 'Tiempo (ms)', 'Filas', 'Memoria (MB)', 'Hilo / error'])
+        for tabla in (self.tabla_resumen, self.tabla_ultimas):
+            tabla.verticalHeader().hide()
+            tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+            divisor.addWidget(tabla)
+        layout.addWidget(divisor)
+
+        btn_cerrar = QPushButton("Cerrar")
+        btn_cerrar.clicked.connect(self.close)
+        layout.addWidget(btn_cerrar, alignment=Qt.AlignmentFlag.AlignRight)
+
+    def programar_actualizacion(self, *args):
+        if self.isVisible() and not self.temporizador.isActive():
+            self.temporizador.start()
+
+    def actualizar(self):
+        """Vuelve a llenar las tablas con el contenido del registro"""
+        estado = "Registro activo" if registro.activo else "Registro desactivado (menú Rendimiento)"
+        if registro.ruta_traza:
+            estado += f" - traza: {registro.ruta_traza}"
+        self.etiqueta_estado.setText(estado)
+
+        resumen = registro.resumen()
+        self.tabla_resumen.setRowCount(len(resumen))
+        for fila, datos in enumerate(resumen):
+            valores = [
+                (datos['operacion'], False),
+                (f"{datos['llamadas']:,}", True),
+                (f"{datos['total'] * 1000:,.1f}", True),
+                (f"{datos['media'] * 1000:,.1f}", True),
+                (f"{datos['maximo'] * 1000:,.1f}", True),
+                (_cantidad(datos['filas']), True),
+                (_megabytes(datos['memoria_maxima']), True),
+            ]
+            for columna, (texto, numero) in enumerate(valores):
+                self.tabla_resumen.setItem(fila, columna, _celda(texto, numero))
+
+        # Las más recientes primero
+        ultimas = list(registro.mediciones)[-MEDICIONES_VISIBLES:][::-1]
+        self.tabla_ultimas.setRowCount(len(ultimas))
+        for fila, medicion in enumerate(ultimas):
+            valores = [
+                (datetime.fromtimestamp(medicion.inicio).strftime('%H:%M:%S.%f')[:-3], False),
+                (medicion.operacion, False),
+                (f"{medicion.segundos * 1000:,.1f}", True),
+                (_cantidad(medicion.filas), True),
+                (_megabytes(medicion.memoria_bytes), True),
+                (medicion.error or medicion.hilo or '', False),
+            ]
+            for columna, (texto, numero) in enumerate(valores):
+                self.tabla_ultimas.setItem(fila, columna, _celda(texto, numero))
+
+    def limpiar(self):
+        registro.limpiar()
+        self.actualizar()
+
+    def guardar_mediciones(self):
+        """Guarda las mediciones en memoria en un archivo JSON Lines"""
+        ruta, _ = QFileDialog.getSaveFileName(self, "Guardar mediciones", "rendimiento.jsonl",
+                                              "JSON Lines (*.jsonl)")
+        if not ruta:
+            return
+        try:
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                for medicion in list(registro.mediciones):
+                    archivo.write(json.dumps(medicion.como_dict(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"No se pudieron guardar las mediciones: {e}")
+
+    def showEvent(self, evento):
+        super(DialogoRendimiento, self).showEvent(evento)
+        self.actualizar()
@@ -0,0 +1,136 @@
+from statistics import NormalDist
+
+import numpy as np
+
+
+def media_y_desviacion(valores, pesos):
+    """
+    Media y desviación estándar muestral (n - 1) de datos agrupados, como si
+    cada valor se repitiera tantas veces como indica su peso
+
+    Returns:
+        tuple: (media, desviación estándar)
+    """
+    n = pesos.sum()
+    media = np.dot(valores, pesos) / n
+    varianza = np.dot(pesos, (valores - media) ** 2) / max(n - 1, 1)
+    return media, np.sqrt(varianza)
+
+
+def intervalo_wilson(exitos, totales, confianza=0.95):
+    """
+    Intervalo de confianza de Wilson de una proporción, para arreglos de
+    conteos. A diferencia del intervalo normal, no se sale de [0, 1] ni se
+    anula cuando no hay éxitos (p. ej. grupos sin fallecidos).
+
+    Args:
+        exitos (numpy.ndarray): Casos con el evento en cada grupo
+        totales (numpy.ndarray): Casos de cada grupo
+        confianza (float): Nivel de confianza (0.95: 95%)
+
+    Returns:
+        tuple: (límite inferior, límite superior) como proporciones; NaN en
+        los grupos sin casos
+    """
+    z = NormalDist().inv_cdf(0.5 + confianza / 2)
+    exitos = np.asarray(exitos, dtype=float)
+    totales = np.asarray(totales, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = exitos / totales
+        z2_n = z * z / totales
+        centro = (p + z2_n / 2) / (1 + z2_n)
+        margen = z * np.sqrt(p * (1 - p) / totales + z2_n / (4 * totales)) / (1 + z2_n)
+    return centro - margen, centro + margen
+
+
+def ancho_banda_scott(valores, pesos):
+    """
+    Ancho de banda de Scott (desviación * n^(-1/5)) calculado sobre los
+    datos agrupados: el mismo que sobre las filas individuales
+    """
+    _, desviacion = media_y_desviacion(valores, pesos)
+    return desviacion * pesos.sum() ** (-1 / 5)
+
+
+def convolucion_fft(senal, nucleo):
+    """Convolución lineal completa de dos arreglos mediante la FFT"""
+    largo = len(senal) + len(nucleo) - 1
+    tamano = 1 << (largo - 1).bit_length()
+    resultado = np.fft.irfft(np.fft.rfft(senal, tamano) * np.fft.rfft(nucleo, tamano), tamano)
+    return resultado[:largo]
+
+
+def kde_agrupada(valores, pesos, ancho_banda=None, corte=3, puntos=512):
+    """
+    Estimación de densidad gaussiana a partir de datos agrupados.
+
+    Los pesos se reparten linealmente sobre una rejilla regular y la
+    densidad se obtiene convolucionando con el núcleo gaussiano mediante
+    la FFT. El costo depende del tamaño de la rejilla y no de la cantidad
+    de observaciones.
+
+    Args:
+        valores (numpy.ndarray): Valores distintos (p. ej. edades)
+        pesos (numpy.ndarray): Cantidad de observaciones de cada valor
+        ancho_banda (float, opcional): Desviación del núcleo (por defecto, Scott)
+        corte (float): Anchos de banda que se extiende la rejilla fuera de los datos
+        puntos (int): Puntos de la rejilla
+
+    Returns:
+        tuple: (x de la rejilla, densidad en cada punto)
+    """
+    valores = np.asarray(valores, dtype=float)
+    pesos = np.asarray(pesos, dtype=float)
+    if ancho_banda is None:
+        ancho_banda = ancho_banda_scott(valores, pesos)
+    if not ancho_banda > 0:
+        # Todos los datos en un único valor: no hay dispersión que suavizar
+        ancho_banda = 1.0
+
+    inicio = valores.min() - corte * ancho_banda
+    fin = valores.max() + corte * ancho_banda
+    if not fin > inicio:
+        # Un único valor con corte=0: rejilla de un ancho de banda a cada lado
+        inicio, fin = inicio - ancho_banda, fin + ancho_banda
+    x = np.linspace(inicio, fin, puntos)
+    paso = x[1] - x[0]
+
+    # Reparto lineal de cada peso entre los dos puntos de rejilla vecinos
+    posicion = (valores - inicio) / paso
+    izquierda = np.clip(np.floor(posicion).astype(np.int64), 0, puntos - 2)
+    fraccion = posicion - izquierda
+    rejilla = np.bincount(izquierda, pesos * (1 - fraccion), minlength=puntos)
+    rejilla += np.bincount(izquierda + 1, pesos * fraccion, minlength=puntos)
+
+    # Núcleo muestreado en la rejilla hasta 4 anchos de banda
+    alcance = int(np.ceil(4 * ancho_banda / paso))
+    u = np.arange(-alcance, alcance + 1) * paso / ancho_banda
+    nucleo = np.exp(-0.5 * u ** 2) / (ancho_banda * np.sqrt(2 * np.pi))
+
+    densidad = convolucion_fft(rejilla, nucleo)[alcance:alcance + puntos] / pesos.sum()
+    return x, np.maximum(densidad, 0)
+
+
+def histograma_con_kde(valores, pesos, bins=30, corte=0):
+    """
+    Histograma de datos agrupados con su curva de densidad escalada a
+    conteos por barra (como un histograma con kde=True de seaborn)
+
+    Args:
+        valores (numpy.ndarray): Valores distintos (p. ej. edades)
+        pesos (numpy.ndarray): Cantidad de observaciones de cada valor
+        bins (int): Cantidad de barras
+        corte (float): Anchos de banda que se extiende la curva fuera de los
+            datos (0, como seaborn: la curva cubre solo el rango de los datos)
+
+    Returns:
+        dict: 'conteos' y 'bordes' del histograma, 'x' e 'y' de la curva
+    """
+    valores = np.asarray(valores, dtype=float)
+    pesos = np.asarray(pesos, dtype=float)
+    conteos, bordes = np.histogram(valores, bins=bins, weights=pesos)
+    if pesos.sum() <= 0:
+        return {'conteos': conteos, 'bordes': bordes, 'x': np.empty(0), 'y': np.empty(0)}
+    x, densidad = kde_agrupada(valores, pesos, corte=corte)
+    # Densidad * área total del histograma = curva en unidades de conteo
+    return {'conteos': conteos, 'bordes': bordes, 'x': x, 'y': densidad * pesos.sum() * np.diff(bordes)[0]}
@@ -0,0 +1,149 @@
+import gzip
+import os
+
+import numpy as np
+
+from carga_datos import OperacionCancelada
+from instrumentacion import instrumentar
+
+# pyarrow es opcional: sin él solo se exporta CSV y CSV gzip
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Formatos de exportación: clave -> (extensión, descripción para el diálogo de guardado)
+FORMATOS_EXPORTACION = {
+    'csv': ('.csv', 'Archivos CSV (*.csv)'),
+    'csv.gz': ('.csv.gz', 'CSV comprimido gzip (*.csv.gz)'),
+    'csv.zst': ('.csv.zst', 'CSV comprimido zstd (*.csv.zst)'),
+    'parquet': ('.parquet', 'Archivos Parquet (*.parquet)'),
+}
+
+# Formatos que se escriben con pyarrow
+FORMATOS_PYARROW = ('csv.zst', 'parquet')
+
+
+def formato_desde_ruta(ruta):
+    """
+    Deduce el formato de exportación de la extensión de un archivo
+
+    Returns:
+        str: Clave de FORMATOS_EXPORTACION ('csv' si la extensión no es conocida)
+    """
+    ruta = ruta.lower()
+    # Las extensiones más largas primero ('.csv.gz' antes que '.csv')
+    for formato, (extension, _) in sorted(FORMATOS_EXPORTACION.items(), key=lambda f: -len(f[1][0])):
+        if ruta.endswith(extension):
+            return formato
+    return 'csv'
+
+
+def formatos_disponibles():
+    """Formatos que se pueden escribir con las bibliotecas instaladas"""
+    return [formato for formato in FORMATOS_EXPORTACION if pa is not None or formato not in FORMATOS_PYARROW]
+
+
+def _abrir_csv(ruta, formato):
+    """Abre el archivo binario de salida de un CSV, comprimido según el formato"""
+    if formato == 'csv.gz':
+        return gzip.open(ruta, 'wb', compresslevel=6)
+    if formato == 'csv.zst':
+        return pa.CompressedOutputStream(ruta, 'zstd')
+    return open(ruta, 'wb')
+
+
+def _esquema_parquet(df):
+    """
+    Esquema de Arrow de un DataFrame, fijo para todos los bloques. Las
+    columnas de texto sin valores en la muestra se declaran como texto
+    (Arrow las deduciría de tipo nulo y fallaría con el primer valor).
+    """
+    esquema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    for i, campo in enumerate(esquema):
+        if pa.types.is_null(campo.type):
+            esquema = esquema.set(i, campo.with_type(pa.string()))
+    return esquema
+
+
+def _bloques(df, filas, tamano_bloque):
+    """Recorre las filas seleccionadas en DataFrames de a lo sumo tamano_bloque filas"""
+    total = len(df) if filas is None else len(filas)
+    for inicio in range(0, total, tamano_bloque):
+        if filas is None:
+            yield df.iloc[inicio:inicio + tamano_bloque]
+        else:
+            yield df.iloc[filas[inicio:inicio + tamano_bloque]]
+
+
+@instrumentar(filas=lambda escritas, *args, **kwargs: escritas)
+def exportar_filas(df, filas, ruta, formato=None, tamano_bloque=100_000, progreso=None, cancelar=None):
+    """
+    Exporta filas de un DataFrame escribiéndolas por bloques.
+
+    Solo se copia un bloque de filas a la vez, nunca el conjunto filtrado
+    completo. El archivo se escribe con un nombre temporal y se renombra
+    al terminar: si la exportación se cancela o falla no queda un archivo
+    a medias.
+
+    Args:
+        df (pandas.DataFrame): Datos completos
+        filas (numpy.ndarray o None): Posiciones de las filas a exportar (None: todas)
+        ruta (str): Archivo de salida
+        formato (str, opcional): Clave de FORMATOS_EXPORTACION (por defecto, según la extensión)
+        tamano_bloque (int): Filas por bloque
+        progreso (callable, opcional): Recibe (filas_escritas, filas_totales)
+        cancelar (callable, opcional): Devuelve True si hay que abortar la exportación
+
+    Returns:
+        int: Cantidad de filas exportadas
+
+    Raises:
+        OperacionCancelada: Si cancelar() devuelve True entre bloques
+        ValueError: Si el formato no es válido o requiere pyarrow y no está instalado
+    """
+    formato = formato or formato_desde_ruta(ruta)
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato de exportación desconocido: {formato}")
+    if formato in FORMATOS_PYARROW and pa is None:
+        raise ValueError(f"El formato {formato} requiere pyarrow, que no está instalado")
+
+    if filas is not None:
+        filas = np.asarray(filas)
+    total = len(df) if filas is None else len(filas)
+    temporal = ruta + '.parcial'
+    escritas = 0
+
+    try:
+        if formato == 'parquet':
+            esquema = _esquema_parquet(df)
+            with pq.ParquetWriter(temporal, esquema, compression='zstd') as escritor:
+                for bloque in _bloques(df, filas, tamano_bloque):
+                    if cancelar is not None and cancelar():
+                        raise OperacionCancelada()
+                    escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+                    escritas += len(bloque)
+                    if progreso is not None:
+                        progreso(escritas, total)
+        else:
+            with _abrir_csv(temporal, formato) as salida:
+                encabezado = True
+                for bloque in _bloques(df, filas, tamano_bloque):
+                    if cancelar is not None and cancelar():
+                        raise OperacionCancelada()
+                    salida.write(bloque.to_csv(index=False, header=encabezado).encode('utf-8'))
+                    encabezado = False
+                    escritas += len(bloque)
+                    if progreso is not None:
+                        progreso(escritas, total)
+                if encabezado:
+                    salida.write(df.iloc[:0].to_csv(index=False).encode('utf-8'))
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    return escritas
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+
+class MotorFiltros:
+    """
+    Motor de filtrado basado en índices construidos una vez por carga.
+
+    - Para cada columna indexada (p. ej. 'Sexo', 'Nombre departamento')
+      guarda un mapa de bits empaquetado por valor con las filas que lo
+      contienen (1 bit por fila).
+    - Para 'Edad' guarda la permutación que ordena las filas por edad, de
+      modo que 'Edad >= x' se resuelve con searchsorted.
+    - Para las columnas numéricas con muchos valores (p. ej. 'Código divipola
+      municipio', ~1.100 códigos) guarda también una permutación ordenada:
+      un mapa de bits por valor ocuparía demasiado, y la igualdad es el
+      rango [searchsorted izquierdo, derecho) de la permutación.
+
+    Los filtros se combinan sobre esos índices y el resultado es un único
+    arreglo de posiciones de fila; no se copia el DataFrame.
+    """
+
+    def __init__(self, df, columnas_indexadas=('Sexo', 'Nombre departamento'), columna_edad='Edad',
+                 columnas_ordenadas=('Código divipola municipio',)):
+        """
+        Construye los índices del DataFrame
+
+        Args:
+            df (pandas.DataFrame): Datos completos
+            columnas_indexadas (tuple): Columnas filtradas por igualdad con mapas de bits
+            columna_edad (str): Columna filtrada por edad mínima
+            columnas_ordenadas (tuple): Columnas numéricas filtradas por igualdad
+                con una permutación ordenada
+        """
+        self.n_filas = len(df)
+        self.columna_edad = columna_edad
+        self.mapas_bits = {}
+        for col in columnas_indexadas:
+            if col in df.columns:
+                self.mapas_bits[col] = self._construir_mapas_bits(df[col])
+
+        # {columna: (permutación, valores ordenados)}
+        self.ordenes = {}
+        for col in columnas_ordenadas:
+            if col in df.columns:
+                orden, ordenados, _ = self._construir_orden(_numeros(df[col]))
+                self.ordenes[col] = (orden, ordenados)
+
+        self.orden_edad = None
+        if columna_edad in df.columns:
+            self.orden_edad, self.edades_ordenadas, self.n_edades_validas = self._construir_orden(
+                _numeros(df[columna_edad])
+            )
+
+    def _construir_orden(self, valores):
+        """
+        Permutación que ordena las filas por valor
+
+        Returns:
+            tuple: (permutación con los NaN al final, valores no nulos ordenados,
+            cantidad de valores no nulos)
+        """
+        # argsort deja los NaN al final; se excluyen de la búsqueda
+        orden = np.argsort(valores, kind='stable')
+        n_validos = int(np.count_nonzero(~np.isnan(valores)))
+        return orden, valores[orden[:n_validos]], n_validos
+
+    def _construir_mapas_bits(self, serie):
+        """Crea un mapa de bits empaquetado por cada valor distinto de la columna"""
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos = serie.cat.codes.to_numpy()
+            valores = serie.cat.categories
+        else:
+            codigos, valores = pd.factorize(serie)
+
+        return {str(valor): np.packbits(codigos == i) for i, valor in enumerate(valores)}
+
+    def actualizado(self, df, posiciones_modificadas):
+        """
+        Devuelve un motor para una versión actualizada de los datos indexados,
+        recorriendo solo las filas que cambiaron. El motor actual no se
+        modifica (puede estar en uso en otro hilo).
+
+        Args:
+            df (pandas.DataFrame): Datos actualizados: los indexados con filas
+                nuevas al final y algunas filas existentes modificadas
+            posiciones_modificadas (numpy.ndarray): Filas existentes modificadas
+
+        Returns:
+            MotorFiltros: Motor con los índices de df
+        """
+        cambiadas = np.concatenate([np.asarray(posiciones_modificadas, dtype=np.int64),
+                                    np.arange(self.n_filas, len(df), dtype=np.int64)])
+        nuevo = MotorFiltros.__new__(MotorFiltros)
+        nuevo.n_filas = len(df)
+        nuevo.columna_edad = self.columna_edad
+        nuevo.mapas_bits = {
+            col: self._actualizar_mapas_bits(mapas, df[col].iloc[cambiadas], cambiadas, len(df))
+            for col, mapas in self.mapas_bits.items()
+        }
+
+        nuevo.ordenes = {
+            col: self._actualizar_orden(orden, ordenados, _numeros(df[col].iloc[cambiadas]), cambiadas, len(df))
+            for col, (orden, ordenados) in self.ordenes.items()
+        }
+
+        nuevo.orden_edad = None
+        if self.orden_edad is not None:
+            nuevo.orden_edad, nuevo.edades_ordenadas = self._actualizar_orden(
+                self.orden_edad, self.edades_ordenadas,
+                _numeros(df[self.columna_edad].iloc[cambiadas]), cambiadas, len(df)
+            )
+            nuevo.n_edades_validas = len(nuevo.edades_ordenadas)
+        return nuevo
+
+    def _actualizar_mapas_bits(self, mapas, valores, filas, n_filas):
+        """Copia los mapas de bits ampliados a n_filas y cambia solo los bits de 'filas'"""
+        byte = filas >> 3
+        bit = (0x80 >> (filas & 7)).astype(np.uint8)
+
+        nuevos = {}
+        for valor, mapa in mapas.items():
+            bits = np.zeros((n_filas + 7) // 8, dtype=np.uint8)
+            bits[:len(mapa)] = mapa
+            np.bitwise_and.at(bits, byte, ~bit)
+            nuevos[valor] = bits
+
+        nulos = valores.isna().to_numpy()
+        textos = valores.astype(str).to_numpy()
+        for valor in pd.unique(textos[~nulos]):
+            if valor not in nuevos:
+                nuevos[valor] = np.zeros((n_filas + 7) // 8, dtype=np.uint8)
+            seleccion = ~nulos & (textos == valor)
+            np.bitwise_or.at(nuevos[valor], byte[seleccion], bit[seleccion])
+        return nuevos
+
+    def _actualizar_orden(self, orden_actual, ordenados_actuales, valores, filas, n_filas):
+        """
+        Quita 'filas' de una permutación ordenada y las vuelve a insertar con
+        sus valores actuales
+
+        Returns:
+            tuple: (permutación, valores no nulos ordenados)
+        """
+        cambiadas = np.zeros(n_filas, dtype=bool)
+        cambiadas[filas] = True
+
+        n_validos = len(ordenados_actuales)
+        validas = orden_actual[:n_validos]
+        conservar = ~cambiadas[validas]
+        orden, ordenados = validas[conservar], ordenados_actuales[conservar]
+        nulas = orden_actual[n_validos:]
+        nulas = nulas[~cambiadas[nulas]]
+
+        con_valor = ~np.isnan(valores)
+        insertar = np.argsort(valores[con_valor], kind='stable')
+        filas_nuevas, valores_nuevos = filas[con_valor][insertar], valores[con_valor][insertar]
+        puntos = np.searchsorted(ordenados, valores_nuevos, side='right')
+
+        orden = np.insert(orden, puntos, filas_nuevas)
+        ordenados = np.insert(ordenados, puntos, valores_nuevos)
+        return np.concatenate([orden, nulas, filas[~con_valor]]), ordenados
+
+    def filtrar(self, igualdades=None, edad_minima=None):
+        """
+        Calcula las filas que cumplen todos los filtros
+
+        Args:
+            igualdades (dict, opcional): {columna: valor} para columnas indexadas u ordenadas
+            edad_minima (int, opcional): Edad mínima (inclusive)
+
+        Returns:
+            numpy.ndarray o None: Posiciones de fila ordenadas, o None si no
+            hay filtros activos (todas las filas)
+        """
+        bits = None
+        # Filas (sin ordenar) de cada filtro resuelto con una permutación ordenada
+        conjuntos = []
+        for col, valor in (igualdades or {}).items():
+            if col in self.ordenes:
+                orden, ordenados = self.ordenes[col]
+                try:
+                    valor = float(valor)
+                except (TypeError, ValueError):
+                    return np.empty(0, dtype=np.int64)
+                inicio = int(np.searchsorted(ordenados, valor, side='left'))
+                fin = int(np.searchsorted(ordenados, valor, side='right'))
+                conjuntos.append(orden[inicio:fin])
+                continue
+            mapa = self.mapas_bits[col].get(str(valor))
+            if mapa is None:
+                return np.empty(0, dtype=np.int64)
+            bits = mapa if bits is None else (bits & mapa)
+
+        if edad_minima is not None and self.orden_edad is not None:
+            inicio = int(np.searchsorted(self.edades_ordenadas, edad_minima, side='left'))
+            filas_edad = self.orden_edad[inicio:self.n_edades_validas]
+            if len(filas_edad) < self.n_filas:
+                conjuntos.append(filas_edad)
+
+        if not conjuntos:
+            if bits is None:
+                return None
+            return np.flatnonzero(np.unpackbits(bits, count=self.n_filas))
+
+        # Se parte del conjunto más pequeño (p. ej. un municipio) y los demás
+        # filtros solo se evalúan en sus filas
+        conjuntos.sort(key=len)
+        filas = np.sort(conjuntos[0])
+        for conjunto in conjuntos[1:]:
+            mascara = np.zeros(self.n_filas, dtype=bool)
+            mascara[conjunto] = True
+            filas = filas[mascara[filas]]
+        if bits is not None:
+            desplazamiento = (7 - (filas & 7)).astype(np.uint8)
+            filas = filas[(bits[filas >> 3] >> desplazamiento) & 1 == 1]
+        return filas
+
+
+def _numeros(serie):
+    """Valores numéricos de una columna como float64 (NaN: nulo o no numérico)"""
+    return pd.to_numeric(serie, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
@@ -0,0 +1,344 @@
+"""
+Modo de análisis fuera de memoria, para datasets más grandes que la RAM.
+
+El CSV se convierte una sola vez en un directorio de bloques Feather sin
+comprimir (que se leen con memory map) y un archivo 'dataset.json' con los
+metadatos. El tamaño de los bloques se calcula a partir de un presupuesto
+de memoria: filtros, distribuciones, tasas y el cubo de conteos se
+calculan bloque a bloque combinando los resultados parciales, y la tabla
+lee de disco solo las filas que muestra.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from analizador_epidemiologico import agrupar_en_rangos
+from carga_datos import OperacionCancelada, _clave_cache, procesar_dataframe, tipos_lectura
+from cubo_datos import CuboDatos, DIMENSIONES_CUBO, es_fallecido
+
+# pyarrow es obligatorio en este modo (los bloques son Feather)
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+# Presupuesto de memoria predeterminado del modo fuera de memoria
+PRESUPUESTO_PREDETERMINADO = 256 * 1024 * 1024
+
+# Un bloque en memoria ocupa varias veces su tamaño mientras se procesa
+# (lectura, conversiones, máscaras): se reserva este factor del presupuesto
+FACTOR_TRABAJO = 4
+
+# Filas leídas para estimar los bytes por fila antes de convertir
+FILAS_MUESTRA = 2000
+
+
+def directorio_bloques(ruta_csv):
+    """Directorio donde se guardan los bloques de un CSV"""
+    return ruta_csv + '.bloques'
+
+
+def filas_por_bloque(bytes_por_fila, presupuesto_bytes):
+    """Filas por bloque para que procesar un bloque quepa en el presupuesto"""
+    return max(1000, int(presupuesto_bytes // (FACTOR_TRABAJO * max(bytes_por_fila, 1))))
+
+
+def _estimar_bytes_por_fila(ruta_csv):
+    """Bytes en memoria por fila procesada, medidos sobre las primeras filas del CSV"""
+    muestra = procesar_dataframe(pd.read_csv(ruta_csv, dtype=tipos_lectura(), nrows=FILAS_MUESTRA))
+    if len(muestra) == 0:
+        return 1
+    return muestra.memory_usage(deep=True).sum() / len(muestra)
+
+
+def convertir_csv(ruta_csv, directorio=None, presupuesto_bytes=PRESUPUESTO_PREDETERMINADO,
+                  progreso=None, cancelar=None):
+    """
+    Convierte un CSV en bloques Feather leyéndolo bloque a bloque
+
+    Args:
+        ruta_csv (str): Ruta al archivo CSV
+        directorio (str, opcional): Directorio de salida (por defecto, junto al CSV)
+        presupuesto_bytes (int): Memoria máxima a usar al procesar un bloque
+        progreso (callable, opcional): Recibe (filas_leidas, bytes_leidos, bytes_totales)
+        cancelar (callable, opcional): Devuelve True si hay que abortar la conversión
+
+    Returns:
+        str: Directorio con los bloques
+
+    Raises:
+        OperacionCancelada: Si cancelar() devuelve True entre bloques
+    """
+    if feather is None:
+        raise ValueError("El modo fuera de memoria requiere pyarrow, que no está instalado")
+
+    directorio = directorio or directorio_bloques(ruta_csv)
+    os.makedirs(directorio, exist_ok=True)
+    filas_bloque = filas_por_bloque(_estimar_bytes_por_fila(ruta_csv), presupuesto_bytes)
+    bytes_totales = os.path.getsize(ruta_csv)
+
+    bloques = []
+    categorias = {}
+    rangos = {}
+    filas = 0
+    try:
+        with open(ruta_csv, 'rb') as f:
+            for i, bloque in enumerate(pd.read_csv(f, dtype=tipos_lectura(), chunksize=filas_bloque)):
+                if cancelar is not None and cancelar():
+                    raise OperacionCancelada()
+                bloque = procesar_dataframe(bloque).reset_index(drop=True)
+                bloque.attrs = {}
+
+                # Categorías y rangos de todo el dataset, acumulados por bloque
+                for col in bloque.columns:
+                    serie = bloque[col]
+                    if isinstance(serie.dtype, pd.CategoricalDtype):
+                        categorias.setdefault(col, set()).update(serie.cat.categories.astype(str))
+                    elif pd.api.types.is_numeric_dtype(serie) and serie.notna().any():
+                        minimo, maximo = float(serie.min()), float(serie.max())
+                        anterior = rangos.get(col, (minimo, maximo))
+                        rangos[col] = (min(anterior[0], minimo), max(anterior[1], maximo))
+
+                archivo = f'bloque_{i:05d}.feather'
+                feather.write_feather(bloque, os.path.join(directorio, archivo), compression='uncompressed')
+                bloques.append({'archivo': archivo, 'inicio': filas, 'filas': len(bloque)})
+                filas += len(bloque)
+                if progreso is not None:
+                    progreso(filas, f.tell(), bytes_totales)
+    except BaseException:
+        # No dejar un dataset a medias que parezca válido
+        ruta_meta = os.path.join(directorio, 'dataset.json')
+        if os.path.exists(ruta_meta):
+            os.remove(ruta_meta)
+        raise
+
+    metadatos = {
+        'clave': _clave_cache(ruta_csv, con_hash=False),
+        'n_filas': filas,
+        'filas_por_bloque': filas_bloque,
+        'bloques': bloques,
+        'categorias': {col: sorted(valores) for col, valores in categorias.items()},
+        'rangos': rangos,
+    }
+    with open(os.path.join(directorio, 'dataset.json.tmp'), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, ensure_ascii=False)
+    os.replace(os.path.join(directorio, 'dataset.json.tmp'), os.path.join(directorio, 'dataset.json'))
+    return directorio
+
+
+def abrir_csv_en_disco(ruta_csv, presupuesto_bytes=PRESUPUESTO_PREDETERMINADO, progreso=None, cancelar=None):
+    """
+    Abre un CSV en modo fuera de memoria, reutilizando sus bloques si siguen
+    correspondiendo al archivo (misma ruta, tamaño y fecha de modificación)
+
+    Returns:
+        DatasetEnDisco: Dataset con su cubo de conteos ya construido
+    """
+    directorio = directorio_bloques(ruta_csv)
+    ruta_meta = os.path.join(directorio, 'dataset.json')
+    valido = False
+    if os.path.exists(ruta_meta):
+        with open(ruta_meta, 'r', encoding='utf-8') as f:
+            valido = json.load(f).get('clave') == _clave_cache(ruta_csv, con_hash=False)
+    if not valido:
+        convertir_csv(ruta_csv, directorio, presupuesto_bytes, progreso, cancelar)
+
+    dataset = DatasetEnDisco(directorio, presupuesto_bytes)
+    dataset.cubo()
+    return dataset
+
+
+class DatasetEnDisco:
+    """
+    Dataset guardado en bloques Feather que se leen con memory map.
+
+    Ofrece las operaciones de la ventana principal sin cargar el dataset:
+    filtrar() con la interfaz de MotorFiltros, cubo() y los cálculos de
+    AnalizadorEpidemiologico que usa la aplicación
+    (calcular_distribucion_por_grupo, calcular_tasa_mortalidad,
+    calcular_fallecidos), todos calculados bloque a bloque. En memoria solo
+    hay un bloque a la vez, de las columnas que necesita cada operación.
+    """
+
+    def __init__(self, directorio, presupuesto_bytes=PRESUPUESTO_PREDETERMINADO):
+        """
+        Args:
+            directorio (str): Directorio creado por convertir_csv
+            presupuesto_bytes (int): Memoria máxima de trabajo (se usa para
+                limitar las filas leídas de una vez al paginar)
+        """
+        with open(os.path.join(directorio, 'dataset.json'), 'r', encoding='utf-8') as f:
+            metadatos = json.load(f)
+        self.directorio = directorio
+        self.presupuesto_bytes = presupuesto_bytes
+        self.n_filas = metadatos['n_filas']
+        self.filas_por_bloque = metadatos['filas_por_bloque']
+        self.bloques = metadatos['bloques']
+        self.categorias = {col: pd.Index(valores) for col, valores in metadatos['categorias'].items()}
+        self.rangos = {col: tuple(rango) for col, rango in metadatos['rangos'].items()}
+        self.inicios = np.array([bloque['inicio'] for bloque in self.bloques], dtype=np.int64)
+        self._cubo = None
+
+        # DataFrame sin filas con las columnas y tipos del dataset
+        self.vacio = self._leer(0).iloc[:0]
+
+    def __len__(self):
+        return self.n_filas
+
+    @property
+    def columnas(self):
+        return self.vacio.columns
+
+    def _tabla(self, i, columnas=None):
+        """Tabla de Arrow de un bloque, con memory map (no se lee hasta usarla)"""
+        return feather.read_table(os.path.join(self.directorio, self.bloques[i]['archivo']),
+                                  columns=columnas, memory_map=True)
+
+    def _a_pandas(self, tabla):
+        """Convierte una tabla de un bloque unificando las categorías de todo el dataset"""
+        df = tabla.to_pandas()
+        for col in df.columns:
+            if col in self.categorias and isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].cat.set_categories(self.categorias[col])
+        return df
+
+    def _leer(self, i, columnas=None):
+        """Lee un bloque (solo las columnas pedidas)"""
+        return self._a_pandas(self._tabla(i, columnas))
+
+    def recorrer(self, columnas=None, cancelar=None):
+        """
+        Recorre el dataset bloque a bloque
+
+        Yields:
+            tuple: (posición de la primera fila del bloque, DataFrame del bloque)
+        """
+        for i, bloque in enumerate(self.bloques):
+            if cancelar is not None and cancelar():
+                raise OperacionCancelada()
+            yield bloque['inicio'], self._leer(i, columnas)
+
+    def leer_filas(self, posiciones, columnas=None):
+        """
+        Lee de disco algunas filas (p. ej. una página de la tabla)
+
+        Args:
+            posiciones (numpy.ndarray): Posiciones de fila en el dataset
+            columnas (list, opcional): Columnas a leer (por defecto, todas)
+
+        Returns:
+            pandas.DataFrame: Filas en el orden de 'posiciones'
+        """
+        posiciones = np.asarray(posiciones, dtype=np.int64)
+        if len(posiciones) == 0:
+            return self.vacio if columnas is None else self.vacio[columnas]
+        numeros = np.searchsorted(self.inicios, posiciones, side='right') - 1
+        partes = []
+        orden = []
+        for i in np.unique(numeros):
+            en_bloque = np.flatnonzero(numeros == i)
+            locales = posiciones[en_bloque] - self.inicios[i]
+            # take sobre la tabla mapeada solo toca las páginas de esas filas
+            partes.append(self._a_pandas(self._tabla(i, columnas).take(pa.array(locales))))
+            orden.append(en_bloque)
+        df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+        # Restaurar el orden pedido
+        return df.iloc[np.argsort(np.concatenate(orden), kind='stable')].reset_index(drop=True)
+
+    def valores_unicos(self, columna):
+        """Valores distintos de una columna categórica, ordenados"""
+        return list(self.categorias.get(columna, []))
+
+    def rango(self, columna):
+        """(mínimo, máximo) de una columna numérica, o None si no tiene valores"""
+        return self.rangos.get(columna)
+
+    def filtrar(self, igualdades=None, edad_minima=None):
+        """
+        Calcula las filas que cumplen los filtros (misma interfaz que
+        MotorFiltros.filtrar), leyendo solo las columnas filtradas
+
+        Returns:
+            numpy.ndarray o None: Posiciones de fila ordenadas, o None si no
+            hay filtros activos (todas las filas)
+        """
+        igualdades = igualdades or {}
+        columnas = list(igualdades)
+        if edad_minima is not None and 'Edad' in self.columnas:
+            columnas.append('Edad')
+        if not columnas:
+            return None
+
+        resultado = []
+        for inicio, bloque in self.recorrer(columnas):
+            mascara = np.ones(len(bloque), dtype=bool)
+            for col, valor in igualdades.items():
+                mascara &= (bloque[col].astype(str) == str(valor)).to_numpy(dtype=bool)
+            if 'Edad' in bloque.columns:
+                edades = pd.to_numeric(bloque['Edad'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+                mascara &= edades >= edad_minima
+            resultado.append(np.flatnonzero(mascara) + inicio)
+        return np.concatenate(resultado) if resultado else np.empty(0, dtype=np.int64)
+
+    def cubo(self):
+        """Cubo de conteos, construido bloque a bloque la primera vez"""
+        if self._cubo is None:
+            dimensiones = [dim for dim in DIMENSIONES_CUBO if dim in self.columnas]
+            self._cubo = CuboDatos.por_bloques((bloque for _, bloque in self.recorrer(dimensiones)), dimensiones)
+        return self._cubo
+
+    def _conteos(self, columna, solo_fallecidos=False):
+        """value_counts de una columna sumando los conteos parciales de cada bloque"""
+        columnas = [columna] if not solo_fallecidos or columna == 'Estado' else [columna, 'Estado']
+        total = None
+        for _, bloque in self.recorrer(columnas):
+            serie = bloque[columna]
+            if solo_fallecidos:
+                # Las categorías de 'Estado' son las mismas en todos los bloques
+                estado = bloque['Estado'].cat
+                serie = serie[np.append(es_fallecido(estado.categories), False)[estado.codes.to_numpy()]]
+            parcial = serie.value_counts()
+            total = parcial if total is None else total.add(parcial, fill_value=0)
+        if total is None:
+            return pd.Series(dtype=np.int64)
+        return total.astype(np.int64)
+
+    def calcular_fallecidos(self):
+        """Cantidad total de fallecidos"""
+        if 'Estado' not in self.columnas:
+            return 0
+        return int(self.cubo().contar(solo_fallecidos=True)) if self.cubo().tiene('Estado') else 0
+
+    def calcular_distribucion_por_grupo(self, columna_grupo='Edad', bins=None):
+        """Distribución de casos por grupo (ver AnalizadorEpidemiologico), por bloques"""
+        if columna_grupo not in self.columnas:
+            raise ValueError(f"La columna {columna_grupo} no existe en el DataFrame")
+        conteos = self._conteos(columna_grupo)
+        if bins is not None and pd.api.types.is_numeric_dtype(self.vacio[columna_grupo]):
+            return agrupar_en_rangos(conteos, bins, columna_grupo)
+        conteos = conteos[conteos > 0]
+        return conteos.sort_values(ascending=False, kind='stable')
+
+    def calcular_tasa_mortalidad(self, por_grupo=None, bins=None):
+        """Tasa de mortalidad general o por grupo (ver AnalizadorEpidemiologico), por bloques"""
+        if 'Estado' not in self.columnas:
+            raise ValueError("No hay columna 'Estado' para identificar muertes")
+        if por_grupo is None:
+            return (self.calcular_fallecidos() / self.n_filas) * 100
+        if por_grupo not in self.columnas:
+            raise ValueError(f"La columna {por_grupo} no existe en el DataFrame")
+
+        casos_por_grupo = self._conteos(por_grupo)
+        muertes_por_grupo = self._conteos(por_grupo, solo_fallecidos=True).reindex(casos_por_grupo.index, fill_value=0)
+        if bins is not None and pd.api.types.is_numeric_dtype(self.vacio[por_grupo]):
+            casos_por_grupo = agrupar_en_rangos(casos_por_grupo, bins, por_grupo)
+            muertes_por_grupo = agrupar_en_rangos(muertes_por_grupo, bins, por_grupo)
+        else:
+            # Mismo orden que el analizador: por etiqueta
+            casos_por_grupo = casos_por_grupo[casos_por_grupo > 0].sort_index()
+            muertes_por_grupo = muertes_por_grupo.reindex(casos_por_grupo.index)
+        return (muertes_por_grupo / casos_por_grupo) * 100
@@ -0,0 +1,177 @@
+"""
+Geografía codificada con los códigos divipola.
+
+Los departamentos y municipios se agrupan por sus códigos divipola enteros
+en vez de por sus nombres: cada nivel guarda los códigos distintos
+ordenados, sus nombres, una tabla código -> posición (un arreglo indexado
+por el código) y la posición de cada fila. Contar por departamento o por
+municipio es entonces un np.bincount sobre las posiciones, con el mismo
+costo para los ~1.100 municipios que para los 33 departamentos.
+
+Los nombres de municipio tienen además un índice ordenado (sin tildes ni
+mayúsculas) para buscar por prefijo con searchsorted.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Columnas (código, nombre) de cada nivel
+COLUMNAS_DEPARTAMENTO = ('Código divipola departamento', 'Nombre departamento')
+COLUMNAS_MUNICIPIO = ('Código divipola municipio', 'Nombre municipio')
+
+# Los códigos de municipio son el del departamento seguido de tres dígitos
+FACTOR_MUNICIPIO = 1000
+
+
+def normalizar_nombre(texto):
+    """Clave de búsqueda de un nombre: sin tildes, en mayúsculas y sin espacios sobrantes"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.upper().split())
+
+
+class NivelGeografico:
+    """
+    Códigos divipola de un nivel (departamento o municipio) con sus nombres
+    y la posición de cada fila del dataset
+    """
+
+    def __init__(self, codigos_filas, nombres_filas):
+        """
+        Args:
+            codigos_filas (pandas.Series): Código divipola de cada fila
+            nombres_filas (pandas.Series): Nombre de cada fila (se toma el de la
+                primera fila de cada código)
+        """
+        codigos = pd.to_numeric(codigos_filas, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        validos = ~np.isnan(codigos) & (codigos >= 0)
+        codigos_validos = codigos[validos].astype(np.int64)
+
+        self.codigos, primeras = np.unique(codigos_validos, return_index=True)
+        nombres = nombres_filas.to_numpy(dtype=object)[np.flatnonzero(validos)[primeras]]
+        self.nombres = np.array([str(codigo) if pd.isna(nombre) else str(nombre)
+                                 for codigo, nombre in zip(self.codigos, nombres)], dtype=object)
+
+        # Tabla código -> posición (-1: código ausente)
+        self.posicion_codigo = np.full(int(self.codigos.max()) + 1 if len(self.codigos) else 0, -1, dtype=np.int32)
+        self.posicion_codigo[self.codigos] = np.arange(len(self.codigos), dtype=np.int32)
+
+        # Posición de cada fila (-1: sin código)
+        self.posiciones = np.full(len(codigos), -1, dtype=np.int32)
+        self.posiciones[validos] = self.posicion_codigo[codigos_validos]
+
+        # Índice de nombres ordenado para la búsqueda por prefijo
+        claves = np.array([normalizar_nombre(nombre) for nombre in self.nombres], dtype=str)
+        self.orden_nombres = np.argsort(claves, kind='stable')
+        self.claves_ordenadas = claves[self.orden_nombres]
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def posicion(self, codigo):
+        """Posición de un código divipola, o -1 si no está en los datos"""
+        codigo = int(codigo)
+        return int(self.posicion_codigo[codigo]) if 0 <= codigo < len(self.posicion_codigo) else -1
+
+    def nombre(self, codigo):
+        """Nombre de un código divipola, o None si no está en los datos"""
+        posicion = self.posicion(codigo)
+        return self.nombres[posicion] if posicion >= 0 else None
+
+    def contar(self, filas=None, mascara=None):
+        """
+        Casos por código en una pasada de bincount
+
+        Args:
+            filas (numpy.ndarray, opcional): Posiciones de las filas a contar (None: todas)
+            mascara (numpy.ndarray, opcional): Máscara booleana de filas a contar
+
+        Returns:
+            numpy.ndarray: Conteo por posición (alineado con self.codigos)
+        """
+        posiciones = self.posiciones
+        if filas is not None:
+            posiciones = posiciones[filas]
+        if mascara is not None:
+            posiciones = posiciones[mascara if filas is None else np.asarray(mascara)[filas]]
+        # Las filas sin código (-1) van a una posición extra que se descarta
+        return np.bincount(posiciones + 1, minlength=len(self.codigos) + 1)[1:]
+
+    def serie(self, conteos, por_nombre=True, nombre_indice=None):
+        """
+        Conteos por posición como Series indexada por nombre (sumando los
+        códigos que compartan nombre) o por código
+
+        Returns:
+            pandas.Series: Conteos ordenados por nombre o por código
+        """
+        if not por_nombre:
+            return pd.Series(conteos, index=pd.Index(self.codigos, name=nombre_indice), name='count')
+        serie = pd.Series(conteos, index=pd.Index(self.nombres, name=nombre_indice), name='count')
+        return serie.groupby(level=0, sort=True).sum()
+
+    def buscar_prefijo(self, prefijo, limite=None):
+        """
+        Posiciones cuyo nombre empieza por un prefijo (sin distinguir tildes
+        ni mayúsculas), en orden alfabético
+
+        Args:
+            prefijo (str): Texto buscado
+            limite (int, opcional): Máximo de resultados
+
+        Returns:
+            numpy.ndarray: Posiciones de los códigos encontrados
+        """
+        clave = normalizar_nombre(prefijo)
+        inicio = int(np.searchsorted(self.claves_ordenadas, clave, side='left'))
+        fin = int(np.searchsorted(self.claves_ordenadas, clave + '\U0010ffff', side='left'))
+        if limite is not None:
+            fin = min(fin, inicio + limite)
+        return self.orden_nombres[inicio:fin]
+
+
+class Geografia:
+    """Niveles de departamento y municipio de un dataset"""
+
+    def __init__(self, df):
+        """
+        Args:
+            df (pandas.DataFrame): Casos con las columnas de COLUMNAS_DEPARTAMENTO
+                y/o COLUMNAS_MUNICIPIO (los niveles sin columnas quedan en None)
+        """
+        self.departamentos = None
+        self.municipios = None
+        self._etiquetas = None
+        if all(columna in df.columns for columna in COLUMNAS_DEPARTAMENTO):
+            self.departamentos = NivelGeografico(df[COLUMNAS_DEPARTAMENTO[0]], df[COLUMNAS_DEPARTAMENTO[1]])
+        if all(columna in df.columns for columna in COLUMNAS_MUNICIPIO):
+            self.municipios = NivelGeografico(df[COLUMNAS_MUNICIPIO[0]], df[COLUMNAS_MUNICIPIO[1]])
+
+    def etiquetas_municipios(self):
+        """
+        Etiquetas de los municipios, alineadas con municipios.codigos: el
+        nombre con su departamento, p. ej. 'LA UNIÓN (NARIÑO)', y el código
+        si aun así se repite
+        """
+        if self._etiquetas is None:
+            etiquetas = []
+            for codigo, nombre in zip(self.municipios.codigos, self.municipios.nombres):
+                departamento = self.departamentos.nombre(codigo // FACTOR_MUNICIPIO) if self.departamentos else None
+                etiquetas.append(f"{nombre} ({departamento})" if departamento else f"{nombre} ({codigo:05d})")
+            repetidas = pd.Series(etiquetas).duplicated(keep=False).to_numpy()
+            self._etiquetas = [f"{etiqueta[:-1]}, {codigo:05d})" if repetida else etiqueta
+                               for etiqueta, codigo, repetida in zip(etiquetas, self.municipios.codigos, repetidas)]
+        return self._etiquetas
+
+    def buscar_municipios(self, prefijo, limite=50):
+        """
+        Municipios cuyo nombre empieza por un prefijo
+
+        Returns:
+            list: (etiqueta, código divipola) en orden alfabético
+        """
+        if self.municipios is None:
+            return []
+        etiquetas = self.etiquetas_municipios()
+        return [(etiquetas[posicion], int(self.municipios.codigos[posicion]))
+                for posicion in self.municipios.buscar_prefijo(prefijo, limite)]
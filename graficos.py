@@ -0,0 +1,307 @@
+import numpy as np
+from matplotlib.colors import to_rgba
+
+# Títulos de la incidencia según el período
+TITULOS_PERIODO = {'D': 'Diaria', 'W': 'Semanal', 'M': 'Mensual', 'Y': 'Anual'}
+
+# Estilo de los gráficos de fallecidos
+ESTILO_TITULO_FALLECIDOS = {'fontsize': 18, 'weight': 'bold'}
+ESTILO_EJES_FALLECIDOS = {'fontsize': 14}
+
+
+def _clave_estilo(estilo):
+    """Convierte un diccionario de estilo en un valor comparable"""
+    return tuple(sorted((estilo or {}).items()))
+
+
+class Grafico:
+    """
+    Gráfico de un canvas que conserva sus axes y artistas entre redibujos.
+
+    Cuando solo cambian los datos (misma cantidad de barras, misma línea)
+    se actualizan en el lugar las alturas, los datos de las líneas, los
+    textos y las etiquetas de los ejes, y el canvas se redibuja con
+    draw_idle (Qt agrupa varios pedidos seguidos en un solo dibujo). La
+    figura solo se limpia y se ajusta con tight_layout cuando cambia la
+    estructura del gráfico.
+
+    Con en_axes dibuja en un axes ya existente (p. ej. el que recibe un
+    método graficar_ del analizador): solo limpia ese axes y deja el
+    diseño de la figura a quien la creó.
+    """
+
+    def __init__(self, figure, canvas):
+        """
+        Args:
+            figure (matplotlib.figure.Figure): Figura del canvas
+            canvas (FigureCanvasQTAgg): Canvas donde se muestra la figura
+        """
+        self.figure = figure
+        self.canvas = canvas
+        self.ax = None
+        self.axes_propio = False
+        self.estructura = None
+        self.artistas = {}
+
+    @classmethod
+    def en_axes(cls, ax):
+        """
+        Gráfico que dibuja en un axes existente
+
+        Args:
+            ax (matplotlib.axes.Axes): Axes donde dibujar
+        """
+        grafico = cls(ax.figure, ax.figure.canvas)
+        grafico.ax = ax
+        grafico.axes_propio = True
+        return grafico
+
+    def _ajustar(self):
+        """Ajusta el diseño de la figura, salvo si es de quien pasó el axes"""
+        if not self.axes_propio:
+            self.figure.tight_layout()
+
+    def _preparar(self, estructura):
+        """
+        Prepara los axes para una estructura de gráfico
+
+        Returns:
+            bool: True si los axes se crearon de nuevo y hay que crear los artistas
+        """
+        if self.ax is not None and self.estructura is not None and self.estructura == estructura:
+            return False
+        if self.axes_propio:
+            self.ax.clear()
+        else:
+            self.figure.clear()
+            self.ax = self.figure.add_subplot(111)
+        self.estructura = estructura
+        self.artistas = {}
+        return True
+
+    def _terminar(self, nuevo, titulo, xlabel, ylabel, estilo_titulo=None, estilo_ejes=None):
+        """Actualiza títulos, reajusta la escala y pide el redibujo"""
+        self.ax.set_title(titulo, **(estilo_titulo or {}))
+        self.ax.set_xlabel(xlabel, **(estilo_ejes or {}))
+        self.ax.set_ylabel(ylabel, **(estilo_ejes or {}))
+        self.ax.relim()
+        self.ax.autoscale_view()
+        if nuevo:
+            self._ajustar()
+        self.canvas.draw_idle()
+
+    def barras(self, etiquetas, valores, titulo='', xlabel='', ylabel='', color=None,
+               rotacion=90, alineacion='center', textos=None, desplazamiento_texto=0.5,
+               estilo_titulo=None, estilo_ejes=None):
+        """
+        Dibuja o actualiza un gráfico de barras
+
+        Args:
+            etiquetas (iterable): Etiqueta de cada barra
+            valores (iterable): Altura de cada barra
+            titulo, xlabel, ylabel (str): Textos del gráfico
+            color (str, opcional): Color de las barras
+            rotacion (int): Rotación de las etiquetas del eje x
+            alineacion (str): Alineación horizontal de las etiquetas del eje x
+            textos (list, opcional): Texto a mostrar sobre cada barra
+            desplazamiento_texto (float): Distancia vertical de los textos a la barra
+            estilo_titulo, estilo_ejes (dict, opcional): Propiedades de los textos
+        """
+        etiquetas = [str(etiqueta) for etiqueta in etiquetas]
+        valores = np.asarray(valores, dtype=float)
+        nuevo = self._preparar(('barras', len(valores), color, rotacion, alineacion, textos is not None,
+                                _clave_estilo(estilo_titulo), _clave_estilo(estilo_ejes)))
+
+        posiciones = np.arange(len(valores))
+        if nuevo:
+            self.artistas['barras'] = self.ax.bar(posiciones, valores, width=0.5, color=color)
+            self.artistas['textos'] = [self.ax.text(i, 0, '', ha='center') for i in posiciones] if textos else []
+            self.ax.set_xticks(posiciones)
+        else:
+            for barra, valor in zip(self.artistas['barras'], valores):
+                barra.set_height(valor)
+        self.ax.set_xticklabels(etiquetas, rotation=rotacion, ha=alineacion)
+
+        for i, (artista, texto) in enumerate(zip(self.artistas['textos'], textos or [])):
+            artista.set_position((i, valores[i] + desplazamiento_texto))
+            artista.set_text(texto)
+
+        self._terminar(nuevo, titulo, xlabel, ylabel, estilo_titulo, estilo_ejes)
+
+    def lineas(self, x, y, titulo='', xlabel='', ylabel='', marcador='o', cuadricula=False):
+        """
+        Dibuja o actualiza un gráfico de una línea
+
+        Args:
+            x, y (array-like): Datos de la línea (x puede ser de fechas)
+            titulo, xlabel, ylabel (str): Textos del gráfico
+            marcador (str): Marcador de los puntos
+            cuadricula (bool): Mostrar cuadrícula
+        """
+        nuevo = self._preparar(('lineas', marcador, cuadricula))
+        if nuevo:
+            self.artistas['linea'], = self.ax.plot(x, y, marker=marcador)
+            if cuadricula:
+                self.ax.grid(True, linestyle='--', alpha=0.7)
+        else:
+            self.artistas['linea'].set_data(x, y)
+        self._terminar(nuevo, titulo, xlabel, ylabel)
+
+    def histograma(self, bordes, conteos, x_curva, y_curva, titulo='', xlabel='', ylabel='',
+                   color='skyblue', estilo_titulo=None, estilo_ejes=None):
+        """
+        Dibuja o actualiza un histograma con su curva de densidad
+
+        Args:
+            bordes (numpy.ndarray): Bordes de las barras
+            conteos (numpy.ndarray): Altura de cada barra
+            x_curva, y_curva (numpy.ndarray): Puntos de la curva de densidad
+            titulo, xlabel, ylabel (str): Textos del gráfico
+            color (str): Color de las barras y la curva
+            estilo_titulo, estilo_ejes (dict, opcional): Propiedades de los textos
+        """
+        nuevo = self._preparar(('histograma', len(conteos), color,
+                                _clave_estilo(estilo_titulo), _clave_estilo(estilo_ejes)))
+        anchos = np.diff(bordes)
+        if nuevo:
+            self.artistas['barras'] = self.ax.bar(bordes[:-1], conteos, width=anchos, align='edge',
+                                                  color=to_rgba(color, 0.5), edgecolor='black')
+            self.artistas['linea'], = self.ax.plot(x_curva, y_curva, color=color)
+        else:
+            for barra, inicio, ancho, conteo in zip(self.artistas['barras'], bordes[:-1], anchos, conteos):
+                barra.set_x(inicio)
+                barra.set_width(ancho)
+                barra.set_height(conteo)
+            self.artistas['linea'].set_data(x_curva, y_curva)
+        self._terminar(nuevo, titulo, xlabel, ylabel, estilo_titulo, estilo_ejes)
+
+    def texto(self, texto, titulo='', ejes=True, estilo_texto=None, estilo_titulo=None):
+        """
+        Muestra un texto centrado en los axes
+
+        Args:
+            texto (str): Texto a mostrar
+            titulo (str): Título del gráfico
+            ejes (bool): Mostrar los ejes
+            estilo_texto, estilo_titulo (dict, opcional): Propiedades de los textos
+        """
+        nuevo = self._preparar(('texto', ejes, _clave_estilo(estilo_texto), _clave_estilo(estilo_titulo)))
+        if nuevo:
+            self.artistas['texto'] = self.ax.text(0.5, 0.5, '', ha='center', va='center',
+                                                  transform=self.ax.transAxes, **(estilo_texto or {}))
+            if not ejes:
+                self.ax.axis('off')
+        self.artistas['texto'].set_text(texto)
+        self.ax.set_title(titulo, **(estilo_titulo or {}))
+        if nuevo:
+            self._ajustar()
+        self.canvas.draw_idle()
+
+    def personalizado(self, dibujar):
+        """
+        Redibuja la figura completa con una función que recibe los axes, para
+        gráficos sin actualización en el lugar (p. ej. de pastel)
+        """
+        self._preparar(None)
+        dibujar(self.ax)
+        self._ajustar()
+        self.canvas.draw_idle()
+
+
+def dibujar_incidencia(grafico, incidencia, periodo):
+    """Dibuja la incidencia por período (ver AnalizadorEpidemiologico.graficar_incidencia)"""
+    grafico.lineas(incidencia.index, incidencia.to_numpy(dtype=float),
+                   titulo=f'Incidencia {TITULOS_PERIODO.get(periodo, "")} de Casos',
+                   xlabel='Fecha', ylabel='Número de Casos', cuadricula=True)
+
+
+def dibujar_distribucion(grafico, distribucion, columna_grupo):
+    """Dibuja en barras la distribución de casos por grupo"""
+    grafico.barras(distribucion.index, distribucion.to_numpy(dtype=float),
+                   titulo=f'Distribución de Casos por {columna_grupo.capitalize()}',
+                   xlabel=columna_grupo.capitalize(), ylabel='Número de Casos')
+
+
+def dibujar_distribucion_pastel(grafico, distribucion, columna_grupo):
+    """Dibuja en un gráfico de pastel la distribución de casos por grupo (se redibuja completo)"""
+    def dibujar(ax):
+        distribucion.plot(kind='pie', autopct='%1.1f%%', ax=ax)
+        ax.set_ylabel('')
+        ax.set_title(f'Distribución de Casos por {columna_grupo.capitalize()}')
+    grafico.personalizado(dibujar)
+
+
+def dibujar_tasa_mortalidad(grafico, tasa_mortalidad, por_grupo):
+    """Dibuja la tasa de mortalidad general o por grupo con su valor sobre cada barra"""
+    if por_grupo is None:
+        etiquetas, valores = ['Total'], [tasa_mortalidad]
+        titulo, xlabel, rotacion = 'Tasa de Mortalidad General', '', 0
+    else:
+        etiquetas, valores = tasa_mortalidad.index, tasa_mortalidad.to_numpy(dtype=float)
+        titulo, xlabel, rotacion = f'Tasa de Mortalidad por {por_grupo.capitalize()}', por_grupo.capitalize(), 90
+    grafico.barras(etiquetas, valores, titulo=titulo, xlabel=xlabel, ylabel='Tasa de Mortalidad (%)',
+                   rotacion=rotacion, textos=[f'{v:.2f}%' for v in valores])
+
+
+def dibujar_total_fallecidos(grafico, cantidad):
+    """Muestra la cantidad total de fallecidos"""
+    grafico.texto(f'{cantidad:,}\nFallecidos', titulo='Cantidad de personas fallecidas', ejes=False,
+                  estilo_texto={'fontsize': 32, 'weight': 'bold', 'color': 'darkred'},
+                  estilo_titulo={'fontsize': 16, 'weight': 'bold', 'pad': 20})
+
+
+def dibujar_fallecidos_por_grupo(grafico, conteo, titulo, xlabel):
+    """Dibuja en barras los fallecidos por departamento o por tipo de contagio"""
+    grafico.barras(conteo.index, conteo.to_numpy(dtype=float), titulo=titulo, xlabel=xlabel,
+                   ylabel='Cantidad', color='skyblue', rotacion=45, alineacion='right',
+                   estilo_titulo=ESTILO_TITULO_FALLECIDOS, estilo_ejes=ESTILO_EJES_FALLECIDOS)
+
+
+def dibujar_fallecidos_por_departamento(grafico, conteo):
+    dibujar_fallecidos_por_grupo(grafico, conteo, 'Fallecidos por departamento', 'Departamento')
+
+
+def dibujar_fallecidos_por_contagio(grafico, conteo):
+    dibujar_fallecidos_por_grupo(grafico, conteo, 'Fallecidos por Tipo de contagio', 'Tipo de contagio')
+
+
+def dibujar_fallecidos_por_municipio(grafico, conteo):
+    dibujar_fallecidos_por_grupo(grafico, conteo, f'Fallecidos por municipio ({len(conteo)} con más fallecidos)',
+                                 'Municipio')
+
+
+def dibujar_histograma_edades(grafico, histograma):
+    """Dibuja el histograma de edades de los fallecidos con su curva de densidad"""
+    grafico.histograma(histograma['bordes'], histograma['conteos'], histograma['x'], histograma['y'],
+                       titulo='Distribución de fallecidos por Edad', xlabel='Edad', ylabel='Cantidad',
+                       estilo_titulo=ESTILO_TITULO_FALLECIDOS, estilo_ejes=ESTILO_EJES_FALLECIDOS)
+
+
+def dibujar_curva_epidemica(grafico, curva, region):
+    """
+    Dibuja los casos diarios de una región con sus promedios móviles y el Rt
+    en un eje secundario (se redibuja completo)
+
+    Args:
+        grafico (Grafico): Gráfico donde dibujar
+        curva (pandas.DataFrame): Columnas casos, promedio_7, promedio_14 y rt, indexadas por fecha
+        region (str): Nombre de la región, para el título
+    """
+    def dibujar(ax):
+        fechas = curva.index
+        # Un solo polígono escalonado en lugar de una barra por día
+        ax.fill_between(fechas, curva['casos'].to_numpy(dtype=float), step='mid', color='lightgray',
+                        label='Casos diarios')
+        ax.plot(fechas, curva['promedio_7'], label='Promedio 7 días')
+        ax.plot(fechas, curva['promedio_14'], label='Promedio 14 días')
+        ax.set_title(f'Curva Epidémica - {region}')
+        ax.set_xlabel('Fecha')
+        ax.set_ylabel('Número de Casos')
+        ax.legend(loc='upper left')
+
+        eje_rt = ax.twinx()
+        eje_rt.plot(fechas, curva['rt'], color='firebrick', linewidth=1, label='Rt')
+        eje_rt.axhline(1, color='firebrick', linestyle='--', linewidth=0.8)
+        eje_rt.set_ylabel('Rt')
+        eje_rt.legend(loc='upper right')
+    grafico.personalizado(dibujar)
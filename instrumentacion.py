@@ -0,0 +1,264 @@
+"""
+Registro de tiempo y memoria de las operaciones del analizador y de la interfaz.
+
+Las funciones decoradas con @instrumentar registran, mientras el registro
+está activo, el tiempo de cada llamada, las filas procesadas y cuánto subió
+el pico de memoria (medido con tracemalloc) respecto de la memoria al
+empezar. Desactivado, el decorador solo consulta un atributo antes de
+llamar a la función. Las mediciones se guardan en memoria (las últimas
+CAPACIDAD_REGISTRO), se notifican a los oyentes (la barra de estado y el
+diálogo de rendimiento) y, opcionalmente, se escriben en un archivo JSON
+Lines, una medición por línea.
+"""
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Mediciones que se conservan en memoria
+CAPACIDAD_REGISTRO = 2000
+
+
+class Medicion:
+    """Tiempo, filas y memoria de una llamada instrumentada"""
+
+    def __init__(self, operacion, inicio, segundos, filas=None, memoria_bytes=None, hilo=None, error=None):
+        self.operacion = operacion
+        self.inicio = inicio
+        self.segundos = segundos
+        self.filas = filas
+        self.memoria_bytes = memoria_bytes
+        self.hilo = hilo
+        self.error = error
+
+    def como_dict(self):
+        """Medición como dict serializable a JSON"""
+        return {
+            'operacion': self.operacion,
+            'inicio': round(self.inicio, 6),
+            'segundos': round(self.segundos, 6),
+            'filas': self.filas,
+            'memoria_bytes': self.memoria_bytes,
+            'hilo': self.hilo,
+            'error': self.error,
+        }
+
+    def texto(self):
+        """Resumen de una línea (p. ej. para la barra de estado)"""
+        partes = [f"{self.operacion}: {self.segundos * 1000:,.1f} ms"]
+        if self.filas is not None:
+            partes.append(f"{self.filas:,} filas")
+        if self.memoria_bytes is not None:
+            partes.append(f"+{self.memoria_bytes / 1e6:,.1f} MB")
+        if self.error:
+            partes.append(f"error: {self.error}")
+        return ', '.join(partes)
+
+
+class RegistroRendimiento:
+    """
+    Registro de mediciones compartido por toda la aplicación (ver 'registro').
+
+    La memoria se mide con tracemalloc, que el registro inicia al activarse
+    y detiene al desactivarse. El pico de tracemalloc es del proceso: si
+    otra operación corre a la vez en otro hilo, su memoria también cuenta.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_REGISTRO):
+        self.activo = False
+        self.medir_memoria = False
+        self.mediciones = deque(maxlen=capacidad)
+        self._oyentes = []
+        self._bloqueo = threading.Lock()
+        self._local = threading.local()
+        self._traza = None
+        self.ruta_traza = None
+        self._tracemalloc_propio = False
+
+    def activar(self, medir_memoria=True):
+        """
+        Empieza a registrar las llamadas instrumentadas
+
+        Args:
+            medir_memoria (bool): Medir también la memoria (tracemalloc hace más lento el código medido)
+        """
+        if medir_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_propio = True
+        self.medir_memoria = medir_memoria
+        self.activo = True
+
+    def desactivar(self):
+        """Deja de registrar; las mediciones tomadas se conservan"""
+        self.activo = False
+        self.medir_memoria = False
+        if self._tracemalloc_propio:
+            tracemalloc.stop()
+            self._tracemalloc_propio = False
+
+    def agregar_oyente(self, oyente):
+        """Registra una función que recibe cada Medicion (se llama en el hilo que midió)"""
+        self._oyentes.append(oyente)
+
+    def quitar_oyente(self, oyente):
+        """Quita un oyente agregado con agregar_oyente"""
+        if oyente in self._oyentes:
+            self._oyentes.remove(oyente)
+
+    def establecer_traza(self, ruta):
+        """
+        Escribe cada medición nueva como una línea JSON en un archivo (se
+        agrega al final si ya existe)
+
+        Args:
+            ruta (str o None): Archivo de traza; None deja de escribir la traza
+        """
+        with self._bloqueo:
+            if self._traza is not None:
+                self._traza.close()
+                self._traza = None
+            self.ruta_traza = ruta
+            if ruta:
+                self._traza = open(ruta, 'a', encoding='utf-8')
+
+    def limpiar(self):
+        """Descarta las mediciones en memoria"""
+        with self._bloqueo:
+            self.mediciones.clear()
+
+    def registrar(self, medicion):
+        """Guarda una medición, la escribe en la traza y la notifica a los oyentes"""
+        with self._bloqueo:
+            self.mediciones.append(medicion)
+            if self._traza is not None:
+                self._traza.write(json.dumps(medicion.como_dict(), ensure_ascii=False) + '\n')
+                self._traza.flush()
+        for oyente in list(self._oyentes):
+            try:
+                oyente(medicion)
+            except Exception as e:
+                print(f"Error al notificar una medición de rendimiento: {e}")
+
+    def resumen(self):
+        """
+        Estadísticas por operación de las mediciones en memoria
+
+        Returns:
+            list: dicts con operacion, llamadas, total, media y maximo (segundos),
+            filas (de la última llamada) y memoria_maxima (bytes o None),
+            ordenados por tiempo total descendente
+        """
+        with self._bloqueo:
+            mediciones = list(self.mediciones)
+        operaciones = {}
+        for medicion in mediciones:
+            datos = operaciones.setdefault(medicion.operacion, {
+                'operacion': medicion.operacion, 'llamadas': 0, 'total': 0.0, 'maximo': 0.0,
+                'filas': None, 'memoria_maxima': None,
+            })
+            datos['llamadas'] += 1
+            datos['total'] += medicion.segundos
+            datos['maximo'] = max(datos['maximo'], medicion.segundos)
+            datos['filas'] = medicion.filas
+            if medicion.memoria_bytes is not None:
+                datos['memoria_maxima'] = max(datos['memoria_maxima'] or 0, medicion.memoria_bytes)
+        for datos in operaciones.values():
+            datos['media'] = datos['total'] / datos['llamadas']
+        return sorted(operaciones.values(), key=lambda datos: datos['total'], reverse=True)
+
+    def _pila(self):
+        """Marcos de las llamadas instrumentadas en curso en este hilo"""
+        pila = getattr(self._local, 'pila', None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    def medir(self, operacion, funcion, args, kwargs, filas=None):
+        """
+        Llama a la función midiendo tiempo, filas y memoria, y registra la medición
+
+        Args:
+            operacion (str): Nombre de la operación
+            funcion (callable): Función a llamar con args y kwargs
+            filas (callable, opcional): Recibe (resultado, *args, **kwargs) y devuelve las filas procesadas
+
+        Returns:
+            object: Resultado de la función
+        """
+        # Cada marco guarda la memoria al empezar y el pico más alto de sus
+        # llamadas anidadas: estas reinician el pico de tracemalloc
+        memoria = self.medir_memoria and tracemalloc.is_tracing()
+        pila = self._pila()
+        marco = None
+        if memoria:
+            actual, pico_anterior = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            marco = [actual, 0]
+            if pila and pila[-1] is not None:
+                pila[-1][1] = max(pila[-1][1], pico_anterior)
+        pila.append(marco)
+
+        inicio = time.time()
+        inicio_reloj = time.perf_counter()
+        try:
+            resultado = funcion(*args, **kwargs)
+        except BaseException as e:
+            self._terminar(operacion, inicio, inicio_reloj, marco, error=type(e).__name__)
+            raise
+
+        try:
+            cantidad = filas(resultado, *args, **kwargs) if filas is not None else _filas_predeterminadas(args)
+        except Exception:
+            cantidad = None
+        self._terminar(operacion, inicio, inicio_reloj, marco, cantidad)
+        return resultado
+
+    def _terminar(self, operacion, inicio, inicio_reloj, marco, filas=None, error=None):
+        """Cierra el marco de una llamada y registra su medición"""
+        segundos = time.perf_counter() - inicio_reloj
+        pila = self._pila()
+        pila.pop()
+        memoria_bytes = None
+        if marco is not None and tracemalloc.is_tracing():
+            pico = max(tracemalloc.get_traced_memory()[1], marco[1])
+            memoria_bytes = max(pico - marco[0], 0)
+            if pila and pila[-1] is not None:
+                pila[-1][1] = max(pila[-1][1], pico)
+        self.registrar(Medicion(operacion, inicio, segundos, filas, memoria_bytes,
+                                threading.current_thread().name, error))
+
+
+def _filas_predeterminadas(args):
+    """Filas del DataFrame del objeto (self) de un método, si lo tiene"""
+    df = getattr(args[0], 'df', None) if args else None
+    return len(df) if df is not None and hasattr(df, '__len__') else None
+
+
+# Registro de la aplicación
+registro = RegistroRendimiento()
+
+
+def instrumentar(nombre=None, filas=None):
+    """
+    Decorador que registra tiempo, filas y memoria de cada llamada mientras
+    el registro está activo
+
+    Args:
+        nombre (str, opcional): Nombre de la operación (por defecto, Clase.método)
+        filas (callable, opcional): Recibe (resultado, *args, **kwargs) y devuelve
+            las filas procesadas. Por defecto, las del atributo 'df' del primer argumento.
+    """
+    def decorador(funcion):
+        operacion = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not registro.activo:
+                return funcion(*args, **kwargs)
+            return registro.medir(operacion, funcion, args, kwargs, filas)
+
+        return envoltura
+
+    return decorador
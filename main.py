@@ -1,38 +1,122 @@
 import sys
+import time
+
+# Instante de inicio, para el informe de arranque (--perfil-arranque)
+INICIO_ARRANQUE = time.perf_counter()
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
 
+from agregacion_paralela import contar_por_grupo
+from carga_datos import cargar_dataset, dataframe_vacio, fusionar_delta, leer_delta
+from exportacion import FORMATOS_EXPORTACION, exportar_filas, formatos_disponibles
+from fuera_de_memoria import PRESUPUESTO_PREDETERMINADO, abrir_csv_en_disco
+from filtros import MotorFiltros
+from geografia import COLUMNAS_MUNICIPIO
+from instrumentacion import instrumentar, registro
+from modelo_tabla import ModeloTablaDataFrame, ModeloTablaEnDisco
+from trabajadores import EjecutorUltimaSolicitud, IndicadorOcupado, Tarea, iniciar_tarea
+
 # Importar módulos de PyQt6
 from PyQt6 import QtWidgets, uic, QtGui
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QMessageBox, 
-                            QFileDialog, QWidget, QFrame)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QStandardItemModel, QStandardItem
+                            QFileDialog, QWidget, QFrame, QProgressBar, QPushButton, QLabel,
+                            QInputDialog, QLineEdit, QCompleter)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QStringListModel
 
-# Para resolver el problema de incompatibilidad entre matplotlib y PyQt6
-# Usamos directamente el backend compatible con PyQt6
-import matplotlib
-matplotlib.use('QtAgg')  # Importante: establecer el backend antes de importar pyplot
+# El analizador calcula los conteos de la ventana principal: es obligatorio.
+# matplotlib y la ventana de análisis avanzado se importan al usarlos por
+# primera vez, después de mostrar la ventana.
+from analizador_epidemiologico import AnalizadorEpidemiologico
+from dialogo_rendimiento import DialogoRendimiento, PuenteRendimiento
 
-# Importaciones condicionales para manejar los módulos externos
-try:
-    from ventana_analisis_avanzado import abrir_analisis_avanzado
-    from analizador_epidemiologico import AnalizadorEpidemiologico
+print("Directorio de trabajo actual:", os.getcwd())
 
-except ImportError:
-    # Define funciones de reemplazo si no encuentras los módulos
-    def abrir_analisis_avanzado(df):
-        QMessageBox.warning(None, "Módulo no disponible", "El módulo de análisis avanzado no está disponible.")
-    
-    class AnalizadorEpidemiologico:
-        def __init__(self, dataframe=None):
-            self.df = dataframe
+@instrumentar('MainWindow.cargar_datos', filas=lambda resultado, *args, **kwargs: len(resultado[0]))
+def cargar_e_indexar(ruta_csv, **kwargs):
+    """
+    Carga el dataset y construye sus índices de filtrado y su cubo de
+    conteos (en el hilo de fondo)
+    """
+    df = cargar_dataset(ruta_csv, **kwargs)
+    analizador = AnalizadorEpidemiologico(dataframe=df)
+    analizador.cubo()
+    analizador.geografia()
+    return df, MotorFiltros(df), analizador
 
-print("Directorio de trabajo actual:", os.getcwd())
+@instrumentar('MainWindow.aplicar_actualizacion', filas=lambda resultado, *args: len(resultado[0].df))
+def fusionar_e_indexar(ruta_delta, df, indice, motor, analizador):
+    """
+    Fusiona una actualización diaria con los datos cargados y actualiza sus
+    índices y el cubo de conteos con solo las filas que cambiaron (en el
+    hilo de fondo)
+    """
+    fusion = fusionar_delta(df, leer_delta(ruta_delta), indice)
+    return fusion, motor.actualizado(fusion.df, fusion.posiciones_modificadas), analizador.derivados_actualizados(fusion)
+
+@instrumentar('MainWindow.graficar (conteos)')
+def conteos_para_grafico(cubo, igualdades, edad_minima, motor=None, df=None, filas=None):
+    """
+    Calcula los conteos del gráfico principal desde el cubo de conteos o,
+    si algún filtro no es una dimensión del cubo (el municipio), desde las
+    filas filtradas
+    
+    Args:
+        cubo (CuboDatos): Cubo de conteos del dataset
+        igualdades (dict): Filtros {columna: valor}
+        edad_minima (int o None): Edad mínima
+        motor (MotorFiltros, opcional): Motor de filtros, para los filtros fuera del cubo
+        df (pandas.DataFrame, opcional): Datos, para los filtros fuera del cubo
+        filas (numpy.ndarray, opcional): Filas ya filtradas (si faltan, se calculan con el motor)
+        
+    Returns:
+        tuple o None: (pandas.Series con los conteos, título, etiqueta del eje x),
+        o None si no hay datos suficientes
+    """
+    desde_filas = not all(cubo.tiene(columna) for columna in igualdades)
+    if desde_filas and filas is None:
+        filas = motor.filtrar(igualdades, edad_minima)
+    
+    # Intentar graficar por sexo y, si no hay datos, por estado
+    for columna, titulo in (('Sexo', 'Distribución por Sexo'),
+                            ('Nombre departamento', 'Distribución por Estado')):
+        if desde_filas:
+            if columna not in df.columns:
+                continue
+            # Un municipio tiene pocas filas: contarlas directamente
+            conteo = contar_por_grupo(df[columna] if filas is None else df[columna].iloc[filas])
+        elif cubo.tiene(columna):
+            conteo = cubo.contar(columna, igualdades, edad_minima)
+        else:
+            continue
+        conteo = conteo[conteo > 0]  # Omitir categorías sin casos
+        if conteo.empty:
+            continue
+        return conteo.sort_values(ascending=False, kind='stable'), titulo, columna
+    return None
+
+@instrumentar('MainWindow.filtrado_en_vivo',
+              filas=lambda resultado, motor, *args: len(motor.df) if resultado['filas'] is None else len(resultado['filas']))
+def filtrar_y_contar(motor, cubo, igualdades, edad_minima, df=None):
+    """Filtra y calcula los conteos del gráfico (en el hilo de fondo), midiendo cada paso"""
+    inicio = time.perf_counter()
+    filas = motor.filtrar(igualdades, edad_minima)
+    fin_filtro = time.perf_counter()
+    datos = conteos_para_grafico(cubo, igualdades, edad_minima, motor, df, filas)
+    fin_conteo = time.perf_counter()
+    return {
+        'motor': motor,
+        'filas': filas,
+        'datos': datos,
+        'ms_filtro': (fin_filtro - inicio) * 1000,
+        'ms_conteo': (fin_conteo - fin_filtro) * 1000,
+    }
 
 class MainWindow(QMainWindow):
+    # Se emite cada vez que se cargan o actualizan los datos
+    datos_actualizados = pyqtSignal()
+    
     def __init__(self):
         super(MainWindow, self).__init__()
         # Cargar la interfaz UI
@@ -46,6 +130,13 @@ class MainWindow(QMainWindow):
         self.pushButton = self.findChild(QtWidgets.QPushButton, 'pushButton')
         self.tableView = self.findChild(QtWidgets.QTableView, 'tableView')
         
+        # Modelo virtual de la tabla: se reutiliza en cada cambio de filtros
+        self.modelo_tabla = ModeloTablaDataFrame(parent=self)
+        self.tableView.setModel(self.modelo_tabla)
+        
+        # Dataset del modo fuera de memoria (None: datos en memoria)
+        self.dataset_disco = None
+        
         # Crear un QWidget para reemplazar el graphicsView
         self.plot_container = QWidget(self)
         self.graphicsView = self.findChild(QtWidgets.QGraphicsView, 'graphicsView')
@@ -56,25 +147,54 @@ class MainWindow(QMainWindow):
         # Ocultar el graphicsView original
         self.graphicsView.hide()
         
-        # Inicializar el gráfico
-        self.initialize_plot()
+        # El gráfico (y con él matplotlib) se crea después del primer pintado
+        self.grafico = None
         
         # Configurar menú
         self.setup_menu()
         
+        # Configurar barra de progreso de carga
+        self.setup_progreso()
+        
+        # Configurar el cálculo de gráficos en segundo plano
+        self.setup_calculo_graficos()
+        
+        # Configurar filtrado en vivo
+        self.setup_filtrado_en_vivo()
+        
+        # Configurar el filtro por municipio
+        self.setup_filtro_municipio()
+        
+        # Configurar el registro de rendimiento
+        self.setup_rendimiento()
+        
+        # Ventana de análisis avanzado: se crea al abrirla y se conserva
+        self.ventana_avanzada = None
+        
         # Conectar señales
         self.sldEdad.valueChanged.connect(self.actualizar_lcd)
         self.pushButton.clicked.connect(self.graficar)
+        self.datos_actualizados.connect(self.actualizar_ventana_avanzada)
         
-        # Cargar datos y configurar controles
-        self.cargar_datos()
+        # Mostrar la ventana vacía y cargar los datos en segundo plano
+        self.df = dataframe_vacio()
+        self.motor_filtros = MotorFiltros(self.df)
+        self.analizador = AnalizadorEpidemiologico(dataframe=self.df)
+        self.indice_casos = None
+        self.tarea_carga = None
+        self.tarea_exportacion = None
         self.configurar_combos()
         self.configurar_slider()
         self.actualizar_tabla()
-        
-        # Crear analizador si hay datos
-        if hasattr(self, 'df'):
-            self.analizador = AnalizadorEpidemiologico(dataframe=self.df)
+        self.primer_pintado = False
+    
+    def paintEvent(self, evento):
+        super(MainWindow, self).paintEvent(evento)
+        if not self.primer_pintado:
+            # La ventana ya se ve: crear el gráfico y cargar los datos
+            self.primer_pintado = True
+            QTimer.singleShot(0, self.initialize_plot)
+            QTimer.singleShot(0, self.cargar_datos)
     
     def initialize_plot(self):
         """Crear y configurar el área de gráfico"""
@@ -86,22 +206,25 @@ class MainWindow(QMainWindow):
                 if widget:
                     widget.deleteLater()
             
+            # Importar matplotlib recién aquí: es lo más lento del arranque
+            from matplotlib.figure import Figure
+            from graficos import Grafico
+            
             # Crear figura de matplotlib
-            self.figure = plt.figure(figsize=(5, 4))
+            self.figure = Figure(figsize=(5, 4))
             
-            # Usar el widget de matplotlib para Qt
+            # Usar el widget de matplotlib para Qt (compatible con PyQt6)
             from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
             self.canvas = FigureCanvasQTAgg(self.figure)
             
             # Añadir el canvas al layout
             self.plot_layout.addWidget(self.canvas)
             
+            # Los redibujos reutilizan los axes y las barras de este gráfico
+            self.grafico = Grafico(self.figure, self.canvas)
+            
             # Inicializar con un gráfico vacío
-            self.ax = self.figure.add_subplot(111)
-            self.ax.set_title('No hay datos para mostrar')
-            self.ax.text(0.5, 0.5, 'Seleccione filtros y presione "Graficar"',
-                       horizontalalignment='center', verticalalignment='center')
-            self.canvas.draw()
+            self.grafico.texto('Seleccione filtros y presione "Graficar"', titulo='No hay datos para mostrar')
             
         except Exception as e:
             print(f"Error al inicializar el gráfico: {e}")
@@ -123,6 +246,14 @@ class MainWindow(QMainWindow):
         accion_abrir = QtGui.QAction('Abrir CSV', self)
         accion_abrir.triggered.connect(self.abrir_csv)
         menu_archivo.addAction(accion_abrir)
+        # Acción: Abrir CSV en modo fuera de memoria (datasets más grandes que la RAM)
+        accion_abrir_disco = QtGui.QAction('Abrir CSV fuera de memoria', self)
+        accion_abrir_disco.triggered.connect(self.abrir_csv_en_disco)
+        menu_archivo.addAction(accion_abrir_disco)
+        # Acción: Aplicar actualización diaria (inserta o actualiza casos por 'Id de caso')
+        accion_actualizar = QtGui.QAction('Aplicar actualización diaria', self)
+        accion_actualizar.triggered.connect(self.abrir_actualizacion)
+        menu_archivo.addAction(accion_actualizar)
         # Acción: Exportar datos filtrados
         accion_exportar = QtGui.QAction('Exportar datos filtrados', self)
         accion_exportar.triggered.connect(self.exportar_filtrados)
@@ -140,52 +271,414 @@ class MainWindow(QMainWindow):
         accion_avanzado = QtGui.QAction('Análisis Epidemiológico Avanzado', self)
         accion_avanzado.triggered.connect(self.abrir_analisis_avanzado)
         menu_analisis.addAction(accion_avanzado)
+        
+        # Acción: Filtrado en vivo (refiltra y regrafica al mover los controles)
+        self.accion_en_vivo = QtGui.QAction('Filtrado en vivo', self)
+        self.accion_en_vivo.setCheckable(True)
+        self.accion_en_vivo.toggled.connect(self.programar_filtrado)
+        menu_analisis.addAction(self.accion_en_vivo)
+        
+        # Menú Rendimiento
+        menu_rendimiento = menubar.addMenu('Rendimiento')
+        
+        # Acción: Registrar tiempo, filas y memoria de cada operación
+        self.accion_rendimiento = QtGui.QAction('Registrar tiempos y memoria', self)
+        self.accion_rendimiento.setCheckable(True)
+        self.accion_rendimiento.toggled.connect(self.cambiar_registro_rendimiento)
+        menu_rendimiento.addAction(self.accion_rendimiento)
+        # Acción: Escribir cada medición en un archivo JSON Lines
+        self.accion_traza = QtGui.QAction('Guardar traza JSONL...', self)
+        self.accion_traza.setCheckable(True)
+        self.accion_traza.toggled.connect(self.cambiar_traza_rendimiento)
+        menu_rendimiento.addAction(self.accion_traza)
+        # Acción: Diálogo de rendimiento
+        accion_dialogo = QtGui.QAction('Ver rendimiento...', self)
+        accion_dialogo.triggered.connect(self.abrir_rendimiento)
+        menu_rendimiento.addAction(accion_dialogo)
     
-    def cargar_datos(self, dataset_csv=None):
-        """Carga los datos desde el archivo CSV"""
+    def setup_progreso(self):
+        """Crea la barra de progreso y el botón de cancelar en la barra de estado"""
+        self.barra_progreso = QProgressBar(self)
+        self.barra_progreso.setRange(0, 100)
+        self.barra_progreso.setMinimumWidth(300)
+        self.btn_cancelar = QPushButton('Cancelar', self)
+        self.btn_cancelar.clicked.connect(self.cancelar_carga)
+        
+        self.statusBar().addPermanentWidget(self.barra_progreso)
+        self.statusBar().addPermanentWidget(self.btn_cancelar)
+        self.barra_progreso.hide()
+        self.btn_cancelar.hide()
+    
+    def setup_calculo_graficos(self):
+        """Prepara el ejecutor del gráfico principal y su aviso de cálculo en curso"""
+        # Un clic nuevo en "Graficar" descarta el cálculo anterior
+        self.ejecutor_grafico = EjecutorUltimaSolicitud(self)
+        self.ejecutor_grafico.terminada.connect(self.dibujar_grafico)
+        self.ejecutor_grafico.fallida.connect(self.error_grafico)
+        
+        self.indicador_grafico = IndicadorOcupado(self.plot_container)
+        self.indicador_grafico.seguir(self.ejecutor_grafico)
+    
+    def setup_filtrado_en_vivo(self):
+        """Prepara el temporizador de espera, el ejecutor y el indicador de latencia"""
+        # Esperar a que el usuario deje de mover el control antes de filtrar
+        self.temporizador_filtrado = QTimer(self)
+        self.temporizador_filtrado.setSingleShot(True)
+        self.temporizador_filtrado.setInterval(150)
+        self.temporizador_filtrado.timeout.connect(self.ejecutar_filtrado_en_vivo)
+        
+        # Solo se calcula la solicitud más reciente, fuera del hilo de la interfaz
+        self.ejecutor_filtrado = EjecutorUltimaSolicitud(self)
+        self.ejecutor_filtrado.terminada.connect(self.aplicar_filtrado_en_vivo)
+        self.ejecutor_filtrado.fallida.connect(
+            lambda mensaje: self.statusBar().showMessage(f"Error al filtrar: {mensaje}", 5000)
+        )
+        self.indicador_grafico.seguir(self.ejecutor_filtrado)
+        
+        self.etiqueta_latencia = QLabel(self)
+        self.statusBar().addPermanentWidget(self.etiqueta_latencia)
+        
+        self.sldEdad.valueChanged.connect(self.programar_filtrado)
+        self.cmb_sexo.currentIndexChanged.connect(self.programar_filtrado)
+        self.cmb_estado.currentIndexChanged.connect(self.programar_filtrado)
+    
+    def setup_rendimiento(self):
+        """Prepara la lectura de rendimiento de la barra de estado"""
+        # Las mediciones de los hilos de fondo llegan por señal al hilo de la interfaz
+        self.puente_rendimiento = PuenteRendimiento(self)
+        self.puente_rendimiento.medicion.connect(self.mostrar_medicion)
+        self.dialogo_rendimiento = None
+        
+        self.etiqueta_rendimiento = QLabel(self)
+        self.statusBar().addPermanentWidget(self.etiqueta_rendimiento)
+        self.etiqueta_rendimiento.hide()
+    
+    def cambiar_registro_rendimiento(self, activo):
+        """Activa o desactiva el registro de tiempos y memoria"""
+        if activo:
+            registro.activar()
+            self.etiqueta_rendimiento.setText("Registro de rendimiento activo")
+            self.etiqueta_rendimiento.show()
+        else:
+            registro.desactivar()
+            self.etiqueta_rendimiento.hide()
+    
+    def cambiar_traza_rendimiento(self, activa):
+        """Empieza o deja de escribir las mediciones en un archivo JSON Lines"""
+        if not activa:
+            registro.establecer_traza(None)
+            return
+        ruta_archivo, _ = QFileDialog.getSaveFileName(
+            self, "Guardar traza de rendimiento", "rendimiento.jsonl", "JSON Lines (*.jsonl)"
+        )
+        if not ruta_archivo:
+            self.accion_traza.setChecked(False)
+            return
         try:
-            # Cargar el CSV, usar ruta proporcionada o valor predeterminado
-            if dataset_csv:
-                self.df = pd.read_csv(dataset_csv)
-            else:
-                self.df = pd.read_csv('dataset.csv')
-            
-            # Convertir columnas de fechas a formato datetime
-            columnas_fecha = [col for col in self.df.columns if 'fecha' in col.lower()]
-            for col in columnas_fecha:
-                try:
-                    self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
-                except:
-                    pass  # Manejar columnas que no son de fecha
-                    
-            # Verificar si la columna 'edad' existe, si no, intenta crear una
-            if 'Edad' not in self.df.columns:
-                if 'medida de edad' in self.df.columns:
-                    self.df['Edad'] = pd.to_numeric(self.df['medida de edad'], errors='coerce')
-            
-            print(f"Datos cargados correctamente. {len(self.df)} registros.")
-            
-            # Crear analizador una vez que tengamos los datos
-            self.analizador = AnalizadorEpidemiologico(dataframe=self.df)
-            
-            # Actualizar componentes con los nuevos datos
-            self.configurar_combos()
-            self.configurar_slider()
-            self.actualizar_tabla()
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al cargar los datos: {str(e)}")
-            print(f"Error al cargar los datos: {e}")
-            # Crear un DataFrame vacío con las columnas esperadas si hay un error
-            self.df = pd.DataFrame(columns=['Fecha reporte web', 'Id de caso', 'Fecha de notificación',
-                                           'Código divipola departamento', 'Nombre departamento',
-                                           'Código divipola municipio', 'Nombre municipio', 'Edad',
-                                           'Medida de edad', 'Sexo', 'Tipo de contagio',
-                                           'Ubicación del caso', 'Estado', 'Código iso del país',
-                                           'Nombre del país', 'Recuperado', 'Fecha de inicio de síntomas',
-                                           'Fecha de muerte', 'fecha de diagnóstico', 'Fecha de recuperación',
-                                           'Tipo de recuperación', 'Pertenencia étnica',
-                                           'Nombre del grupo étnico'])
+            registro.establecer_traza(ruta_archivo)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"No se pudo abrir la traza: {e}")
+            self.accion_traza.setChecked(False)
+            return
+        # La traza solo tiene sentido con el registro activo
+        self.accion_rendimiento.setChecked(True)
+    
+    def mostrar_medicion(self, medicion):
+        """Muestra la última medición en la barra de estado"""
+        if registro.activo:
+            self.etiqueta_rendimiento.setText(medicion.texto())
+    
+    def abrir_rendimiento(self):
+        """Abre el diálogo de rendimiento, reutilizándolo entre aperturas"""
+        if self.dialogo_rendimiento is None:
+            self.dialogo_rendimiento = DialogoRendimiento(self.puente_rendimiento, self)
+        self.dialogo_rendimiento.show()
+        self.dialogo_rendimiento.raise_()
+    
+    def setup_filtro_municipio(self):
+        """
+        Crea el filtro por municipio: un campo de texto cuyas sugerencias
+        salen del índice ordenado de nombres de la geografía del analizador
+        """
+        barra = self.addToolBar("Municipio")
+        barra.setObjectName('barra_municipio')
+        barra.addWidget(QLabel("Municipio: ", self))
+        self.txt_municipio = QLineEdit(self)
+        self.txt_municipio.setPlaceholderText("Todos (escriba el inicio del nombre)")
+        self.txt_municipio.setClearButtonEnabled(True)
+        self.txt_municipio.setMinimumWidth(300)
+        barra.addWidget(self.txt_municipio)
+        
+        # El completer solo muestra las sugerencias: la búsqueda por prefijo la hace Geografia
+        self.modelo_municipios = QStringListModel(self)
+        completer = QCompleter(self.modelo_municipios, self)
+        completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        completer.setMaxVisibleItems(15)
+        self.txt_municipio.setCompleter(completer)
+        
+        # Código divipola del municipio elegido (None: todos)
+        self.codigo_municipio = None
+        self.txt_municipio.textEdited.connect(self.sugerir_municipios)
+        completer.activated.connect(self.confirmar_municipio)
+        self.txt_municipio.editingFinished.connect(self.confirmar_municipio)
+    
+    def geografia(self):
+        """Geografía de los datos en memoria (None en modo fuera de memoria)"""
+        if self.dataset_disco is not None:
+            return None
+        return self.analizador.geografia()
+    
+    def sugerir_municipios(self, texto):
+        """Muestra los municipios cuyo nombre empieza por el texto escrito"""
+        geografia = self.geografia()
+        sugerencias = geografia.buscar_municipios(texto) if geografia is not None and texto.strip() else []
+        self.modelo_municipios.setStringList([etiqueta for etiqueta, _ in sugerencias])
+        if sugerencias:
+            self.txt_municipio.completer().complete()
+    
+    def confirmar_municipio(self, *args):
+        """Fija el municipio del filtro a partir del texto (una sugerencia o un prefijo único)"""
+        texto = self.txt_municipio.text().strip()
+        codigo = None
+        geografia = self.geografia()
+        if texto and geografia is not None:
+            # Las etiquetas son 'MUNICIPIO (DEPARTAMENTO)': buscar por el nombre
+            sugerencias = dict(geografia.buscar_municipios(texto.split(' (')[0], limite=None))
+            codigo = sugerencias.get(texto)
+            if codigo is None and len(sugerencias) == 1:
+                etiqueta, codigo = next(iter(sugerencias.items()))
+                self.txt_municipio.setText(etiqueta)
+            elif codigo is None:
+                self.statusBar().showMessage(f"Municipio no encontrado: {texto}", 5000)
+        if codigo != self.codigo_municipio:
+            self.codigo_municipio = codigo
+            self.programar_filtrado()
+    
+    def configurar_filtro_municipio(self):
+        """Reinicia el filtro por municipio para los datos cargados"""
+        self.codigo_municipio = None
+        self.txt_municipio.clear()
+        self.modelo_municipios.setStringList([])
+        # Sin la geografía (modo fuera de memoria) no hay búsqueda ni conteo por municipio
+        self.txt_municipio.setEnabled(self.dataset_disco is None and COLUMNAS_MUNICIPIO[0] in self.df.columns)
+    
+    def programar_filtrado(self, *args):
+        """Reinicia la espera del filtrado en vivo tras un cambio en los controles"""
+        if self.accion_en_vivo.isChecked():
+            self.temporizador_filtrado.start()
+    
+    def ejecutar_filtrado_en_vivo(self):
+        """Lanza el filtrado y el conteo del gráfico en segundo plano"""
+        igualdades, edad_minima = self.parametros_filtros()
+        self.inicio_filtrado = time.perf_counter()
+        # El filtrado en vivo también redibuja el gráfico: reemplaza a un "Graficar" pendiente
+        self.ejecutor_grafico.cancelar()
+        self.ejecutor_filtrado.solicitar(filtrar_y_contar, self.motor_filtros, self.analizador.cubo(),
+                                         igualdades, edad_minima, self.df)
+    
+    def aplicar_filtrado_en_vivo(self, resultado):
+        """Actualiza tabla y gráfico con el resultado del filtrado en vivo"""
+        if resultado['motor'] is not self.motor_filtros:
+            return  # Resultado calculado sobre un dataset anterior
+        
+        inicio_dibujo = time.perf_counter()
+        self.modelo_tabla.establecer_filas(resultado['filas'])
+        self.dibujar_grafico(resultado['datos'])
+        fin = time.perf_counter()
+        
+        cantidad = self.modelo_tabla.rowCount()
+        self.etiqueta_latencia.setText(
+            f"{cantidad:,} filas | filtro {resultado['ms_filtro']:.0f} ms, "
+            f"conteo {resultado['ms_conteo']:.0f} ms, "
+            f"tabla y gráfico {(fin - inicio_dibujo) * 1000:.0f} ms, "
+            f"total {(fin - self.inicio_filtrado) * 1000:.0f} ms"
+        )
+    
+    def cargar_datos(self, dataset_csv=None):
+        """Carga los datos desde el archivo CSV en un hilo de fondo"""
+        # Solo una carga a la vez: cancelar la anterior si sigue en curso (no una exportación)
+        if not self.sin_exportacion_en_curso("cargar otros datos"):
+            return
+        self.cancelar_carga()
+        
+        # Cargar el CSV (o su caché columnar), usar ruta proporcionada o valor predeterminado
+        ruta = dataset_csv or 'dataset.csv'
+        tarea = Tarea(cargar_e_indexar, ruta)
+        tarea.kwargs.update(progreso=tarea.reportar_progreso, cancelar=tarea.esta_cancelada)
+        tarea.senales.progreso.connect(self.actualizar_progreso_carga)
+        tarea.senales.terminada.connect(self.datos_cargados)
+        tarea.senales.fallida.connect(self.error_carga)
+        tarea.senales.cancelada.connect(self.carga_cancelada)
+        self.tarea_carga = tarea
+        
+        self.barra_progreso.setValue(0)
+        self.barra_progreso.setFormat('Cargando...')
+        self.barra_progreso.show()
+        self.btn_cancelar.show()
+        self.statusBar().showMessage(f"Cargando {ruta}...")
+        iniciar_tarea(tarea)
+    
+    def cancelar_carga(self):
+        """Cancela la carga en curso, si la hay"""
+        if self.tarea_carga is not None:
+            self.tarea_carga.cancelar()
+            self.tarea_carga = None
+            self.finalizar_progreso_carga()
+    
+    def actualizar_progreso_carga(self, valores):
+        """Muestra filas y bytes leídos en la barra de progreso"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return  # Avance de una carga ya cancelada
+        filas, bytes_leidos, bytes_totales = valores
+        porcentaje = int(100 * bytes_leidos / bytes_totales) if bytes_totales else 100
+        self.barra_progreso.setValue(min(porcentaje, 100))
+        self.barra_progreso.setFormat(
+            f"%p% - {filas:,} filas ({bytes_leidos / 1e6:,.0f} de {bytes_totales / 1e6:,.0f} MB)"
+        )
+    
+    def finalizar_progreso_carga(self):
+        """Oculta los controles de progreso de carga"""
+        self.barra_progreso.setRange(0, 100)
+        self.barra_progreso.hide()
+        self.btn_cancelar.hide()
+        self.statusBar().clearMessage()
+    
+    @instrumentar()
+    def datos_cargados(self, resultado):
+        """Recibe el DataFrame cargado, sus índices y su analizador y actualiza los controles"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return  # Resultado de una carga ya cancelada
+        self.tarea_carga = None
+        self.finalizar_progreso_carga()
+        
+        # Los índices de filtrado y el analizador (con su cubo) se construyen
+        # una sola vez por carga, en el hilo de fondo
+        self.df, self.motor_filtros, self.analizador = resultado
+        self.usar_datos_en_memoria()
+        self.indice_casos = None  # Se construye con la primera actualización diaria
+        print(f"Datos cargados correctamente. {len(self.df)} registros.")
+        
+        # Actualizar componentes con los nuevos datos
+        self.configurar_combos()
+        self.configurar_slider()
+        self.actualizar_tabla()
+        self.datos_actualizados.emit()
+    
+    def error_carga(self, mensaje):
+        """Informa de un error de carga y deja un DataFrame vacío"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return
+        self.tarea_carga = None
+        self.finalizar_progreso_carga()
+        
+        QMessageBox.critical(self, "Error", f"Error al cargar los datos: {mensaje}")
+        print(f"Error al cargar los datos: {mensaje}")
+        # Crear un DataFrame vacío con las columnas esperadas si hay un error
+        self.usar_datos_en_memoria()
+        self.df = dataframe_vacio()
+        self.motor_filtros = MotorFiltros(self.df)
+        self.analizador = AnalizadorEpidemiologico(dataframe=self.df)
+        self.indice_casos = None
+        self.configurar_combos()
+        self.configurar_slider()
+        self.actualizar_tabla()
+    
+    def abrir_csv_en_disco(self):
+        """Abre un CSV en modo fuera de memoria, pidiendo el presupuesto de memoria"""
+        ruta_archivo, _ = QFileDialog.getOpenFileName(
+            self, "Abrir CSV fuera de memoria", "", "Archivos CSV (*.csv)"
+        )
+        if not ruta_archivo:
+            return
+        
+        megabytes, aceptado = QInputDialog.getInt(
+            self, "Presupuesto de memoria", "Memoria máxima de trabajo (MB):",
+            PRESUPUESTO_PREDETERMINADO // (1024 * 1024), 16, 1024 * 1024
+        )
+        if aceptado:
+            self.cargar_en_disco(ruta_archivo, megabytes * 1024 * 1024)
+    
+    def cargar_en_disco(self, ruta_csv, presupuesto_bytes=None):
+        """
+        Convierte el CSV en bloques en disco (o reutiliza los de una apertura
+        anterior) y construye el cubo de conteos, en un hilo de fondo
+        """
+        if not self.sin_exportacion_en_curso("cargar otros datos"):
+            return
+        self.cancelar_carga()
+        
+        tarea = Tarea(abrir_csv_en_disco, ruta_csv, presupuesto_bytes or PRESUPUESTO_PREDETERMINADO)
+        tarea.kwargs.update(progreso=tarea.reportar_progreso, cancelar=tarea.esta_cancelada)
+        tarea.senales.progreso.connect(self.actualizar_progreso_carga)
+        tarea.senales.terminada.connect(self.datos_en_disco_cargados)
+        tarea.senales.fallida.connect(self.error_carga)
+        tarea.senales.cancelada.connect(self.carga_cancelada)
+        self.tarea_carga = tarea
+        
+        self.barra_progreso.setValue(0)
+        self.barra_progreso.setFormat('Preparando bloques...')
+        self.barra_progreso.show()
+        self.btn_cancelar.show()
+        self.statusBar().showMessage(f"Abriendo {ruta_csv} fuera de memoria...")
+        iniciar_tarea(tarea)
+    
+    def datos_en_disco_cargados(self, dataset):
+        """Pasa al modo fuera de memoria: filtros, gráfico y tabla trabajan sobre el dataset en disco"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return  # Resultado de una carga ya cancelada
+        self.tarea_carga = None
+        self.finalizar_progreso_carga()
+        
+        # El dataset ofrece filtrar() y cubo(): ocupa el lugar del motor y del analizador
+        self.dataset_disco = dataset
+        self.df = dataset.vacio
+        self.motor_filtros = dataset
+        self.analizador = dataset
+        self.indice_casos = None
+        self.modelo_tabla = ModeloTablaEnDisco(dataset, parent=self)
+        self.tableView.setModel(self.modelo_tabla)
+        print(f"Datos abiertos fuera de memoria. {len(dataset)} registros en {len(dataset.bloques)} bloques.")
+        
+        self.configurar_combos()
+        self.configurar_slider()
+        self.actualizar_tabla()
+        self.datos_actualizados.emit()
+    
+    def usar_datos_en_memoria(self):
+        """Sale del modo fuera de memoria, si estaba activo"""
+        if self.dataset_disco is not None:
+            self.dataset_disco = None
+            self.modelo_tabla = ModeloTablaDataFrame(parent=self)
+            self.tableView.setModel(self.modelo_tabla)
+    
+    def sin_modo_en_disco(self, accion):
+        """Avisa que una acción no está disponible en modo fuera de memoria"""
+        if self.dataset_disco is None:
+            return True
+        QMessageBox.information(self, "No disponible",
+                                f"{accion} no está disponible en modo fuera de memoria.")
+        return False
+    
+    def sin_tarea_en_curso(self, accion):
+        """Avisa que hay una carga, actualización o exportación en curso"""
+        if self.tarea_carga is None:
+            return True
+        QMessageBox.information(self, "Tarea en curso",
+                                f"Espere a que termine la tarea en curso (o cancélela) antes de {accion}.")
+        return False
+    
+    def sin_exportacion_en_curso(self, accion):
+        """Avisa que hay una exportación en curso: una carga nueva no debe cancelarla"""
+        if self.tarea_carga is None or self.tarea_carga is not self.tarea_exportacion:
+            return True
+        QMessageBox.information(self, "Exportación en curso",
+                                f"Espere a que termine la exportación (o cancélela) antes de {accion}.")
+        return False
+    
+    def carga_cancelada(self):
+        """La carga se canceló: se conservan los datos anteriores"""
+        if self.tarea_carga is None:
+            self.statusBar().showMessage("Carga cancelada", 3000)
     
     def abrir_csv(self):
         """Abre un diálogo para seleccionar un archivo CSV"""
@@ -197,32 +690,153 @@ class MainWindow(QMainWindow):
         if ruta_archivo:
             self.cargar_datos(ruta_archivo)
     
+    def abrir_actualizacion(self):
+        """Abre un diálogo para seleccionar el CSV de una actualización diaria"""
+        if not self.sin_modo_en_disco("La actualización diaria"):
+            return
+        if not hasattr(self, 'df') or self.df.empty:
+            QMessageBox.warning(self, "Advertencia", "Primero cargue el dataset completo.")
+            return
+        
+        ruta_archivo, _ = QFileDialog.getOpenFileName(
+            self, "Abrir actualización diaria", "", "Archivos CSV (*.csv)"
+        )
+        
+        if ruta_archivo:
+            self.aplicar_actualizacion(ruta_archivo)
+    
+    def aplicar_actualizacion(self, ruta_delta):
+        """Fusiona una actualización diaria con los datos cargados en un hilo de fondo"""
+        if not self.sin_exportacion_en_curso("aplicar una actualización"):
+            return
+        self.cancelar_carga()
+        
+        tarea = Tarea(fusionar_e_indexar, ruta_delta, self.df, self.indice_casos,
+                      self.motor_filtros, self.analizador)
+        tarea.senales.terminada.connect(self.actualizacion_aplicada)
+        tarea.senales.fallida.connect(self.error_actualizacion)
+        tarea.senales.cancelada.connect(self.carga_cancelada)
+        self.tarea_carga = tarea
+        
+        # Sin avance medible: barra indeterminada
+        self.barra_progreso.setRange(0, 0)
+        self.barra_progreso.setFormat('Aplicando actualización...')
+        self.barra_progreso.show()
+        self.btn_cancelar.show()
+        self.statusBar().showMessage(f"Aplicando actualización {ruta_delta}...")
+        iniciar_tarea(tarea)
+    
+    def actualizacion_aplicada(self, resultado):
+        """Instala los datos fusionados y actualiza los controles solo con los valores nuevos"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return  # Resultado de una actualización ya cancelada
+        self.tarea_carga = None
+        self.finalizar_progreso_carga()
+        
+        fusion, self.motor_filtros, derivados = resultado
+        self.df = fusion.df
+        self.indice_casos = fusion.indice
+        self.analizador.reemplazar_datos(fusion.df, derivados)
+        
+        # Combos y slider: solo se revisan las filas que cambiaron
+        cambiadas = fusion.df.iloc[fusion.posiciones_cambiadas()]
+        self.agregar_valores_combo(self.cmb_sexo, cambiadas, 'Sexo')
+        self.agregar_valores_combo(self.cmb_estado, cambiadas, 'Nombre departamento')
+        self.ampliar_slider(cambiadas)
+        self.actualizar_tabla()
+        self.datos_actualizados.emit()
+        
+        mensaje = (f"Actualización aplicada: {fusion.n_anexadas:,} casos nuevos, "
+                   f"{len(fusion.posiciones_modificadas):,} actualizados, "
+                   f"{fusion.n_ignoradas:,} ignorados por ser más antiguos")
+        print(mensaje)
+        self.statusBar().showMessage(mensaje, 10000)
+    
+    def error_actualizacion(self, mensaje):
+        """Informa de un error al aplicar una actualización; se conservan los datos cargados"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return
+        self.tarea_carga = None
+        self.finalizar_progreso_carga()
+        QMessageBox.critical(self, "Error", f"Error al aplicar la actualización: {mensaje}")
+    
     def exportar_filtrados(self):
-        """Exporta los datos filtrados a un nuevo archivo CSV"""
+        """Exporta los datos filtrados a CSV, CSV comprimido o Parquet en un hilo de fondo"""
+        if not self.sin_modo_en_disco("La exportación") or not self.sin_tarea_en_curso("exportar"):
+            return
         if not hasattr(self, 'df') or self.df.empty:
             QMessageBox.warning(self, "Advertencia", "No hay datos para exportar.")
             return
             
-        # Aplicar filtros actuales
-        df_filtrado = self.aplicar_filtros()
+        # Posiciones de las filas filtradas: no se copia el DataFrame
+        filas = self.filas_filtradas()
         
-        # Diálogo para seleccionar ubicación de guardado
-        # Corrección: No llamar a options(), usar directamente QFileDialog
-        ruta_archivo, _ = QFileDialog.getSaveFileName(
+        # Diálogo para seleccionar ubicación y formato de guardado
+        formatos = formatos_disponibles()
+        descripciones = [FORMATOS_EXPORTACION[formato][1] for formato in formatos]
+        ruta_archivo, filtro = QFileDialog.getSaveFileName(
             self, "Guardar datos filtrados",
-            "", "Archivos CSV (*.csv)"
+            "", ";;".join(descripciones)
         )
         
         if ruta_archivo:
-            try:
-                # Asegurar que tenga extensión .csv
-                if not ruta_archivo.lower().endswith('.csv'):
-                    ruta_archivo += '.csv'
-                    
-                df_filtrado.to_csv(ruta_archivo, index=False)
-                QMessageBox.information(self, "Éxito", f"Datos exportados correctamente a {ruta_archivo}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error al exportar datos: {str(e)}")
+            # Asegurar que tenga la extensión del formato elegido
+            formato = formatos[descripciones.index(filtro)] if filtro in descripciones else 'csv'
+            extension = FORMATOS_EXPORTACION[formato][0]
+            if not ruta_archivo.lower().endswith(extension):
+                ruta_archivo += extension
+            self.iniciar_exportacion(filas, ruta_archivo, formato)
+    
+    def iniciar_exportacion(self, filas, ruta_archivo, formato):
+        """Escribe las filas por bloques en un hilo de fondo, con progreso y cancelación"""
+        # La exportación comparte la barra de progreso y el botón de cancelar con
+        # la carga: no debe cancelar una carga o actualización en curso
+        if not self.sin_tarea_en_curso("exportar"):
+            return
+        
+        tarea = Tarea(exportar_filas, self.df, filas, ruta_archivo, formato)
+        tarea.kwargs.update(progreso=tarea.reportar_progreso, cancelar=tarea.esta_cancelada)
+        tarea.senales.progreso.connect(self.actualizar_progreso_exportacion)
+        tarea.senales.terminada.connect(lambda filas_escritas: self.exportacion_terminada(filas_escritas, ruta_archivo))
+        tarea.senales.fallida.connect(self.error_exportacion)
+        tarea.senales.cancelada.connect(self.exportacion_cancelada)
+        self.tarea_carga = self.tarea_exportacion = tarea
+        
+        self.barra_progreso.setValue(0)
+        self.barra_progreso.setFormat('Exportando...')
+        self.barra_progreso.show()
+        self.btn_cancelar.show()
+        self.statusBar().showMessage(f"Exportando a {ruta_archivo}...")
+        iniciar_tarea(tarea)
+    
+    def actualizar_progreso_exportacion(self, valores):
+        """Muestra las filas escritas en la barra de progreso"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return  # Avance de una exportación ya cancelada
+        escritas, totales = valores
+        self.barra_progreso.setValue(int(100 * escritas / totales) if totales else 100)
+        self.barra_progreso.setFormat(f"%p% - {escritas:,} de {totales:,} filas")
+    
+    def exportacion_terminada(self, filas_escritas, ruta_archivo):
+        """Informa del fin de la exportación"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return
+        self.tarea_carga = None
+        self.finalizar_progreso_carga()
+        QMessageBox.information(self, "Éxito", f"{filas_escritas:,} filas exportadas correctamente a {ruta_archivo}")
+    
+    def error_exportacion(self, mensaje):
+        """Informa de un error de exportación (no queda un archivo a medias)"""
+        if self.sender() is not getattr(self.tarea_carga, 'senales', None):
+            return
+        self.tarea_carga = None
+        self.finalizar_progreso_carga()
+        QMessageBox.critical(self, "Error", f"Error al exportar datos: {mensaje}")
+    
+    def exportacion_cancelada(self):
+        """La exportación se canceló: el archivo parcial ya se eliminó"""
+        if self.tarea_carga is None:
+            self.statusBar().showMessage("Exportación cancelada", 3000)
     
     def configurar_combos(self):
         """Configura los ComboBoxes con los valores únicos de las columnas correspondientes"""
@@ -232,31 +846,44 @@ class MainWindow(QMainWindow):
         # Limpiar ComboBoxes antes de agregar nuevos elementos
         self.cmb_sexo.clear()
         self.cmb_estado.clear()
+        self.configurar_filtro_municipio()
         
         # Configurar ComboBox de sexo
         if 'Sexo' in self.df.columns:
-            valores_sexo = ['Todos'] + sorted(self.df['Sexo'].dropna().unique().tolist())
+            valores_sexo = ['Todos'] + self.valores_columna('Sexo')
             self.cmb_sexo.addItems(valores_sexo)
         else:
             self.cmb_sexo.addItems(['N/A'])
         
         # Configurar ComboBox de estado
         if 'Nombre departamento' in self.df.columns:
-            valores_estado = ['Todos'] + sorted(self.df['Nombre departamento'].dropna().unique().tolist())
+            valores_estado = ['Todos'] + self.valores_columna('Nombre departamento')
             self.cmb_estado.addItems(valores_estado)
         else:
             self.cmb_estado.addItems(['N/A'])
     
+    def valores_columna(self, columna):
+        """Valores distintos y ordenados de una columna (del dataset en disco en ese modo)"""
+        if self.dataset_disco is not None:
+            return self.dataset_disco.valores_unicos(columna)
+        return sorted(self.df[columna].dropna().unique().tolist())
+    
     def configurar_slider(self):
         """Configura el slider de edad según los valores en el dataset"""
         if not hasattr(self, 'df'):
             return
             
         if 'Edad' in self.df.columns:
-            edad_min = int(self.df['Edad'].min()) if not pd.isna(self.df['Edad'].min()) else 0 
-            edad_max = int(self.df['Edad'].max()) if not pd.isna(self.df['Edad'].max()) else 100
+            if self.dataset_disco is not None:
+                # Rango guardado al convertir el CSV en bloques
+                edad_min, edad_max = self.dataset_disco.rango('Edad') or (0, 100)
+                edad_min, edad_max = int(edad_min), int(edad_max)
+            else:
+                edad_min = int(self.df['Edad'].min()) if not pd.isna(self.df['Edad'].min()) else 0 
+                edad_max = int(self.df['Edad'].max()) if not pd.isna(self.df['Edad'].max()) else 100
             
             # Configurar el rango del slider
+            self.sldEdad.setEnabled(True)
             self.sldEdad.setMinimum(edad_min)
             self.sldEdad.setMaximum(edad_max)
             self.sldEdad.setValue(edad_min)  # Valor inicial
@@ -267,56 +894,99 @@ class MainWindow(QMainWindow):
             # Si no hay columna de edad, deshabilitar el slider
             self.sldEdad.setEnabled(False)
     
+    def agregar_valores_combo(self, combo, filas, columna):
+        """Añade a un ComboBox, en orden, los valores de 'filas' que aún no tiene"""
+        if columna not in filas.columns or combo.findText('Todos') < 0:
+            return
+        existentes = {combo.itemText(i) for i in range(1, combo.count())}
+        for valor in sorted(set(filas[columna].dropna().unique().tolist()) - existentes):
+            posicion = 1
+            while posicion < combo.count() and combo.itemText(posicion) < valor:
+                posicion += 1
+            combo.insertItem(posicion, valor)
+    
+    def ampliar_slider(self, filas):
+        """Amplía el rango del slider de edad con las edades de 'filas' sin mover su valor"""
+        if 'Edad' not in filas.columns or not self.sldEdad.isEnabled():
+            return
+        edades = pd.to_numeric(filas['Edad'], errors='coerce').dropna()
+        if edades.empty:
+            return
+        self.sldEdad.setMinimum(min(self.sldEdad.minimum(), int(edades.min())))
+        self.sldEdad.setMaximum(max(self.sldEdad.maximum(), int(edades.max())))
+    
     def actualizar_lcd(self, valor):
         """Actualiza el display LCD con el valor del slider"""
         self.lcdNumber.display(valor)
     
+    @instrumentar(filas=lambda resultado, self: self.modelo_tabla.rowCount())
     def actualizar_tabla(self):
         """Actualiza la tabla con los datos filtrados"""
         if not hasattr(self, 'df'):
             return
             
         # Aplicar filtros
-        df_filtrado = self.aplicar_filtros()
-        
-        # Crear modelo para la tabla
-        model = QStandardItemModel()
-        
-        # Establecer encabezados de columnas
-        model.setHorizontalHeaderLabels(df_filtrado.columns)
-        
-        # Llenar el modelo con datos
-        for row in range(min(100, len(df_filtrado))):  # Limitar a 100 filas para mejor rendimiento
-            for col in range(len(df_filtrado.columns)):
-                value = str(df_filtrado.iloc[row, col])
-                item = QStandardItem(value)
-                model.setItem(row, col, item)
+        filas = self.filas_filtradas()
         
-        # Asignar el modelo a la tabla
-        self.tableView.setModel(model)
-        self.tableView.resizeColumnsToContents()
+        # El modelo lee directamente del DataFrame (o del dataset en disco):
+        # solo se cambian las filas visibles
+        if self.dataset_disco is None and self.modelo_tabla.df is not self.df:
+            self.modelo_tabla.establecer_datos(self.df, filas)
+            self.tableView.resizeColumnsToContents()
+        else:
+            self.modelo_tabla.establecer_filas(filas)
     
-    def aplicar_filtros(self):
-        """Aplica los filtros seleccionados al DataFrame"""
-        if not hasattr(self, 'df'):
-            return pd.DataFrame()
-            
-        df_filtrado = self.df.copy()
+    def parametros_filtros(self):
+        """
+        Lee los filtros seleccionados en los controles
+        
+        Returns:
+            tuple: (dict {columna: valor} de igualdades, edad mínima o None)
+        """
+        igualdades = {}
         
         # Filtrar por sexo
-        if self.cmb_sexo.currentText() != 'Todos' and 'Sexo' in df_filtrado.columns:
-            df_filtrado = df_filtrado[df_filtrado['Sexo'] == self.cmb_sexo.currentText()]
+        if self.cmb_sexo.currentText() != 'Todos' and 'Sexo' in self.df.columns:
+            igualdades['Sexo'] = self.cmb_sexo.currentText()
         
         # Filtrar por estado
-        if self.cmb_estado.currentText() != 'Todos' and 'Nombre departamento' in df_filtrado.columns:
-            df_filtrado = df_filtrado[df_filtrado['Nombre departamento'] == self.cmb_estado.currentText()]
+        if self.cmb_estado.currentText() != 'Todos' and 'Nombre departamento' in self.df.columns:
+            igualdades['Nombre departamento'] = self.cmb_estado.currentText()
+        
+        # Filtrar por municipio (código divipola)
+        if self.codigo_municipio is not None and COLUMNAS_MUNICIPIO[0] in self.df.columns:
+            igualdades[COLUMNAS_MUNICIPIO[0]] = self.codigo_municipio
         
         # Filtrar por edad
-        if 'Edad' in df_filtrado.columns and self.sldEdad.isEnabled():
-            edad_seleccionada = self.sldEdad.value()
-            df_filtrado = df_filtrado[df_filtrado['Edad'] >= edad_seleccionada]
+        edad_minima = None
+        if 'Edad' in self.df.columns and self.sldEdad.isEnabled():
+            edad_minima = self.sldEdad.value()
+        
+        return igualdades, edad_minima
+    
+    def filas_filtradas(self):
+        """
+        Calcula las posiciones de las filas que cumplen los filtros seleccionados
         
-        return df_filtrado
+        Returns:
+            numpy.ndarray o None: Posiciones de fila, o None si no hay filtros activos
+        """
+        igualdades, edad_minima = self.parametros_filtros()
+        return self.motor_filtros.filtrar(igualdades, edad_minima)
+    
+    @instrumentar(filas=lambda resultado, self: len(resultado))
+    def aplicar_filtros(self):
+        """
+        Aplica los filtros seleccionados al DataFrame. Sin filtros activos
+        devuelve el DataFrame original, sin copiarlo.
+        """
+        if not hasattr(self, 'df'):
+            return pd.DataFrame()
+            
+        filas = self.filas_filtradas()
+        if filas is None:
+            return self.df
+        return self.df.iloc[filas]
     
     def graficar(self):
         """Genera un gráfico basado en los datos filtrados"""
@@ -324,39 +994,39 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Advertencia", "No hay datos para graficar.")
             return
             
+        # Los conteos se calculan en segundo plano; solo el dibujo ocurre en este hilo
+        analizador, motor, df = self.analizador, self.motor_filtros, self.df
+        igualdades, edad_minima = self.parametros_filtros()
+        self.ejecutor_grafico.solicitar(
+            lambda: conteos_para_grafico(analizador.cubo(), igualdades, edad_minima, motor, df)
+        )
+    
+    def error_grafico(self, mensaje):
+        """Informa de un error al calcular el gráfico"""
+        print(f"Error al graficar: {mensaje}")
+        QMessageBox.warning(self, "Error", f"Error al generar el gráfico: {mensaje}")
+    
+    @instrumentar('MainWindow.graficar (dibujo)', filas=lambda resultado, self, datos: None)
+    def dibujar_grafico(self, datos):
+        """
+        Dibuja el gráfico principal
+        
+        Args:
+            datos (tuple o None): Resultado de conteos_para_grafico
+        """
         try:
-            df_filtrado = self.aplicar_filtros()
-            
-            # Limpiar la figura anterior
-            self.figure.clear()
+            if self.grafico is None:
+                self.initialize_plot()
             
-            # Crear un nuevo subplot
-            ax = self.figure.add_subplot(111)
+            # Si solo cambian los conteos se actualizan las barras existentes
+            if datos is not None:
+                conteo, titulo, columna = datos
+                self.grafico.barras(conteo.index, conteo.to_numpy(), titulo=titulo,
+                                    xlabel=columna, ylabel='Cantidad')
             
-            # Intentar graficar por sexo
-            if 'Sexo' in df_filtrado.columns and not df_filtrado['Sexo'].isna().all():
-                conteo_sexo = df_filtrado['Sexo'].value_counts()
-                conteo_sexo.plot(kind='bar', ax=ax)
-                ax.set_title('Distribución por Sexo')
-                ax.set_xlabel('Sexo')
-                ax.set_ylabel('Cantidad')
-            
-            # Si no hay datos por sexo, intentar por estado
-            elif 'Nombre departamento' in df_filtrado.columns and not df_filtrado['Nombre departamento'].isna().all():
-                conteo_estado = df_filtrado['Nombre departamento'].value_counts()
-                conteo_estado.plot(kind='bar', ax=ax)
-                ax.set_title('Distribución por Estado')
-                ax.set_xlabel('Nombre departamento')
-                ax.set_ylabel('Cantidad')
-            
-            # Si ninguno de los anteriores está disponible
+            # Si no hay datos por sexo ni por estado
             else:
-                ax.text(0.5, 0.5, 'No hay datos suficientes para graficar',
-                       horizontalalignment='center', verticalalignment='center')
-            
-            # Ajustar el tamaño del gráfico y refrescar el canvas
-            self.figure.tight_layout()
-            self.canvas.draw()
+                self.grafico.texto('No hay datos suficientes para graficar')
             
         except Exception as e:
             print(f"Error al graficar: {e}")
@@ -364,16 +1034,39 @@ class MainWindow(QMainWindow):
     
     def abrir_analisis_avanzado(self):
         """Abre la ventana de análisis epidemiológico avanzado"""
+        if not self.sin_modo_en_disco("El análisis avanzado"):
+            return
         if not hasattr(self, 'df') or self.df.empty:
             QMessageBox.warning(self, "Advertencia", "No hay datos para analizar.")
             return
             
-        # Abre la ventana de análisis avanzado
-        abrir_analisis_avanzado(self.df)
+        # Importar la ventana de análisis avanzado la primera vez que se abre
+        try:
+            from ventana_analisis_avanzado import abrir_analisis_avanzado
+        except ImportError:
+            QMessageBox.warning(self, "Módulo no disponible", "El módulo de análisis avanzado no está disponible.")
+            return
+        
+        # Abre la ventana de análisis avanzado, reutilizando la de aperturas anteriores
+        self.ventana_avanzada = abrir_analisis_avanzado(self.analizador, self.ventana_avanzada, self)
+    
+    def actualizar_ventana_avanzada(self):
+        """Pasa los datos nuevos a la ventana de análisis avanzado, si ya se creó"""
+        if self.dataset_disco is not None:
+            return  # El análisis avanzado no está disponible fuera de memoria
+        if self.ventana_avanzada is not None and self.ventana_avanzada.analizador is not self.analizador:
+            self.ventana_avanzada.establecer_analizador(self.analizador)
 
 # Punto de entrada de la aplicación
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = MainWindow()
+    if '--rendimiento' in sys.argv:
+        # Registrar tiempos y memoria desde el arranque
+        window.accion_rendimiento.setChecked(True)
+    if '--perfil-arranque' in sys.argv:
+        # Informe de tiempos de arranque (ver perfil_arranque.py)
+        import perfil_arranque
+        perfil_arranque.seguir_arranque(window, INICIO_ARRANQUE, salir='--salir-tras-pintar' in sys.argv)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,174 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class ModeloTablaDataFrame(QAbstractTableModel):
+    """
+    Modelo de tabla virtual sobre un DataFrame.
+
+    No copia ni formatea los datos por adelantado: cada celda se convierte
+    a texto solo cuando la vista la pide en data(). El filtrado se aplica
+    como un arreglo de posiciones de fila que se puede reemplazar sin
+    reconstruir el modelo.
+    """
+
+    def __init__(self, df=None, parent=None):
+        super(ModeloTablaDataFrame, self).__init__(parent)
+        self.df = None
+        self._columnas = []
+        self._encabezados = []
+        self._filas = None
+        if df is not None:
+            self.establecer_datos(df)
+
+    def establecer_datos(self, df, filas=None):
+        """
+        Reemplaza el DataFrame mostrado
+
+        Args:
+            df (pandas.DataFrame): Datos completos
+            filas (numpy.ndarray, opcional): Posiciones de fila visibles (None: todas)
+        """
+        self.beginResetModel()
+        self.df = df
+        self._encabezados = [str(col) for col in df.columns]
+        # Arreglos por columna: acceso directo por posición sin pasar por iloc
+        self._columnas = [df[col].array for col in df.columns]
+        self._filas = filas
+        self.endResetModel()
+
+    def establecer_filas(self, filas):
+        """
+        Cambia las filas visibles manteniendo el mismo modelo
+
+        Args:
+            filas (numpy.ndarray o None): Posiciones de fila visibles (None: todas)
+        """
+        self.beginResetModel()
+        self._filas = filas
+        self.endResetModel()
+
+    def posicion_fila(self, fila):
+        """Devuelve la posición en el DataFrame de una fila visible"""
+        return int(self._filas[fila]) if self._filas is not None else fila
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.df is None:
+            return 0
+        return len(self._filas) if self._filas is not None else len(self.df)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._columnas)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        valor = self._columnas[index.column()][self.posicion_fila(index.row())]
+        return formatear_valor(valor)
+
+    def headerData(self, seccion, orientacion, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientacion == Qt.Orientation.Horizontal:
+            return self._encabezados[seccion] if seccion < len(self._encabezados) else None
+        return str(seccion + 1)
+
+
+class ModeloTablaEnDisco(QAbstractTableModel):
+    """
+    Modelo de tabla sobre un DatasetEnDisco (modo fuera de memoria).
+
+    Las filas se leen de disco por páginas cuando la vista las pide y se
+    conservan solo las páginas usadas más recientemente, de modo que la
+    memoria de la tabla no depende del tamaño del dataset.
+    """
+
+    def __init__(self, dataset, filas=None, filas_por_pagina=500, max_paginas=20, parent=None):
+        """
+        Args:
+            dataset (DatasetEnDisco): Datos en disco
+            filas (numpy.ndarray, opcional): Posiciones de fila visibles (None: todas)
+            filas_por_pagina (int): Filas leídas de disco de una vez
+            max_paginas (int): Páginas conservadas en memoria
+        """
+        super(ModeloTablaEnDisco, self).__init__(parent)
+        self.df = dataset
+        self._encabezados = [str(col) for col in dataset.columnas]
+        self._filas = filas
+        self.filas_por_pagina = filas_por_pagina
+        self.max_paginas = max_paginas
+        self._paginas = OrderedDict()
+
+    def establecer_filas(self, filas):
+        """
+        Cambia las filas visibles (descarta las páginas leídas)
+
+        Args:
+            filas (numpy.ndarray o None): Posiciones de fila visibles (None: todas)
+        """
+        self.beginResetModel()
+        self._filas = filas
+        self._paginas.clear()
+        self.endResetModel()
+
+    def posicion_fila(self, fila):
+        """Devuelve la posición en el dataset de una fila visible"""
+        return int(self._filas[fila]) if self._filas is not None else fila
+
+    def _pagina(self, numero):
+        """Columnas (arreglos) de una página de filas visibles, leída de disco si hace falta"""
+        if numero in self._paginas:
+            self._paginas.move_to_end(numero)
+            return self._paginas[numero]
+
+        inicio = numero * self.filas_por_pagina
+        fin = min(inicio + self.filas_por_pagina, self.rowCount())
+        posiciones = self._filas[inicio:fin] if self._filas is not None else np.arange(inicio, fin)
+        datos = self.df.leer_filas(posiciones)
+        pagina = [datos[col].array for col in datos.columns]
+
+        self._paginas[numero] = pagina
+        if len(self._paginas) > self.max_paginas:
+            self._paginas.popitem(last=False)
+        return pagina
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._filas) if self._filas is not None else len(self.df)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._encabezados)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        numero, desplazamiento = divmod(index.row(), self.filas_por_pagina)
+        return formatear_valor(self._pagina(numero)[index.column()][desplazamiento])
+
+    def headerData(self, seccion, orientacion, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientacion == Qt.Orientation.Horizontal:
+            return self._encabezados[seccion] if seccion < len(self._encabezados) else None
+        return str(seccion + 1)
+
+
+def formatear_valor(valor):
+    """Convierte un valor de celda a texto (vacío para valores nulos)"""
+    if valor is None or valor is pd.NA or valor is pd.NaT:
+        return ''
+    if isinstance(valor, (float, np.floating)) and np.isnan(valor):
+        return ''
+    if isinstance(valor, pd.Timestamp):
+        # Las fechas del INS no tienen hora: mostrar solo el día
+        return valor.strftime('%Y-%m-%d') if valor == valor.normalize() else str(valor)
+    return str(valor)
@@ -0,0 +1,145 @@
+"""
+Informe de tiempos de arranque de la aplicación.
+
+Uso:
+    python perfil_arranque.py [--top N]
+
+Mide en procesos aparte el costo de importar main (con -X importtime) y
+el tiempo hasta el primer pintado de la ventana principal. La aplicación
+también acepta 'python main.py --perfil-arranque' para imprimir el
+tiempo hasta el primer pintado y hasta la carga de los datos.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Módulos pesados cuya carga se informa en el primer pintado
+MODULOS_PESADOS = ['numpy', 'pandas', 'pyarrow', 'matplotlib', 'matplotlib.pyplot', 'seaborn',
+                   'analizador_epidemiologico', 'ventana_analisis_avanzado']
+
+# Variable de entorno con el instante (time.time()) en que se lanzó el proceso
+VARIABLE_INICIO = 'PERFIL_ARRANQUE_INICIO'
+
+
+def segundos_desde_inicio(inicio_modulo):
+    """
+    Segundos transcurridos desde el lanzamiento del proceso si quien lo
+    lanzó dejó el instante en VARIABLE_INICIO; si no, desde inicio_modulo
+    (time.perf_counter() al comenzar main, sin el arranque del intérprete)
+    """
+    if VARIABLE_INICIO in os.environ:
+        return time.time() - float(os.environ[VARIABLE_INICIO])
+    return time.perf_counter() - inicio_modulo
+
+
+def seguir_arranque(ventana, inicio_modulo, salir=False):
+    """
+    Imprime el tiempo hasta el primer pintado de la ventana y hasta que
+    termina la carga de los datos
+
+    Args:
+        ventana (MainWindow): Ventana principal, antes de mostrarla
+        inicio_modulo (float): time.perf_counter() al comenzar main
+        salir (bool): Cerrar la aplicación tras el primer pintado
+    """
+    from PyQt6.QtCore import QEvent, QObject
+    from PyQt6.QtWidgets import QApplication
+
+    class FiltroPrimerPintado(QObject):
+        def eventFilter(self, objeto, evento):
+            if evento.type() == QEvent.Type.Paint:
+                objeto.removeEventFilter(self)
+                cargados = [nombre for nombre in MODULOS_PESADOS if nombre in sys.modules]
+                print(f"Primer pintado: {segundos_desde_inicio(inicio_modulo) * 1000:.0f} ms")
+                print(f"Módulos pesados ya cargados: {', '.join(cargados) or 'ninguno'}")
+                if salir:
+                    ventana.cancelar_carga()
+                    QApplication.instance().quit()
+            return False
+
+    ventana.filtro_primer_pintado = FiltroPrimerPintado(ventana)
+    ventana.installEventFilter(ventana.filtro_primer_pintado)
+
+    def datos_cargados():
+        ventana.datos_actualizados.disconnect(datos_cargados)
+        print(f"Datos cargados: {segundos_desde_inicio(inicio_modulo) * 1000:.0f} ms")
+
+    ventana.datos_actualizados.connect(datos_cargados)
+
+
+def medir_importaciones(modulo, directorio):
+    """
+    Importa un módulo en un proceso nuevo con -X importtime
+
+    Args:
+        modulo (str): Módulo a importar
+        directorio (str): Directorio donde está el módulo
+
+    Returns:
+        list: (módulo, µs propios, µs acumulados, profundidad) en orden de importación
+    """
+    codigo = f'import sys; sys.path.insert(0, {directorio!r}); import {modulo}'
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                             capture_output=True, text=True)
+    registros = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        profundidad = (len(nombre) - len(nombre.lstrip())) // 2
+        registros.append((nombre.strip(), int(propio), int(acumulado), profundidad))
+    return registros
+
+
+def resumen_importaciones(registros, top=15):
+    """
+    Texto con los módulos importados directamente por el módulo medido,
+    ordenados por tiempo acumulado
+    """
+    if not registros:
+        return "No se pudieron medir las importaciones"
+    total = registros[-1][2]
+
+    # Las importaciones del módulo medido van desde la anterior de nivel 0
+    # (las del arranque del intérprete) hasta la suya, que es la última
+    inicio = max((i + 1 for i, r in enumerate(registros[:-1]) if r[3] == 0), default=0)
+    directos = [r for r in registros[inicio:-1] if r[3] == 1]
+    directos.sort(key=lambda r: r[2], reverse=True)
+
+    lineas = [f"Importación de {registros[-1][0]}: {total / 1000:.0f} ms", f"{'ms':>8} {'%':>6}  módulo"]
+    for nombre, _, acumulado, _ in directos[:top]:
+        lineas.append(f"{acumulado / 1000:8.1f} {100 * acumulado / total:5.1f}%  {nombre}")
+    return '\n'.join(lineas)
+
+
+def medir_primer_pintado(directorio):
+    """
+    Lanza la aplicación (desde el directorio de trabajo actual, donde están
+    la interfaz y el dataset), espera su primer pintado y la cierra
+
+    Args:
+        directorio (str): Directorio donde está main.py
+
+    Returns:
+        str: Salida del informe de la aplicación
+    """
+    entorno = dict(os.environ)
+    entorno[VARIABLE_INICIO] = repr(time.time())
+    proceso = subprocess.run([sys.executable, os.path.join(directorio, 'main.py'),
+                              '--perfil-arranque', '--salir-tras-pintar'],
+                             capture_output=True, text=True, env=entorno)
+    return '\n'.join(linea for linea in proceso.stdout.splitlines()
+                     if linea.startswith(('Primer pintado', 'Módulos pesados')))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Informe de tiempos de arranque de la aplicación')
+    parser.add_argument('--top', type=int, default=15, help='Módulos a mostrar en el desglose')
+    args = parser.parse_args()
+
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    print(resumen_importaciones(medir_importaciones('main', directorio), args.top))
+    print()
+    print(medir_primer_pintado(directorio) or "No se pudo medir el primer pintado")
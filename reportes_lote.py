@@ -0,0 +1,236 @@
+"""
+Generación de reportes en lote, sin interfaz gráfica.
+
+Uso:
+    python reportes_lote.py dataset.csv [otro.csv ...] --particion "Nombre departamento" [--salida reportes] [--procesos N]
+
+Para cada dataset se genera el conjunto completo de gráficos sobre todos
+los casos y sobre cada valor de las columnas de partición (p. ej. cada
+departamento). Los gráficos se dibujan en un pool de procesos con el
+backend Agg. Cada dataset se carga una sola vez: con el método 'fork' los
+procesos heredan el DataFrame ya cargado; en otro caso cada proceso lo
+lee una vez desde la caché columnar. El resultado es un directorio de
+imágenes y un índice 'indice.json'.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from analizador_epidemiologico import AnalizadorEpidemiologico
+from carga_datos import cargar_dataset
+
+# Rangos de edad de los gráficos de distribución
+BINS_EDAD = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 120]
+
+# Gráficos de cada reporte: nombre -> (tamaño de la figura, función que dibuja en un axes)
+GRAFICOS_REPORTE = {
+    'incidencia_mensual': ((12, 6), lambda analizador, ax: analizador.graficar_incidencia(periodo='M', ax=ax)),
+    'distribucion_edad': ((10, 6), lambda analizador, ax: analizador.graficar_distribucion_por_grupo(
+        'Edad', bins=BINS_EDAD, ax=ax)),
+    'mortalidad_sexo': ((8, 6), lambda analizador, ax: analizador.graficar_tasa_mortalidad(por_grupo='Sexo', ax=ax)),
+    'fallecidos_total': ((6, 3), lambda analizador, ax: analizador.graficar_fallecidos(ax=ax)),
+    'fallecidos_edad': ((12, 6), lambda analizador, ax: analizador.graficar_distribucion_Edad_fallecidos(ax=ax)),
+    'fallecidos_contagio': ((12, 6), lambda analizador, ax: analizador.graficar_fallecidos_por_contagio(ax=ax)),
+}
+
+# Gráficos que solo tienen datos si hay fallecidos: en las particiones sin
+# fallecidos se guardan con un aviso en lugar de los datos
+GRAFICOS_FALLECIDOS = ('fallecidos_edad', 'fallecidos_contagio')
+
+# Valor de partición del reporte sobre todos los casos
+TODOS = 'Todos'
+
+# Datasets cargados en este proceso: ruta -> DataFrame. El proceso
+# principal los llena antes de crear el pool para que, con 'fork', los
+# procesos los hereden sin copiarlos ni volver a leerlos.
+_datasets = {}
+
+
+def nombre_archivo(texto):
+    """Convierte un texto (p. ej. 'BOGOTÁ, D.C.') en un nombre de archivo seguro"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    texto = re.sub(r'[^A-Za-z0-9]+', '_', texto).strip('_').lower()
+    return texto or 'sin_nombre'
+
+
+def _inicializar_proceso(rutas):
+    """Carga en el proceso los datasets que no haya heredado del principal"""
+    for ruta in rutas:
+        if ruta not in _datasets:
+            _datasets[ruta] = cargar_dataset(ruta)
+
+
+def guardar_grafico(analizador, nombre, ruta, dpi):
+    """
+    Dibuja uno de GRAFICOS_REPORTE en una figura propia y la guarda
+
+    Args:
+        analizador (AnalizadorEpidemiologico): Analizador con los datos de la partición
+        nombre (str): Clave del gráfico en GRAFICOS_REPORTE
+        ruta (str): Archivo de imagen de salida
+        dpi (int): Resolución de la imagen
+    """
+    tamano, dibujar = GRAFICOS_REPORTE[nombre]
+    figure = Figure(figsize=tamano)
+    FigureCanvasAgg(figure)
+    dibujar(analizador, figure.add_subplot(111))
+    figure.tight_layout()
+    figure.savefig(ruta, dpi=dpi)
+
+
+def guardar_grafico_vacio(nombre, ruta, dpi, texto='Sin fallecidos'):
+    """Guarda uno de GRAFICOS_REPORTE sin datos, solo con un aviso"""
+    tamano, _ = GRAFICOS_REPORTE[nombre]
+    figure = Figure(figsize=tamano)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    ax.text(0.5, 0.5, texto, fontsize=24, ha='center', va='center', color='gray')
+    ax.axis('off')
+    figure.savefig(ruta, dpi=dpi)
+
+
+def generar_reporte(ruta_dataset, columna, valor, posiciones, directorio, dpi=100):
+    """
+    Genera todos los gráficos de una partición (se ejecuta en un proceso del pool)
+
+    Args:
+        ruta_dataset (str): Dataset ya cargado en _datasets
+        columna (str o None): Columna de partición (None: todos los casos)
+        valor (str): Valor de la partición
+        posiciones (numpy.ndarray o None): Filas de la partición (None: todas)
+        directorio (str): Directorio donde guardar las imágenes
+        dpi (int): Resolución de las imágenes
+
+    Returns:
+        dict: Entrada del índice del reporte
+    """
+    inicio = time.perf_counter()
+    df = _datasets[ruta_dataset]
+    if posiciones is not None:
+        df = df.iloc[posiciones]
+    analizador = AnalizadorEpidemiologico(dataframe=df)
+
+    os.makedirs(directorio, exist_ok=True)
+    entrada = {
+        'dataset': ruta_dataset,
+        'particion': columna,
+        'valor': valor,
+        'casos': len(df),
+        'fallecidos': int(analizador.calcular_fallecidos()),
+        'graficos': {},
+        'errores': {},
+    }
+    for nombre in GRAFICOS_REPORTE:
+        ruta = os.path.join(directorio, f'{nombre}.png')
+        try:
+            if entrada['fallecidos'] == 0 and nombre in GRAFICOS_FALLECIDOS:
+                # Partición sin fallecidos: un caso normal, no un error
+                guardar_grafico_vacio(nombre, ruta, dpi)
+            else:
+                guardar_grafico(analizador, nombre, ruta, dpi)
+            entrada['graficos'][nombre] = ruta
+        except Exception as e:
+            entrada['errores'][nombre] = str(e)
+    entrada['segundos'] = round(time.perf_counter() - inicio, 3)
+    return entrada
+
+
+def tareas_dataset(ruta, df, particiones, salida):
+    """
+    Enumera los reportes de un dataset: uno sobre todos los casos y uno por
+    cada valor de cada columna de partición
+
+    Returns:
+        list: Argumentos de generar_reporte (sin dpi)
+    """
+    base = os.path.join(salida, nombre_archivo(os.path.splitext(os.path.basename(ruta))[0]))
+    tareas = [(ruta, None, TODOS, None, os.path.join(base, nombre_archivo(TODOS)))]
+    for columna in particiones:
+        if columna not in df.columns:
+            print(f"La columna de partición {columna} no existe en {ruta}")
+            continue
+        # Posiciones de las filas de cada valor, en una sola pasada
+        grupos = df.groupby(columna, observed=True, sort=True).indices
+        for valor, posiciones in grupos.items():
+            directorio = os.path.join(base, nombre_archivo(columna), nombre_archivo(valor))
+            tareas.append((ruta, columna, str(valor), posiciones, directorio))
+    return tareas
+
+
+def generar_reportes(rutas, particiones, salida='reportes', procesos=None, dpi=100):
+    """
+    Genera los reportes de varios datasets en un pool de procesos
+
+    Args:
+        rutas (list): Rutas de los CSV
+        particiones (list): Columnas cuyos valores generan un reporte cada uno
+        salida (str): Directorio de salida
+        procesos (int, opcional): Procesos del pool (por defecto, uno por CPU)
+        dpi (int): Resolución de las imágenes
+
+    Returns:
+        dict: Índice de los reportes generados (también se guarda en salida/indice.json)
+    """
+    inicio = time.perf_counter()
+    tareas = []
+    for ruta in rutas:
+        _datasets[ruta] = cargar_dataset(ruta)
+        print(f"{ruta}: {len(_datasets[ruta]):,} registros")
+        tareas.extend(tareas_dataset(ruta, _datasets[ruta], particiones, salida))
+
+    # Con 'fork' los procesos heredan _datasets; si no está disponible,
+    # cada proceso lee los datasets una vez al iniciar
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+    rutas_a_cargar = [] if contexto.get_start_method() == 'fork' else list(rutas)
+
+    reportes = []
+    with ProcessPoolExecutor(max_workers=procesos or os.cpu_count(), mp_context=contexto,
+                             initializer=_inicializar_proceso, initargs=(rutas_a_cargar,)) as pool:
+        futuros = [pool.submit(generar_reporte, *tarea, dpi=dpi) for tarea in tareas]
+        for i, futuro in enumerate(as_completed(futuros), 1):
+            entrada = futuro.result()
+            reportes.append(entrada)
+            estado = f", errores: {', '.join(entrada['errores'])}" if entrada['errores'] else ''
+            print(f"[{i}/{len(tareas)}] {entrada['particion'] or ''} {entrada['valor']} "
+                  f"({entrada['casos']:,} casos) {entrada['segundos']:.1f} s{estado}")
+
+    reportes.sort(key=lambda entrada: (entrada['dataset'], entrada['particion'] or '', entrada['valor']))
+    indice = {
+        'generado': datetime.now().isoformat(timespec='seconds'),
+        'datasets': list(rutas),
+        'particiones': list(particiones),
+        'graficos': list(GRAFICOS_REPORTE),
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'reportes': reportes,
+    }
+    os.makedirs(salida, exist_ok=True)
+    with open(os.path.join(salida, 'indice.json'), 'w', encoding='utf-8') as archivo:
+        json.dump(indice, archivo, ensure_ascii=False, indent=2)
+    return indice
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera reportes gráficos por partición sin interfaz')
+    parser.add_argument('datasets', nargs='+', help='Archivos CSV a procesar')
+    parser.add_argument('--particion', action='append', default=[],
+                        help='Columna de partición (se puede repetir), p. ej. "Nombre departamento"')
+    parser.add_argument('--salida', default='reportes', help='Directorio de salida')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos del pool (por defecto, uno por CPU)')
+    parser.add_argument('--dpi', type=int, default=100, help='Resolución de las imágenes')
+    args = parser.parse_args()
+
+    indice = generar_reportes(args.datasets, args.particion, args.salida, args.procesos, args.dpi)
+    print(f"{len(indice['reportes'])} reportes generados en {indice['segundos']:.1f} s. "
+          f"Índice: {os.path.join(args.salida, 'indice.json')}")
@@ -0,0 +1,136 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import analizador_epidemiologico
+from analizador_epidemiologico import AnalizadorEpidemiologico
+from estadistica import intervalo_wilson
+
+
+def datos_sinteticos(n=2000, semilla=7):
+    """Casos aleatorios con las columnas que usan las tablas de mortalidad"""
+    rng = np.random.default_rng(semilla)
+    edades = pd.array(rng.integers(0, 100, n), dtype='Int16')
+    edades[rng.random(n) < 0.02] = pd.NA
+    departamentos = rng.choice(['ANTIOQUIA', 'BOGOTA', 'CHOCO', 'VALLE'], n).astype(object)
+    departamentos[rng.random(n) < 0.02] = None
+    return pd.DataFrame({
+        'Nombre departamento': pd.Categorical(departamentos),
+        'Sexo': pd.Categorical(rng.choice(['F', 'M'], n)),
+        'Edad': edades,
+        'Edad en años': edades.copy(),
+        'Ubicación del caso': rng.choice(['Casa', 'Hospital', 'Hospital UCI'], n),
+        'Estado': pd.Categorical(rng.choice(['Leve', 'Moderado', 'Fallecido'], n, p=[0.6, 0.3, 0.1])),
+    })
+
+
+def tabla_groupby(df, columnas, confianza=0.95):
+    """Tabla de referencia con un groupby de pandas"""
+    fallecido = df['Estado'].astype(str).str.contains('Fallecido')
+    grupos = df.assign(fallecido=fallecido).groupby(columnas, observed=True, dropna=True)['fallecido']
+    tabla = pd.DataFrame({'casos': grupos.size(), 'fallecidos': grupos.sum()}).astype(np.int64)
+    tabla['tasa'] = tabla['fallecidos'] / tabla['casos'] * 100
+    inferior, superior = intervalo_wilson(tabla['fallecidos'], tabla['casos'], confianza)
+    tabla['ic_inferior'], tabla['ic_superior'] = inferior * 100, superior * 100
+    return tabla
+
+
+def tasa_groupby(df, columna):
+    """Tasa de mortalidad por valor con un groupby de pandas, ordenada por valor"""
+    fallecido = df['Estado'].astype(str).str.contains('Fallecido')
+    return fallecido.groupby(df[columna], observed=True).mean().sort_index() * 100
+
+
+class PruebasTablaMortalidad(unittest.TestCase):
+
+    def setUp(self):
+        self.df = datos_sinteticos()
+        self.analizador = AnalizadorEpidemiologico(self.df)
+
+    def comparar(self, obtenida, esperada):
+        obtenida = obtenida.copy()
+        obtenida.index = obtenida.index.map(lambda clave: clave if isinstance(clave, tuple) else (clave,))
+        esperada = esperada.copy()
+        esperada.index = esperada.index.map(lambda clave: clave if isinstance(clave, tuple) else (clave,))
+        pd.testing.assert_frame_equal(obtenida.sort_index(), esperada.sort_index(), check_names=False)
+
+    def test_igual_a_groupby(self):
+        """Combinaciones de departamento y sexo iguales a un groupby"""
+        columnas = ['Nombre departamento', 'Sexo']
+        obtenida = self.analizador.calcular_tabla_mortalidad(columnas)
+        self.assertEqual(list(obtenida.index.names), columnas)
+        self.comparar(obtenida, tabla_groupby(self.df, columnas))
+
+    def test_rangos_de_edad(self):
+        """Los rangos de edad cuentan igual que agrupar la edad cortada con pd.cut"""
+        bins = [0, 20, 40, 60, 80, 100]
+        obtenida = self.analizador.calcular_tabla_mortalidad(['Sexo', 'Edad'], bins={'Edad': bins})
+        etiquetas = [f'{bins[i]}-{bins[i + 1] - 1}' for i in range(len(bins) - 1)]
+        df = self.df.assign(Edad=pd.cut(self.df['Edad'].astype(float), bins, labels=etiquetas, right=False))
+        self.comparar(obtenida, tabla_groupby(df, ['Sexo', 'Edad']))
+
+    def test_combinaciones_dispersas(self):
+        """Con demasiadas combinaciones posibles se cuentan solo las presentes, con el mismo resultado"""
+        columnas = ['Nombre departamento', 'Ubicación del caso', 'Edad']
+        densa = self.analizador.calcular_tabla_mortalidad(columnas)
+        with mock.patch.object(analizador_epidemiologico, 'COMBINACIONES_MAXIMAS_DENSAS', 1):
+            dispersa = AnalizadorEpidemiologico(self.df).calcular_tabla_mortalidad(columnas)
+            with self.assertRaises(ValueError):
+                AnalizadorEpidemiologico(self.df).calcular_tabla_mortalidad(columnas, incluir_vacios=True)
+        pd.testing.assert_frame_equal(dispersa, densa)
+        self.comparar(dispersa, tabla_groupby(self.df, columnas))
+
+    def test_incluir_vacios(self):
+        """Las combinaciones sin casos aparecen con tasa e intervalo NaN"""
+        tabla = self.analizador.calcular_tabla_mortalidad(['Nombre departamento', 'Sexo'], incluir_vacios=True)
+        self.assertEqual(len(tabla), 8)
+        vacias = tabla[tabla['casos'] == 0]
+        self.assertTrue(vacias[['tasa', 'ic_inferior', 'ic_superior']].isna().all().all())
+
+    def test_intervalo_wilson(self):
+        """El intervalo contiene la tasa y no se sale de [0, 100]"""
+        tabla = self.analizador.calcular_tabla_mortalidad('Ubicación del caso', confianza=0.99)
+        self.assertTrue((tabla['ic_inferior'] <= tabla['tasa']).all())
+        self.assertTrue((tabla['tasa'] <= tabla['ic_superior']).all())
+        self.assertTrue(((tabla['ic_inferior'] >= 0) & (tabla['ic_superior'] <= 100)).all())
+        inferior, superior = intervalo_wilson(np.array([0.]), np.array([10.]))
+        self.assertAlmostEqual(inferior[0], 0)
+        self.assertGreater(superior[0], 0)
+
+
+class PruebasTasaMortalidad(unittest.TestCase):
+
+    def setUp(self):
+        self.df = datos_sinteticos()
+        self.analizador = AnalizadorEpidemiologico(self.df)
+
+    def test_columna_del_cubo(self):
+        """Una columna del cubo da la misma tasa que un groupby"""
+        obtenida = self.analizador.calcular_tasa_mortalidad('Nombre departamento')
+        esperada = tasa_groupby(self.df, 'Nombre departamento')
+        np.testing.assert_allclose(obtenida.to_numpy(dtype=float), esperada.to_numpy())
+        self.assertEqual(list(obtenida.index), list(esperada.index))
+
+    def test_columna_fuera_del_cubo(self):
+        """Fuera del cubo la tasa es la del groupby, ordenada por valor como en el cubo"""
+        obtenida = self.analizador.calcular_tasa_mortalidad('Ubicación del caso')
+        esperada = tasa_groupby(self.df, 'Ubicación del caso')
+        np.testing.assert_allclose(obtenida.to_numpy(dtype=float), esperada.to_numpy())
+        self.assertEqual(list(obtenida.index), list(esperada.index))
+        self.assertEqual(obtenida.index.name, 'Ubicación del caso')
+
+    def test_rangos_igual_que_el_cubo(self):
+        """Los rangos de una columna fuera del cubo coinciden con los de la misma columna en el cubo"""
+        bins = [0, 18, 40, 60, 80, 120]
+        cubo = self.analizador.calcular_tasa_mortalidad('Edad', bins)
+        fuera = self.analizador.calcular_tasa_mortalidad('Edad en años', bins)
+        self.assertEqual(cubo.index.name, 'grupo_Edad')
+        self.assertEqual(fuera.index.name, 'grupo_Edad en años')
+        self.assertEqual(list(fuera.index), list(cubo.index))
+        np.testing.assert_allclose(fuera.to_numpy(dtype=float), cubo.to_numpy(dtype=float))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from carga_datos import fusionar_delta
+from filtros import MotorFiltros
+
+
+def datos_base():
+    """Dataset pequeño con una fila por caso"""
+    return pd.DataFrame({
+        'Id de caso': pd.array([1, 2, 3, 4, 5, 6], dtype='Int64'),
+        'Fecha reporte web': pd.to_datetime(['2020-03-01', '2020-03-01', '2020-03-02',
+                                             '2020-03-02', '2020-03-03', '2020-03-03']),
+        'Sexo': pd.Categorical(['F', 'M', 'F', 'M', 'F', 'M']),
+        'Nombre departamento': pd.Categorical(['ANTIOQUIA', 'ANTIOQUIA', 'CHOCO', 'VALLE', 'VALLE', 'CHOCO']),
+        'Código divipola municipio': pd.array([5001, 5001, 27001, 76001, 76111, 27001], dtype='Int32'),
+        'Edad': pd.array([30, 45, 70, 12, 88, 50], dtype='Int16'),
+    })
+
+
+def datos_actualizacion():
+    """
+    Actualización sin la columna 'Edad': los casos 2 y 5 cambian (más
+    recientes), el 3 llega con una versión más antigua y los 7 y 8 son nuevos
+    """
+    return pd.DataFrame({
+        'Id de caso': pd.array([2, 3, 5, 7, 8], dtype='Int64'),
+        'Fecha reporte web': pd.to_datetime(['2020-03-05', '2020-03-01', '2020-03-03',
+                                             '2020-03-05', '2020-03-06']),
+        'Sexo': pd.Categorical(['F', 'M', 'M', 'F', 'M']),
+        'Nombre departamento': pd.Categorical(['VALLE', 'VALLE', 'AMAZONAS', 'AMAZONAS', 'CHOCO']),
+        'Código divipola municipio': pd.array([76001, 76001, 91001, 91001, 27001], dtype='Int32'),
+    })
+
+
+def como_objetos(df):
+    """Valores de un DataFrame como objetos, con None en los nulos"""
+    df = df.astype(object).reset_index(drop=True)
+    return df.where(df.notna(), None)
+
+
+def reconstruir(df, delta):
+    """Fusión de referencia, fila a fila"""
+    filas = {int(fila['Id de caso']): fila.to_dict() for _, fila in df.astype(object).iterrows()}
+    for _, fila in delta.astype(object).iterrows():
+        caso = int(fila['Id de caso'])
+        actual = filas.get(caso)
+        if actual is not None and fila['Fecha reporte web'] < actual['Fecha reporte web']:
+            continue
+        nueva = dict(actual) if actual is not None else {col: None for col in df.columns}
+        nueva.update(fila.to_dict())
+        filas[caso] = nueva
+    return pd.DataFrame(list(filas.values()), columns=df.columns)
+
+
+class PruebasFusionarDelta(unittest.TestCase):
+
+    def test_igual_a_reconstruir(self):
+        """Casos actualizados, ignorados y nuevos: igual que rehacer la fusión fila a fila"""
+        df, delta = datos_base(), datos_actualizacion()
+        resultado = fusionar_delta(df, delta)
+
+        esperado = reconstruir(df, delta)
+        pd.testing.assert_frame_equal(como_objetos(resultado.df), como_objetos(esperado))
+        self.assertEqual(sorted(resultado.posiciones_modificadas.tolist()), [1, 4])
+        self.assertEqual(resultado.n_anexadas, 2)
+        self.assertEqual(resultado.n_ignoradas, 1)
+
+    def test_columna_ausente_conserva_valor(self):
+        """Una columna que falta en la actualización no borra el valor de los casos actualizados"""
+        resultado = fusionar_delta(datos_base(), datos_actualizacion())
+        edades = resultado.df['Edad']
+        self.assertEqual(edades.iloc[1], 45)
+        self.assertEqual(edades.iloc[4], 88)
+        self.assertTrue(edades.iloc[6:].isna().all())
+
+    def test_indice_actualizado(self):
+        """El índice devuelto encuentra los casos existentes y los nuevos"""
+        resultado = fusionar_delta(datos_base(), datos_actualizacion())
+        self.assertEqual(resultado.indice.buscar([1, 5, 7, 8, 9]).tolist(), [0, 4, 6, 7, -1])
+
+
+class PruebasMotorActualizado(unittest.TestCase):
+
+    def test_igual_a_reconstruir(self):
+        """El motor actualizado filtra igual que uno construido sobre los datos fusionados"""
+        df = datos_base()
+        resultado = fusionar_delta(df, datos_actualizacion())
+        actualizado = MotorFiltros(df).actualizado(resultado.df, resultado.posiciones_modificadas)
+        reconstruido = MotorFiltros(resultado.df)
+
+        consultas = [
+            ({}, None),
+            ({'Sexo': 'F'}, None),
+            ({'Nombre departamento': 'AMAZONAS'}, None),
+            ({'Nombre departamento': 'VALLE', 'Sexo': 'M'}, None),
+            ({'Código divipola municipio': 76001}, None),
+            ({'Código divipola municipio': 27001, 'Sexo': 'M'}, None),
+            ({}, 40),
+            ({'Sexo': 'F'}, 30),
+        ]
+        for igualdades, edad_minima in consultas:
+            with self.subTest(igualdades=igualdades, edad_minima=edad_minima):
+                obtenido = actualizado.filtrar(igualdades, edad_minima)
+                esperado = reconstruido.filtrar(igualdades, edad_minima)
+                if esperado is None:
+                    self.assertIsNone(obtenido)
+                else:
+                    np.testing.assert_array_equal(obtenido, esperado)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from carga_datos import fusionar_delta
+from curva_epidemica import TOTAL, CurvaEpidemica
+
+
+def casos_sinteticos(n=600, semilla=3):
+    """Casos aleatorios de tres departamentos a lo largo de 40 días"""
+    rng = np.random.default_rng(semilla)
+    fechas = pd.Timestamp('2020-04-01') + pd.to_timedelta(rng.integers(0, 40, n), unit='D')
+    regiones = rng.choice(['VALLE', 'ANTIOQUIA', 'CHOCO'], n).astype(object)
+    regiones[rng.random(n) < 0.03] = None
+    return pd.DataFrame({
+        'Id de caso': pd.array(np.arange(1, n + 1), dtype='Int64'),
+        'Fecha reporte web': pd.Timestamp('2020-05-15'),
+        'Nombre departamento': pd.Categorical(regiones),
+        'fecha de diagnóstico': fechas,
+    })
+
+
+def actualizacion(df):
+    """Cambia la región y la fecha de algunos casos y agrega casos nuevos, uno de un departamento nuevo"""
+    modificados = df.iloc[[5, 50, 120]].copy()
+    modificados['Nombre departamento'] = ['CHOCO', 'AMAZONAS', 'VALLE']
+    modificados['fecha de diagnóstico'] = pd.to_datetime(['2020-04-20', '2020-05-02', '2020-04-03'])
+    nuevos = pd.DataFrame({
+        'Id de caso': pd.array([10_001, 10_002, 10_003], dtype='Int64'),
+        'Nombre departamento': ['BOYACA', 'VALLE', None],
+        'fecha de diagnóstico': pd.to_datetime(['2020-05-12', '2020-05-10', '2020-05-11']),
+    })
+    delta = pd.concat([modificados, nuevos], ignore_index=True)
+    delta['Fecha reporte web'] = pd.Timestamp('2020-05-16')
+    delta['Nombre departamento'] = pd.Categorical(delta['Nombre departamento'])
+    return delta
+
+
+class PruebasCurvaActualizada(unittest.TestCase):
+
+    def setUp(self):
+        self.df = casos_sinteticos()
+        self.curva = CurvaEpidemica.desde_dataframe(self.df)
+        self.fusion = fusionar_delta(self.df, actualizacion(self.df))
+        self.actualizada = self.curva.actualizada(self.fusion.filas_anteriores,
+                                                  self.fusion.df.iloc[self.fusion.posiciones_cambiadas()])
+        self.reconstruida = CurvaEpidemica.desde_dataframe(self.fusion.df)
+
+    def test_casos_por_dia(self):
+        """Los casos diarios por región coinciden con los de un groupby"""
+        df = self.df.dropna(subset=['Nombre departamento'])
+        esperado = df.groupby(['Nombre departamento', 'fecha de diagnóstico'], observed=True).size()
+        casos = pd.DataFrame(self.curva.casos, index=self.curva.regiones, columns=self.curva.fechas)
+        for (region, fecha), cantidad in esperado.items():
+            self.assertEqual(casos.loc[region, fecha], cantidad)
+        self.assertEqual(casos.loc[TOTAL].sum(), len(self.df))
+
+    def test_igual_a_reconstruir(self):
+        """La curva actualizada es la misma que reconstruirla, con las regiones nuevas en orden"""
+        self.assertIsNotNone(self.actualizada)
+        self.assertEqual(list(self.actualizada.regiones), list(self.reconstruida.regiones))
+        self.assertEqual(self.actualizada.regiones[-1], TOTAL)
+        self.assertEqual(list(self.actualizada.regiones[:-1]), sorted(self.actualizada.regiones[:-1]))
+        np.testing.assert_array_equal(self.actualizada.casos, self.reconstruida.casos)
+        for indicador in ('promedio_movil', 'tasa_crecimiento', 'rt'):
+            with self.subTest(indicador=indicador):
+                pd.testing.assert_frame_equal(getattr(self.actualizada, indicador)(),
+                                              getattr(self.reconstruida, indicador)())
+
+    def test_no_modifica_la_original(self):
+        """Actualizar devuelve otra curva y deja la original intacta"""
+        np.testing.assert_array_equal(self.curva.casos, CurvaEpidemica.desde_dataframe(self.df).casos)
+        self.assertNotIn('BOYACA', self.curva.regiones)
+
+    def test_fecha_anterior_al_inicio(self):
+        """Con fechas anteriores al primer día hay que reconstruir la curva"""
+        anterior = self.df.iloc[:1].assign(**{'fecha de diagnóstico': pd.Timestamp('2020-03-01')})
+        self.assertIsNone(self.curva.actualizada(self.df.iloc[:0], anterior))
+
+    def test_indicadores_dia(self):
+        """Los indicadores de un día son los de las series completas en ese día"""
+        dia = self.reconstruida.indicadores_dia()
+        np.testing.assert_allclose(dia['promedio_7'], self.reconstruida.promedio_movil(7).iloc[-1])
+        np.testing.assert_allclose(dia['rt'], self.reconstruida.rt(7).iloc[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,21 @@
+import unittest
+
+import numpy as np
+
+from estadistica import histograma_con_kde
+
+
+class PruebasKdeAgrupada(unittest.TestCase):
+
+    def test_un_solo_valor(self):
+        """Todos los casos con la misma edad: rango de ancho cero (p. ej. un departamento pequeño)"""
+        histograma = histograma_con_kde(np.array([70.]), np.array([5.]))
+        self.assertEqual(histograma['conteos'].sum(), 5)
+        self.assertTrue(np.all(np.isfinite(histograma['y'])))
+        self.assertLessEqual(histograma['x'][0], 70)
+        self.assertGreaterEqual(histograma['x'][-1], 70)
+        self.assertGreater(histograma['y'].max(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from analizador_epidemiologico import AnalizadorEpidemiologico
+from filtros import MotorFiltros
+from geografia import Geografia, normalizar_nombre
+
+# (código de municipio, municipio, código de departamento, departamento)
+MUNICIPIOS = [
+    (5001, 'MEDELLÍN', 5, 'ANTIOQUIA'),
+    (5045, 'APARTADÓ', 5, 'ANTIOQUIA'),
+    (5400, 'LA UNIÓN', 5, 'ANTIOQUIA'),
+    (52399, 'LA UNIÓN', 52, 'NARIÑO'),
+    (52001, 'PASTO', 52, 'NARIÑO'),
+    (27001, 'QUIBDÓ', 27, 'CHOCO'),
+    (76001, 'CALI', 76, 'VALLE'),
+    (76111, 'BUGA', 76, 'VALLE'),
+]
+
+
+def casos_sinteticos(n=1500, semilla=11):
+    """Casos aleatorios repartidos entre MUNICIPIOS, con algunos códigos nulos"""
+    rng = np.random.default_rng(semilla)
+    elegidos = [MUNICIPIOS[i] for i in rng.integers(0, len(MUNICIPIOS), n)]
+    codigos_municipio = pd.array([m[0] for m in elegidos], dtype='Int32')
+    codigos_municipio[rng.random(n) < 0.02] = pd.NA
+    return pd.DataFrame({
+        'Código divipola departamento': pd.array([m[2] for m in elegidos], dtype='Int32'),
+        'Nombre departamento': pd.Categorical([m[3] for m in elegidos]),
+        'Código divipola municipio': codigos_municipio,
+        'Nombre municipio': pd.Categorical([m[1] for m in elegidos]),
+        'Sexo': pd.Categorical(rng.choice(['F', 'M'], n)),
+        'Edad': pd.array(rng.integers(0, 100, n), dtype='Int16'),
+        'Estado': pd.Categorical(rng.choice(['Leve', 'Fallecido'], n, p=[0.85, 0.15])),
+    })
+
+
+class PruebasGeografia(unittest.TestCase):
+
+    def setUp(self):
+        self.df = casos_sinteticos()
+        self.geografia = Geografia(self.df)
+
+    def test_busqueda_de_codigos(self):
+        """Cada código se encuentra con su nombre; los ausentes dan -1 y None"""
+        municipios = self.geografia.municipios
+        for codigo, nombre, _, _ in MUNICIPIOS:
+            with self.subTest(codigo=codigo):
+                self.assertEqual(municipios.codigos[municipios.posicion(codigo)], codigo)
+                self.assertEqual(municipios.nombre(codigo), nombre)
+        self.assertEqual(municipios.posicion(99999), -1)
+        self.assertIsNone(municipios.nombre(5002))
+        self.assertEqual(self.geografia.departamentos.nombre(52), 'NARIÑO')
+
+    def test_conteos_igual_a_groupby(self):
+        """El bincount sobre las posiciones cuenta igual que un groupby por código"""
+        municipios = self.geografia.municipios
+        fallecidos = (self.df['Estado'] == 'Fallecido').to_numpy()
+        codigos = self.df['Código divipola municipio']
+        for mascara in (None, fallecidos):
+            with self.subTest(solo_fallecidos=mascara is not None):
+                esperado = (codigos if mascara is None else codigos[mascara]).value_counts()
+                esperado = pd.Series(esperado.to_numpy(dtype=np.int64), index=esperado.index.astype(np.int64))
+                obtenido = pd.Series(municipios.contar(mascara=mascara), index=municipios.codigos)
+                pd.testing.assert_series_equal(obtenido.sort_index(), esperado.sort_index(), check_names=False)
+
+    def test_buscar_prefijo(self):
+        """La búsqueda por prefijo ignora tildes y mayúsculas y coincide con recorrer todos los nombres"""
+        municipios = self.geografia.municipios
+        for prefijo in ('la', 'LA UNION', 'quib', 'Ca', 'b', 'x', ''):
+            with self.subTest(prefijo=prefijo):
+                clave = normalizar_nombre(prefijo)
+                esperado = sorted(codigo for codigo, nombre in zip(municipios.codigos, municipios.nombres)
+                                  if normalizar_nombre(nombre).startswith(clave))
+                obtenido = sorted(municipios.codigos[municipios.buscar_prefijo(prefijo)])
+                self.assertEqual(obtenido, esperado)
+        self.assertEqual(len(municipios.buscar_prefijo('', limite=3)), 3)
+
+    def test_etiquetas_municipios(self):
+        """Los nombres repetidos se distinguen por el departamento"""
+        sugerencias = dict(self.geografia.buscar_municipios('la union'))
+        self.assertEqual(sugerencias, {'LA UNIÓN (ANTIOQUIA)': 5400, 'LA UNIÓN (NARIÑO)': 52399})
+        etiquetas = self.geografia.etiquetas_municipios()
+        self.assertEqual(len(set(etiquetas)), len(etiquetas))
+
+
+class PruebasFiltroMunicipio(unittest.TestCase):
+
+    def setUp(self):
+        self.df = casos_sinteticos()
+        self.motor = MotorFiltros(self.df)
+
+    def test_igual_a_mascara(self):
+        """Filtrar por municipio (y por sexo o edad) da las filas de la máscara equivalente"""
+        codigos = self.df['Código divipola municipio']
+        for codigo, _, _, _ in MUNICIPIOS + [(99999, None, None, None)]:
+            for sexo, edad_minima in ((None, None), ('F', None), ('M', 60)):
+                with self.subTest(codigo=codigo, sexo=sexo, edad_minima=edad_minima):
+                    igualdades = {'Código divipola municipio': codigo}
+                    mascara = (codigos == codigo).fillna(False)
+                    if sexo is not None:
+                        igualdades['Sexo'] = sexo
+                        mascara &= self.df['Sexo'] == sexo
+                    if edad_minima is not None:
+                        mascara &= (self.df['Edad'] >= edad_minima).fillna(False)
+                    np.testing.assert_array_equal(self.motor.filtrar(igualdades, edad_minima),
+                                                  np.flatnonzero(mascara.to_numpy(dtype=bool)))
+
+    def test_valor_no_numerico(self):
+        """Un código no numérico no encuentra filas"""
+        self.assertEqual(len(self.motor.filtrar({'Código divipola municipio': 'CALI'})), 0)
+
+
+class PruebasFallecidosGeografia(unittest.TestCase):
+
+    def test_departamentos_por_nombre_de_la_columna(self):
+        """
+        Los fallecidos por departamento usan los nombres de la columna (los
+        del combo y del filtro) aunque un código aparezca con otro nombre
+        """
+        df = casos_sinteticos()
+        df['Nombre departamento'] = df['Nombre departamento'].cat.add_categories(['NARINO'])
+        df.loc[df.index[:200][df['Código divipola departamento'].iloc[:200] == 52], 'Nombre departamento'] = 'NARINO'
+        obtenido = AnalizadorEpidemiologico(df).calcular_fallecidos_por_departamento()
+        fallecidos = df[df['Estado'] == 'Fallecido']
+        esperado = fallecidos['Nombre departamento'].astype(str).value_counts().sort_index()
+        self.assertEqual(list(obtenido.index), list(esperado.index))
+        self.assertEqual(obtenido.tolist(), esperado.tolist())
+
+    def test_municipios_igual_a_groupby(self):
+        """Fallecidos por municipio iguales a un groupby por código"""
+        df = casos_sinteticos()
+        analizador = AnalizadorEpidemiologico(df)
+        obtenido = analizador.calcular_fallecidos_por_municipio()
+        etiquetas = dict(zip(analizador.geografia().etiquetas_municipios(),
+                             analizador.geografia().municipios.codigos))
+        esperado = df.loc[df['Estado'] == 'Fallecido', 'Código divipola municipio'].value_counts()
+        self.assertEqual({etiquetas[etiqueta]: cantidad for etiqueta, cantidad in obtenido.items()},
+                         esperado.to_dict())
+        self.assertTrue(obtenido.is_monotonic_decreasing)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import threading
+
+from PyQt6.QtCore import QEvent, QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtWidgets import QLabel
+
+from carga_datos import OperacionCancelada
+
+
+class SenalesTarea(QObject):
+    """Señales emitidas por una Tarea (QRunnable no puede emitir señales)"""
+    progreso = pyqtSignal(object)
+    terminada = pyqtSignal(object)
+    fallida = pyqtSignal(str)
+    cancelada = pyqtSignal()
+
+
+class Tarea(QRunnable):
+    """
+    Ejecuta una función en el pool de hilos de Qt y notifica el resultado
+    mediante señales, que se entregan en el hilo de la interfaz.
+
+    La función puede recibir los métodos reportar_progreso y esta_cancelada
+    como callbacks para informar del avance y abortar cooperativamente
+    lanzando OperacionCancelada.
+    """
+
+    def __init__(self, funcion, *args, **kwargs):
+        super(Tarea, self).__init__()
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.senales = SenalesTarea()
+        self._cancelada = threading.Event()
+
+    def cancelar(self):
+        """Solicita la cancelación de la tarea"""
+        self._cancelada.set()
+
+    def esta_cancelada(self):
+        """Indica si se solicitó la cancelación"""
+        return self._cancelada.is_set()
+
+    def reportar_progreso(self, *valores):
+        """Envía un avance al hilo de la interfaz"""
+        self._emitir('progreso', valores)
+
+    def run(self):
+        try:
+            resultado = self.funcion(*self.args, **self.kwargs)
+        except OperacionCancelada:
+            self._emitir('cancelada')
+            return
+        except Exception as e:
+            print(f"Error en tarea en segundo plano: {e}")
+            self._emitir('fallida', str(e))
+            return
+
+        if self.esta_cancelada():
+            self._emitir('cancelada')
+        else:
+            self._emitir('terminada', resultado)
+
+    def _emitir(self, senal, *valores):
+        try:
+            getattr(self.senales, senal).emit(*valores)
+        except RuntimeError:
+            # La aplicación se cerró mientras la tarea seguía en curso
+            pass
+
+
+# Referencias a las tareas en curso para que Python no las libere mientras
+# se ejecutan, aunque quien las lanzó ya no las conserve (p. ej. al cancelar)
+_tareas_activas = set()
+
+
+def iniciar_tarea(tarea):
+    """Encola una tarea en el pool global de hilos de Qt"""
+    _tareas_activas.add(tarea)
+    liberar = lambda *args: _tareas_activas.discard(tarea)
+    tarea.senales.terminada.connect(liberar)
+    tarea.senales.fallida.connect(liberar)
+    tarea.senales.cancelada.connect(liberar)
+    QThreadPool.globalInstance().start(tarea)
+    return tarea
+
+
+class EjecutorUltimaSolicitud(QObject):
+    """
+    Ejecuta funciones en segundo plano quedándose solo con la solicitud más
+    reciente: si llega una solicitud mientras otra está en curso, la actual
+    se cancela y la nueva espera a que termine. Las solicitudes intermedias
+    se descartan sin calcularse y el resultado de una solicitud superada
+    nunca se entrega.
+    """
+    terminada = pyqtSignal(object)
+    fallida = pyqtSignal(str)
+    ocupado = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super(EjecutorUltimaSolicitud, self).__init__(parent)
+        self._tarea = None
+        self._pendiente = None
+
+    def esta_ocupado(self):
+        """Indica si hay una solicitud en curso o pendiente"""
+        return self._tarea is not None or self._pendiente is not None
+
+    def solicitar(self, funcion, *args, **kwargs):
+        """Programa la ejecución de funcion(*args, **kwargs) en segundo plano"""
+        if self._tarea is not None:
+            self._tarea.cancelar()
+            self._pendiente = (funcion, args, kwargs)
+            return
+        self._iniciar(funcion, args, kwargs)
+
+    def cancelar(self):
+        """Descarta la solicitud pendiente y cancela la que esté en curso"""
+        self._pendiente = None
+        if self._tarea is not None:
+            self._tarea.cancelar()
+            # Si aún no empezó se retira del pool; si ya corre, su resultado se ignora
+            if QThreadPool.globalInstance().tryTake(self._tarea):
+                _tareas_activas.discard(self._tarea)
+            self._tarea = None
+        self.ocupado.emit(False)
+
+    def _iniciar(self, funcion, args, kwargs):
+        tarea = Tarea(funcion, *args, **kwargs)
+        tarea.senales.terminada.connect(lambda resultado: self._finalizar(tarea, resultado))
+        tarea.senales.fallida.connect(lambda mensaje: self._finalizar(tarea, error=mensaje))
+        tarea.senales.cancelada.connect(lambda: self._finalizar(tarea, cancelada=True))
+        self._tarea = tarea
+        self.ocupado.emit(True)
+        iniciar_tarea(tarea)
+
+    def _finalizar(self, tarea, resultado=None, error=None, cancelada=False):
+        if tarea is not self._tarea:
+            return  # Solicitud ya descartada
+        self._tarea = None
+
+        # Hay una solicitud más reciente: este resultado ya no sirve
+        if self._pendiente is not None:
+            funcion, args, kwargs = self._pendiente
+            self._pendiente = None
+            self._iniciar(funcion, args, kwargs)
+            return
+
+        self.ocupado.emit(False)
+        if error is not None:
+            self.fallida.emit(error)
+        elif not cancelada:
+            self.terminada.emit(resultado)
+
+
+class IndicadorOcupado(QLabel):
+    """
+    Aviso semitransparente que cubre un widget (p. ej. el canvas de un
+    gráfico) mientras alguno de los ejecutores que sigue tiene trabajo en
+    curso o pendiente.
+    """
+
+    def __init__(self, widget, texto='Calculando...'):
+        super(IndicadorOcupado, self).__init__(texto, widget)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setStyleSheet('background-color: rgba(255, 255, 255, 170); color: #333333; font-size: 14pt;')
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self._ejecutores = []
+        self.hide()
+        # Seguir el tamaño del widget cubierto
+        widget.installEventFilter(self)
+
+    def seguir(self, ejecutor):
+        """Muestra el aviso mientras el ejecutor (EjecutorUltimaSolicitud) esté ocupado"""
+        self._ejecutores.append(ejecutor)
+        ejecutor.ocupado.connect(self._actualizar)
+
+    def _actualizar(self, *args):
+        if any(ejecutor.esta_ocupado() for ejecutor in self._ejecutores):
+            self.setGeometry(self.parentWidget().rect())
+            self.raise_()
+            self.show()
+        else:
+            self.hide()
+
+    def eventFilter(self, objeto, evento):
+        if evento.type() == QEvent.Type.Resize:
+            self.setGeometry(objeto.rect())
+        return False
@@ -1,9 +1,8 @@
 import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from PyQt6 import QtWidgets, uic
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QLabel, QComboBox, QTabWidget,
@@ -11,15 +10,50 @@ from PyQt6.QtWidgets import (
     QFormLayout, QLineEdit, QGroupBox
 )
 from PyQt6.QtCore import Qt
-from analizador_epidemiologico import AnalizadorEpidemiologico
+from graficos import (Grafico, dibujar_distribucion, dibujar_distribucion_pastel, dibujar_fallecidos_por_contagio,
+                      dibujar_fallecidos_por_departamento, dibujar_histograma_edades, dibujar_incidencia,
+                      dibujar_tasa_mortalidad, dibujar_total_fallecidos)
+from trabajadores import EjecutorUltimaSolicitud, IndicadorOcupado
 
 class VentanaAnalisisAvanzado(QDialog):
-    """Ventana para análisis epidemiológico avanzado"""
-    def __init__(self, df, parent=None):
+    """
+    Ventana para análisis epidemiológico avanzado.
+    
+    Trabaja sobre el analizador de la ventana principal (y sus cachés) y
+    está pensada para conservarse entre aperturas. La figura y el canvas
+    de cada pestaña se crean la primera vez que se muestra la pestaña.
+    """
+    def __init__(self, analizador, parent=None):
+        """
+        Args:
+            analizador (AnalizadorEpidemiologico): Analizador compartido con la ventana principal
+            parent (QWidget, opcional): Ventana padre
+        """
         super(VentanaAnalisisAvanzado, self).__init__(parent)
-        self.df = df
-        self.analizador = AnalizadorEpidemiologico(dataframe=df)
+        self.analizador = analizador
+        # Gráficos de cada pestaña, creados bajo demanda (ver construir_grafico)
+        self.layouts_grafico = {}
+        self.figuras = {}
+        self.ejecutores = {}
         self.setup_ui()
+    
+    @property
+    def df(self):
+        """DataFrame del analizador"""
+        return self.analizador.df
+    
+    def establecer_analizador(self, analizador):
+        """
+        Cambia el analizador (p. ej. tras cargar otro archivo o aplicar una
+        actualización) conservando la ventana y sus gráficos
+        
+        Args:
+            analizador (AnalizadorEpidemiologico): Analizador con los datos nuevos
+        """
+        for ejecutor in self.ejecutores.values():
+            ejecutor.cancelar()
+        self.analizador = analizador
+        self.configurar_columnas()
         
     def setup_ui(self):
         """Configura la interfaz de usuario para análisis avanzados"""
@@ -53,6 +87,18 @@ class VentanaAnalisisAvanzado(QDialog):
         # Configurar pestaña de mortalidad
         self.setup_tab_mortalidad()
         
+        # Opciones que dependen de las columnas de los datos
+        self.configurar_columnas()
+        
+        # Los gráficos se crean al mostrar cada pestaña por primera vez
+        self.nombres_grafico = {
+            self.tab_incidencia: 'incidencia',
+            self.tab_distribucion: 'distribucion',
+            self.tab_mortalidad: 'mortalidad',
+            self.tab_fallecidos: 'fallecidos',
+        }
+        self.tabs.currentChanged.connect(self.pestana_mostrada)
+        
         # Agregar tabs al layout principal
         layout_principal.addWidget(self.tabs)
         
@@ -62,6 +108,91 @@ class VentanaAnalisisAvanzado(QDialog):
         layout_principal.addWidget(btn_cerrar)
         
         self.setLayout(layout_principal)
+    
+    def configurar_columnas(self):
+        """Llena los combos que dependen de las columnas del DataFrame, conservando la selección"""
+        columnas_fecha = [col for col in self.df.columns if 'fecha' in col.lower()]
+        seleccion = self.cmb_columna_fecha.currentText() or 'fecha de diagnóstico'
+        self.cmb_columna_fecha.clear()
+        self.cmb_columna_fecha.addItems(columnas_fecha)
+        if seleccion in columnas_fecha:
+            self.cmb_columna_fecha.setCurrentText(seleccion)
+        
+        columnas_grupo = ['Edad', 'Sexo', 'Estado', 'Nombre departamento', 'Nombre municipio']
+        columnas_grupo = [col for col in columnas_grupo if col in self.df.columns]
+        seleccion = self.cmb_columna_grupo.currentText()
+        self.cmb_columna_grupo.clear()
+        self.cmb_columna_grupo.addItems(columnas_grupo)
+        if seleccion in columnas_grupo:
+            self.cmb_columna_grupo.setCurrentText(seleccion)
+    
+    def agregar_area_grafico(self, nombre, layout):
+        """Reserva en el layout de una pestaña el lugar de su gráfico"""
+        self.layouts_grafico[nombre] = layout
+    
+    def construir_grafico(self, nombre):
+        """
+        Crea la figura, el canvas y el ejecutor de un gráfico la primera vez
+        que se necesitan
+        
+        Returns:
+            EjecutorUltimaSolicitud: Ejecutor del gráfico
+        """
+        if nombre not in self.ejecutores:
+            figure = Figure(figsize=(10, 6))
+            canvas = FigureCanvas(figure)
+            canvas.setSizePolicy(
+                QtWidgets.QSizePolicy.Policy.Expanding,
+                QtWidgets.QSizePolicy.Policy.Expanding
+            )
+            self.layouts_grafico[nombre].addWidget(canvas)
+            self.figuras[nombre] = figure
+            # Cada gráfico se calcula en segundo plano con su propio ejecutor
+            self.ejecutores[nombre] = self.crear_ejecutor(figure, canvas)
+        return self.ejecutores[nombre]
+    
+    def pestana_mostrada(self, indice):
+        """Crea el gráfico de la pestaña que se acaba de mostrar"""
+        nombre = self.nombres_grafico.get(self.tabs.widget(indice))
+        if nombre is not None:
+            self.construir_grafico(nombre)
+    
+    def showEvent(self, evento):
+        """Al abrir la ventana se crea solo el gráfico de la pestaña visible"""
+        self.pestana_mostrada(self.tabs.currentIndex())
+        super(VentanaAnalisisAvanzado, self).showEvent(evento)
+    
+    def crear_ejecutor(self, figure, canvas):
+        """
+        Crea el ejecutor en segundo plano de un gráfico: un pedido nuevo
+        descarta el anterior y el canvas muestra un aviso mientras calcula
+        
+        Returns:
+            EjecutorUltimaSolicitud: Ejecutor cuyas funciones devuelven la
+            función de dibujo (recibe el Grafico) a ejecutar en este hilo
+        """
+        grafico = Grafico(figure, canvas)
+        ejecutor = EjecutorUltimaSolicitud(self)
+        ejecutor.terminada.connect(lambda dibujar: self.dibujar(grafico, dibujar))
+        ejecutor.fallida.connect(
+            lambda mensaje: QMessageBox.warning(self, "Error", f"Error al generar gráfico: {mensaje}")
+        )
+        IndicadorOcupado(canvas).seguir(ejecutor)
+        return ejecutor
+    
+    def dibujar(self, grafico, dibujar):
+        """Actualiza un gráfico con datos ya calculados (en el hilo de la interfaz)"""
+        try:
+            dibujar(grafico)
+            
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Error al generar gráfico: {str(e)}")
+    
+    def hideEvent(self, evento):
+        """Descarta los cálculos pendientes al cerrar la ventana (la ventana se conserva)"""
+        for ejecutor in self.ejecutores.values():
+            ejecutor.cancelar()
+        super(VentanaAnalisisAvanzado, self).hideEvent(evento)
         
     def setup_tab_fallecidos(self):
         """Configura la pestaña de análisis de fallecidos"""
@@ -80,45 +211,37 @@ class VentanaAnalisisAvanzado(QDialog):
         btn_generar = QPushButton("Generar Gráfico")
         btn_generar.clicked.connect(self.generar_grafico_fallecidos)
         
-        # Área del gráfico
-        self.figure_fallecidos = plt.figure(figsize=(10, 6))
-        self.canvas_fallecidos = FigureCanvas(self.figure_fallecidos)
-        self.canvas_fallecidos.setSizePolicy(
-            QtWidgets.QSizePolicy.Policy.Expanding,
-            QtWidgets.QSizePolicy.Policy.Expanding
-        )
-        
         # Organizar elementos
         layout.addWidget(QLabel("Seleccione el tipo de análisis:"))
         layout.addWidget(self.cmb_tipo_fallecidos)
         layout.addWidget(btn_generar)
-        layout.addWidget(self.canvas_fallecidos)
+        self.agregar_area_grafico('fallecidos', layout)
         
         self.tab_fallecidos.setLayout(layout)
     
     def generar_grafico_fallecidos(self):
         """Genera los diferentes gráficos de fallecidos"""
-        try:
-            self.figure_fallecidos.clear()
-            ax = self.figure_fallecidos.add_subplot(111)
-            
-            tipo = self.cmb_tipo_fallecidos.currentText()
-            
+        analizador = self.analizador
+        tipo = self.cmb_tipo_fallecidos.currentText()
+        
+        # Cálculo (en segundo plano) y dibujo de cada tipo
+        def preparar():
             if tipo == "Resumen general":
-                self.analizador.graficar_fallecidos(ax=ax)
+                cantidad = analizador.calcular_fallecidos()
+                return lambda grafico: dibujar_total_fallecidos(grafico, cantidad)
             elif tipo == "Por departamento":
-                self.analizador.graficar_fallecidos_por_departamento(ax=ax)
+                conteo = analizador.calcular_fallecidos_por_departamento()
+                return lambda grafico: dibujar_fallecidos_por_departamento(grafico, conteo)
             elif tipo == "Distribución por edad":
                 # Corrección: Llamar al método con el nombre correcto
-                self.analizador.graficar_distribucion_Edad_fallecidos(ax=ax)
+                histograma = analizador.calcular_histograma_edades_fallecidos()
+                return lambda grafico: dibujar_histograma_edades(grafico, histograma)
             elif tipo == "Por tipo de contagio":
-                self.analizador.graficar_fallecidos_por_contagio(ax=ax)
-            
-            self.figure_fallecidos.tight_layout()  # Ajuste automático del layout
-            self.canvas_fallecidos.draw()
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Error al generar gráfico: {str(e)}")
+                conteo = analizador.calcular_fallecidos_por_contagio()
+                return lambda grafico: dibujar_fallecidos_por_contagio(grafico, conteo)
+            return lambda grafico: None
+        
+        self.construir_grafico('fallecidos').solicitar(preparar)
         
     def setup_tab_incidencia(self):
         """Configura la pestaña de análisis de incidencia"""
@@ -134,12 +257,8 @@ class VentanaAnalisisAvanzado(QDialog):
         self.cmb_periodo.setCurrentText("Mensual (M)")
         layout_opciones.addRow("Período:", self.cmb_periodo)
         
-        # ComboBox para seleccionar columna de fecha
+        # ComboBox para seleccionar columna de fecha (se llena en configurar_columnas)
         self.cmb_columna_fecha = QComboBox()
-        columnas_fecha = [col for col in self.df.columns if 'fecha' in col.lower()]
-        self.cmb_columna_fecha.addItems(columnas_fecha)
-        if 'fecha de diagnóstico' in columnas_fecha:
-            self.cmb_columna_fecha.setCurrentText('fecha de diagnóstico')
         layout_opciones.addRow("Columna de fecha:", self.cmb_columna_fecha)
         
         # Botón para generar gráfico
@@ -151,13 +270,7 @@ class VentanaAnalisisAvanzado(QDialog):
         layout.addWidget(group_opciones)
         
         # Área para el gráfico
-        self.figure_incidencia = plt.figure(figsize=(10, 6))
-        self.canvas_incidencia = FigureCanvas(self.figure_incidencia)
-        self.canvas_incidencia.setSizePolicy(
-            QtWidgets.QSizePolicy.Policy.Expanding,
-            QtWidgets.QSizePolicy.Policy.Expanding
-        )
-        layout.addWidget(self.canvas_incidencia)
+        self.agregar_area_grafico('incidencia', layout)
         
         self.tab_incidencia.setLayout(layout)
         
@@ -170,10 +283,8 @@ class VentanaAnalisisAvanzado(QDialog):
         layout_opciones = QFormLayout()
         
         # ComboBox para seleccionar columna de agrupación
+        # (se llena en configurar_columnas)
         self.cmb_columna_grupo = QComboBox()
-        columnas_grupo = ['Edad', 'Sexo', 'Estado', 'Nombre departamento', 'Nombre municipio']
-        columnas_grupo = [col for col in columnas_grupo if col in self.df.columns]
-        self.cmb_columna_grupo.addItems(columnas_grupo)
         layout_opciones.addRow("Agrupar por:", self.cmb_columna_grupo)
         
         # ComboBox para tipo de gráfico
@@ -195,13 +306,7 @@ class VentanaAnalisisAvanzado(QDialog):
         layout.addWidget(group_opciones)
         
         # Área para el gráfico
-        self.figure_distribucion = plt.figure(figsize=(10, 6))
-        self.canvas_distribucion = FigureCanvas(self.figure_distribucion)
-        self.canvas_distribucion.setSizePolicy(
-            QtWidgets.QSizePolicy.Policy.Expanding,
-            QtWidgets.QSizePolicy.Policy.Expanding
-        )
-        layout.addWidget(self.canvas_distribucion)
+        self.agregar_area_grafico('distribucion', layout)
         
         self.tab_distribucion.setLayout(layout)
         
@@ -233,109 +338,84 @@ class VentanaAnalisisAvanzado(QDialog):
         layout.addWidget(group_opciones)
         
         # Área para el gráfico
-        self.figure_mortalidad = plt.figure(figsize=(10, 6))
-        self.canvas_mortalidad = FigureCanvas(self.figure_mortalidad)
-        self.canvas_mortalidad.setSizePolicy(
-            QtWidgets.QSizePolicy.Policy.Expanding,
-            QtWidgets.QSizePolicy.Policy.Expanding
-        )
-        layout.addWidget(self.canvas_mortalidad)
+        self.agregar_area_grafico('mortalidad', layout)
         
         self.tab_mortalidad.setLayout(layout)
     
     def generar_grafico_incidencia(self):
         """Genera el gráfico de incidencia según las opciones seleccionadas"""
-        try:
-            # Obtener opciones seleccionadas
-            periodo_texto = self.cmb_periodo.currentText()
-            periodo = periodo_texto.split("(")[1].split(")")[0]  # Extraer D, W, M o Y
-            columna_fecha = self.cmb_columna_fecha.currentText()
-            
-            # Limpiar figura actual
-            self.figure_incidencia.clear()
-            ax = self.figure_incidencia.add_subplot(111)
-            
-            # Generar gráfico
-            self.analizador.graficar_incidencia(periodo=periodo, columna_fecha=columna_fecha, ax=ax)
-            
-            # Ajustar automáticamente el layout
-            self.figure_incidencia.tight_layout()
-            
-            # Actualizar canvas
-            self.canvas_incidencia.draw()
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Error al generar gráfico: {str(e)}")
+        # Obtener opciones seleccionadas
+        periodo_texto = self.cmb_periodo.currentText()
+        periodo = periodo_texto.split("(")[1].split(")")[0]  # Extraer D, W, M o Y
+        columna_fecha = self.cmb_columna_fecha.currentText()
+        analizador = self.analizador
+        
+        def preparar():
+            # Calcular en segundo plano; en este hilo solo se actualiza la línea
+            incidencia = analizador.calcular_incidencia_por_periodo(periodo, columna_fecha)
+            return lambda grafico: dibujar_incidencia(grafico, incidencia, periodo)
+        
+        self.construir_grafico('incidencia').solicitar(preparar)
     
     def generar_grafico_distribucion(self):
         """Genera el gráfico de distribución según las opciones seleccionadas"""
-        try:
-            # Obtener opciones seleccionadas
-            columna_grupo = self.cmb_columna_grupo.currentText()
-            tipo_grafico = 'pie' if self.cmb_tipo_grafico.currentText() == "Pastel" else 'bar'
-            usar_bins = self.check_usar_bins.isChecked() and columna_grupo == 'Edad'
-            
-            # Configurar bins si es necesario
-            bins = None
-            if usar_bins:
-                bins = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 120]
-            
-            # Limpiar figura actual
-            self.figure_distribucion.clear()
-            ax = self.figure_distribucion.add_subplot(111)
-            
-            # Generar gráfico
-            self.analizador.graficar_distribucion_por_grupo(
-                columna_grupo=columna_grupo, 
-                bins=bins,
-                tipo_grafico=tipo_grafico,
-                ax=ax
-            )
-            
-            # Ajustar automáticamente el layout
-            self.figure_distribucion.tight_layout()
-            
-            # Actualizar canvas
-            self.canvas_distribucion.draw()
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Error al generar gráfico: {str(e)}")
+        # Obtener opciones seleccionadas
+        columna_grupo = self.cmb_columna_grupo.currentText()
+        tipo_grafico = 'pie' if self.cmb_tipo_grafico.currentText() == "Pastel" else 'bar'
+        usar_bins = self.check_usar_bins.isChecked() and columna_grupo == 'Edad'
+        
+        # Configurar bins si es necesario
+        bins = None
+        if usar_bins:
+            bins = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 120]
+        analizador = self.analizador
+        
+        def preparar():
+            # Calcular en segundo plano; en este hilo solo se actualizan las barras
+            distribucion = analizador.calcular_distribucion_por_grupo(columna_grupo, bins)
+            if tipo_grafico == 'bar':
+                return lambda grafico: dibujar_distribucion(grafico, distribucion, columna_grupo)
+            # El gráfico de pastel se redibuja completo
+            return lambda grafico: dibujar_distribucion_pastel(grafico, distribucion, columna_grupo)
+        
+        self.construir_grafico('distribucion').solicitar(preparar)
     
     def generar_grafico_mortalidad(self):
         """Genera el gráfico de mortalidad según las opciones seleccionadas"""
-        try:
-            # Obtener opciones seleccionadas
-            columna_mort = self.cmb_columna_mort.currentText()
-            columna_mort = None if columna_mort == 'General' else columna_mort
-            usar_bins = self.check_usar_bins_mort.isChecked() and columna_mort == 'edad'
-            
-            # Configurar bins si es necesario
-            bins = None
-            if usar_bins:
-                bins = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 120]
-            
-            # Limpiar figura actual
-            self.figure_mortalidad.clear()
-            ax = self.figure_mortalidad.add_subplot(111)
-            
-            # Generar gráfico
-            self.analizador.graficar_tasa_mortalidad(
-                por_grupo=columna_mort, 
-                bins=bins,
-                ax=ax
-            )
-            
-            # Ajustar automáticamente el layout
-            self.figure_mortalidad.tight_layout()
-            
-            # Actualizar canvas
-            self.canvas_mortalidad.draw()
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Error al generar gráfico: {str(e)}")
+        # Obtener opciones seleccionadas
+        columna_mort = self.cmb_columna_mort.currentText()
+        columna_mort = None if columna_mort == 'General' else columna_mort
+        usar_bins = self.check_usar_bins_mort.isChecked() and columna_mort == 'edad'
+        
+        # Configurar bins si es necesario
+        bins = None
+        if usar_bins:
+            bins = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 120]
+        analizador = self.analizador
+        
+        def preparar():
+            # Calcular en segundo plano; en este hilo solo se actualizan las barras
+            tasa_mortalidad = analizador.calcular_tasa_mortalidad(columna_mort, bins)
+            return lambda grafico: dibujar_tasa_mortalidad(grafico, tasa_mortalidad, columna_mort)
+        
+        self.construir_grafico('mortalidad').solicitar(preparar)
 
 # Esta clase se puede usar en main_app.py añadiendo un botón para abrir el análisis avanzado
-def abrir_analisis_avanzado(df):
-    """Función para abrir la ventana de análisis avanzado desde la aplicación principal"""
-    ventana = VentanaAnalisisAvanzado(df)
-    ventana.exec()
\ No newline at end of file
+def abrir_analisis_avanzado(analizador, ventana=None, parent=None):
+    """
+    Función para abrir la ventana de análisis avanzado desde la aplicación principal
+    
+    Args:
+        analizador (AnalizadorEpidemiologico): Analizador de la aplicación principal
+        ventana (VentanaAnalisisAvanzado, opcional): Ventana de una apertura anterior, que se reutiliza
+        parent (QWidget, opcional): Ventana padre de una ventana nueva
+        
+    Returns:
+        VentanaAnalisisAvanzado: Ventana mostrada, para reutilizarla en la siguiente apertura
+    """
+    if ventana is None:
+        ventana = VentanaAnalisisAvanzado(analizador, parent)
+    elif ventana.analizador is not analizador:
+        ventana.establecer_analizador(analizador)
+    ventana.exec()
+    return ventana
\ No newline at end of file